@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import (
     Project,
     Skill,
@@ -8,6 +9,7 @@ from .models import (
     Technology,
     SocialProfile,
     PortfolioAnalytics,
+    OutboxEmail,
 )
 
 @admin.register(Project)
@@ -47,6 +49,12 @@ class EducationAdmin(admin.ModelAdmin):
 @admin.register(Contact)
 class ContactAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'status', 'created_at')
+    # Walks the (-created_at, -id) index; skips the unfiltered COUNT(*) on every page
+    ordering = ('-created_at', '-id')
+    show_full_result_count = False
+    # The changelist pages with OFFSET, so older messages are reached by
+    # drilling down to a year, month or day rather than paging deep
+    date_hierarchy = 'created_at'
     list_filter = ('status', 'created_at')
     search_fields = ('name', 'email', 'message')
     readonly_fields = ('created_at', 'ip_address', 'user_agent')
@@ -78,7 +86,23 @@ class SocialProfileAdmin(admin.ModelAdmin):
 
 @admin.register(PortfolioAnalytics)
 class PortfolioAnalyticsAdmin(admin.ModelAdmin):
-    list_display = ('date', 'page_views', 'contact_submissions', 'ai_chat_interactions', 'unique_visitors')
+    list_display = (
+        'date', 'page_views', 'project_views', 'chat_opens', 'contact_submissions',
+        'ai_chat_interactions', 'unique_visitors',
+    )
     list_filter = ('date',)
     readonly_fields = ('date',)
     ordering = ('-date',)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    actions = ['retry_now']
+    
+    @admin.action(description="Retry selected emails now")
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now())
+        self.message_user(request, f"{updated} email(s) queued for retry")
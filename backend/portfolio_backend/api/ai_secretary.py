@@ -4,101 +4,72 @@ Simple Gemini AI integration for portfolio chat
 """
 
 import logging
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import List, Dict, Any
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.utils import timezone
+from .conversation_store import ConversationStore, build_conversation_store
+from .intents import LEAD_INTENTS, classify
+from .portfolio_context import build_relevant_context, get_portfolio_context
+from .retrieval import portfolio_retriever
 
 logger = logging.getLogger(__name__)
 
 class AISecretaryService:
     """Simple AI secretary service using Gemini AI"""
     
-    def __init__(self):
-        self.conversation_store = {}
+    def __init__(self, conversation_store: ConversationStore = None):
+        self.conversation_store = conversation_store or build_conversation_store()
         
     def get_portfolio_context(self) -> str:
-        """Get basic portfolio context"""
-        return """You are Didier Imanirahari's professional AI secretary.
+        """Get the portfolio context, rendered from the database and cached"""
+        return get_portfolio_context()
+    
+    async def aget_portfolio_context(self) -> str:
+        """Get the portfolio context without blocking the event loop"""
+        return await sync_to_async(get_portfolio_context)()
+    
+    def get_chat_context(self, message: str) -> str:
+        """Context for one question: only the portfolio rows relevant to it
         
-DIDIER'S PROFILE:
-- Python Engineer | Backend & Testing Specialist
-- Specializes in Python, Django/DRF, and rigorous code testing
-- Building scalable backend solutions with comprehensive testing
-- Location: Kigali, Rwanda
-- Contact: didier53053@gmail.com
-- GitHub: https://github.com/didier-building
-
-KEY SKILLS:
-- Python & Django/DRF (90%+)
-- PyTest & Unittest (90%+)
-- SQL & Database Design
-- Docker & Kubernetes
-- CI/CD Pipelines
-- Technical Documentation
-
-MAJOR PROJECTS:
-- Order & Inventory Management System (Django/DRF, PostgreSQL, Celery)
-- Career Compass Platform (Django/DRF, JWT)
-- Blockchain Agricultural Supply Chain
-- DevOps Templates & Workflows
-- NLPAY Academy (GDG Hackathon - Team Lead)
-
-INSTRUCTIONS:
-1. Be professional and helpful
-2. Answer questions about Didier's backend development and testing expertise
-3. For work inquiries, direct them to didier53053@gmail.com
-4. Stay focused on professional topics
-5. Be specific about technologies and experience"""
+        Falls back to the full portfolio context when retrieval is off,
+        numpy is missing, or nothing in the index matches the question.
+        """
+        if getattr(settings, 'AI_RETRIEVAL_ENABLED', True):
+            lines = portfolio_retriever.search(message)
+            if lines:
+                return build_relevant_context(lines, getattr(settings, 'AI_SECRETARY_CONTEXT_MAX_CHARS', 4000))
+        return get_portfolio_context()
+    
+    async def aget_chat_context(self, message: str) -> str:
+        """Get the context for one question without blocking the event loop"""
+        return await sync_to_async(self.get_chat_context)(message)
     
     def store_conversation(self, session_id: str, message: Dict[str, Any]) -> None:
         """Store conversation message"""
-        if session_id not in self.conversation_store:
-            self.conversation_store[session_id] = {
-                'messages': [],
-                'started_at': timezone.now(),
-                'last_activity': timezone.now()
-            }
-        
-        self.conversation_store[session_id]['messages'].append({
-            **message,
-            'timestamp': timezone.now().isoformat()
-        })
-        self.conversation_store[session_id]['last_activity'] = timezone.now()
-        
-        # Keep only last 10 messages per conversation
-        if len(self.conversation_store[session_id]['messages']) > 10:
-            self.conversation_store[session_id]['messages'] = \
-                self.conversation_store[session_id]['messages'][-10:]
+        self.conversation_store.append(session_id, message)
     
     def get_conversation_history(self, session_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get conversation history for a session"""
-        if session_id not in self.conversation_store:
-            return []
-        
-        messages = self.conversation_store[session_id]['messages']
-        return messages[-limit:] if messages else []
+        return self.conversation_store.history(session_id, limit)
+    
+    async def astore_conversation(self, session_id: str, message: Dict[str, Any]) -> None:
+        """Store conversation message without blocking the event loop"""
+        await self.conversation_store.aappend(session_id, message)
+    
+    async def aget_conversation_history(self, session_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get conversation history without blocking the event loop"""
+        return await self.conversation_store.ahistory(session_id, limit)
     
     def cleanup_old_conversations(self, hours: int = 24) -> int:
         """Clean up conversations older than specified hours"""
-        cutoff_time = timezone.now() - timedelta(hours=hours)
-        cleaned_count = 0
-        
-        sessions_to_remove = []
-        for session_id, data in self.conversation_store.items():
-            if data['last_activity'] < cutoff_time:
-                sessions_to_remove.append(session_id)
-        
-        for session_id in sessions_to_remove:
-            del self.conversation_store[session_id]
-            cleaned_count += 1
-        
-        return cleaned_count
+        return self.conversation_store.cleanup(timedelta(hours=hours))
     
     def get_conversation_analytics(self) -> Dict[str, Any]:
         """Get basic analytics about conversations"""
-        total_conversations = len(self.conversation_store)
-        total_messages = sum(len(data['messages']) for data in self.conversation_store.values())
+        stats = self.conversation_store.stats()
+        total_conversations = stats['total_conversations']
+        total_messages = stats['total_messages']
         
         return {
             'total_conversations': total_conversations,
@@ -109,10 +80,10 @@ INSTRUCTIONS:
     def log_visitor_inquiry(self, message: str, session_id: str, ip_address: str = None) -> None:
         """Log visitor inquiry for analytics"""
         try:
-            contact_keywords = ['hire', 'work', 'project', 'contact', 'available', 'freelance']
-            has_contact_intent = any(keyword in message.lower() for keyword in contact_keywords)
+            intents = classify(message)
+            has_contact_intent = not LEAD_INTENTS.isdisjoint(intents)
             
-            logger.info(f"AI Secretary inquiry - Session: {session_id}, Contact Intent: {has_contact_intent}")
+            logger.info(f"AI Secretary inquiry - Session: {session_id}, Contact Intent: {has_contact_intent}, Intents: {intents}")
             
         except Exception as e:
             logger.error(f"Error logging visitor inquiry: {e}")
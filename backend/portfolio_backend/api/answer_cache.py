@@ -0,0 +1,120 @@
+"""
+Answer cache for repeated AI secretary questions
+Local LRU/TTL tier in front of the shared Django cache
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from django.conf import settings
+from django.core.cache import caches
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(message: str) -> str:
+    """Fold case, punctuation and whitespace so trivial variants share an answer"""
+    message = _PUNCTUATION.sub(' ', message.casefold())
+    return _WHITESPACE.sub(' ', message).strip()
+
+
+class AnswerCache:
+    """Caches model answers keyed on the normalized question and the context
+
+    Lookups hit a per-process LRU first (microseconds), then the shared
+    cache, which is what the ``warm_answer_cache`` command fills at deploy
+    time. Changing the portfolio context changes every key.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: int = 6 * 60 * 60,
+                 alias: str = 'default', prefix: str = 'ai:answer'):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.alias = alias
+        self.prefix = prefix
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, message: str, context: str) -> str:
+        context_hash = hashlib.sha1(context.encode()).hexdigest()
+        question_hash = hashlib.sha1(normalize_question(message).encode()).hexdigest()
+        return f"{self.prefix}:{context_hash[:16]}:{question_hash}"
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, answer = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return answer
+
+    def _set_local(self, key: str, answer: str) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, answer)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _record(self, answer: Optional[str]) -> Optional[str]:
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
+    def get(self, message: str, context: str) -> Optional[str]:
+        key = self.make_key(message, context)
+        answer = self._get_local(key)
+        if answer is None:
+            answer = self.cache.get(key)
+            if answer is not None:
+                self._set_local(key, answer)
+        return self._record(answer)
+
+    async def aget(self, message: str, context: str) -> Optional[str]:
+        key = self.make_key(message, context)
+        answer = self._get_local(key)
+        if answer is None:
+            answer = await self.cache.aget(key)
+            if answer is not None:
+                self._set_local(key, answer)
+        return self._record(answer)
+
+    def set(self, message: str, context: str, answer: str) -> None:
+        key = self.make_key(message, context)
+        self._set_local(key, answer)
+        self.cache.set(key, answer, self.ttl)
+
+    async def aset(self, message: str, context: str, answer: str) -> None:
+        key = self.make_key(message, context)
+        self._set_local(key, answer)
+        await self.cache.aset(key, answer, self.ttl)
+
+    def clear_local(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries)}
+
+
+def build_answer_cache() -> AnswerCache:
+    return AnswerCache(
+        max_entries=getattr(settings, 'AI_ANSWER_CACHE_SIZE', 1000),
+        ttl=getattr(settings, 'AI_ANSWER_CACHE_TTL', 6 * 60 * 60),
+    )
@@ -0,0 +1,169 @@
+"""
+Versioned response cache for the read-only API
+Each content model has a version counter in the cache that model signals
+bump; cache keys embed the versions, so stale entries are simply never
+read again and expire on their own.
+"""
+
+import hashlib
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from rest_framework.response import Response
+from .compression import compress_variants, serve_variant
+
+
+def _version_key(model) -> str:
+    return f"content:version:{model._meta.label_lower}"
+
+
+def _modified_key(model) -> str:
+    return f"content:modified:{model._meta.label_lower}"
+
+
+def _new_base_version() -> int:
+    # Counters start from the clock so a culled or restarted key never
+    # reuses a value an older cache entry was stored under
+    return time.time_ns()
+
+
+def content_versions(models) -> tuple:
+    """Current version of each model, initialising missing counters"""
+    keys = [_version_key(model) for model in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_base_version(), None)
+            found[key] = cache.get(key)
+    return tuple(found[key] for key in keys)
+
+
+def content_last_modified(models):
+    """Newest change time (epoch seconds) across models, or None if all are empty"""
+    keys = {_modified_key(model): model for model in models}
+    found = cache.get_many(list(keys))
+    for key, model in keys.items():
+        if key not in found:
+            latest = model.objects.order_by().aggregate(latest=Max('updated_at'))['latest']
+            cache.add(key, latest.timestamp() if latest else 0, None)
+            found[key] = cache.get(key)
+    latest = max(found.values(), default=0)
+    return int(latest) if latest else None
+
+
+def bump_version(model) -> None:
+    """Invalidate every cached entry that depends on ``model``"""
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _new_base_version(), None)
+    cache.set(_modified_key(model), time.time(), None)
+
+
+def content_fingerprint(versions, *parts) -> str:
+    """Digest of content versions plus request-specific parts"""
+    raw = '|'.join(str(part) for part in (*versions, *parts))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def versioned_key(prefix: str, versions, *parts) -> str:
+    """Build a cache key from content versions and request-specific parts"""
+    return f"{prefix}:{content_fingerprint(versions, *parts)}"
+
+
+class ContentModelsMixin:
+    """Declares which models a viewset's responses are built from
+
+    ``content_models`` lists every model whose rows appear in the
+    response, e.g. ``(Project, Technology)`` for projects.
+    """
+    content_models = ()
+
+    def get_content_models(self):
+        return self.content_models or (self.queryset.model,)
+
+    def get_content_versions(self):
+        if not hasattr(self, '_content_versions'):
+            self._content_versions = content_versions(self.get_content_models())
+        return self._content_versions
+
+
+class VersionedCacheMixin(ContentModelsMixin):
+    """Serves list and detail responses from the versioned cache
+
+    Only JSON renderings are cached; the browsable API embeds per-user
+    markup and is always rendered fresh. Entries hold the body with its
+    compressed variants, so a hit only picks one for Accept-Encoding.
+    Detail entries also keep the pk of the object they show, restored as
+    ``object_pk`` on a hit just as ``get_object`` sets it on a miss.
+
+    Keys use only the query parameters that change the response, in sorted
+    order. Responses to queries with any other parameter are served from
+    that key but never stored, so made-up query strings cannot fill the
+    cache. Pagination links are absolute, so the scheme and host (checked
+    against ALLOWED_HOSTS) are part of the key too. Entries expire after
+    ``API_CACHE_TIMEOUT`` seconds.
+    """
+    cache_query_params = ('page', 'page_size', 'cursor', 'search', 'ordering',
+                          'fields', 'omit', 'expand', 'format')
+
+    def get_cache_query_params(self):
+        return {*self.cache_query_params, *(getattr(self, 'filterset_fields', None) or ())}
+
+    def get_cache_query(self, request):
+        """``(canonical query string, whether the request had other parameters)``"""
+        allowed = self.get_cache_query_params()
+        params = request.query_params
+        query = urlencode(sorted(
+            (name, value) for name in params if name in allowed for value in params.getlist(name)
+        ))
+        return query, any(name not in allowed for name in params)
+
+    def get_response_cache_key(self, request) -> str:
+        return versioned_key(
+            'api:response:entry', self.get_content_versions(),
+            request.scheme, request.get_host(), request.path,
+            self.get_cache_query(request)[0], request.accepted_media_type
+        )
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            variants, content_type, self.object_pk = cached
+            return serve_variant(request, HttpResponse(content_type=content_type), variants)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and not self.get_cache_query(request)[1]:
+            # Stored once rendered, see finalize_response
+            self._response_cache_key = key
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if key and isinstance(response, Response):
+            response.render()
+            variants = compress_variants(response.content)
+            timeout = getattr(settings, 'API_CACHE_TIMEOUT', 60 * 60 * 24)
+            cache.set(key, (variants, response['Content-Type'], getattr(self, 'object_pk', None)), timeout)
+            serve_variant(request, response, variants)
+        return response
+
+    def get_object(self):
+        obj = super().get_object()
+        self.object_pk = obj.pk
+        return obj
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
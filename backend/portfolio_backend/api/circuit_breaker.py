@@ -0,0 +1,120 @@
+"""
+Circuit breaker for upstream AI calls
+Stops calling a failing or slow upstream and probes it again later
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures, half-open probes to recover
+
+    A call counts as a failure when it raises, times out, or takes longer
+    than ``slow_call_threshold`` seconds. After ``failure_threshold``
+    consecutive failures the breaker opens and rejects calls outright.
+    Once ``recovery_timeout`` seconds have passed it lets
+    ``half_open_max_calls`` probes through: a success closes it again, a
+    failure reopens it. A probe that is cancelled gives its slot back with
+    ``release``, and one that never reports frees it after ``probe_timeout``
+    seconds, so the breaker cannot stay half-open for good. Successes of
+    calls that started before the breaker opened are ignored; only a
+    probe's success closes it.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 slow_call_threshold: Optional[float] = None, half_open_max_calls: int = 1,
+                 probe_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.half_open_max_calls = half_open_max_calls
+        self.probe_timeout = probe_timeout
+        self.lock = threading.Lock()
+        self._state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.half_open_calls = 0
+        self.probe_started_at = None
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self.half_open_calls = 0
+        if (self._state == self.HALF_OPEN and self.half_open_calls
+                and time.monotonic() - self.probe_started_at >= self.probe_timeout):
+            # The probes never reported back; let new ones through
+            self.half_open_calls = 0
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether the caller may try the upstream now"""
+        with self.lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self.half_open_calls < self.half_open_max_calls:
+                self.half_open_calls += 1
+                self.probe_started_at = time.monotonic()
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def release(self) -> None:
+        """Give back a probe slot for a call that ended without an outcome (cancelled)"""
+        with self.lock:
+            if self._state == self.HALF_OPEN and self.half_open_calls:
+                self.half_open_calls -= 1
+
+    def record_success(self, duration: float = 0.0) -> None:
+        """Report a call that took ``duration`` seconds and just succeeded"""
+        if self.slow_call_threshold is not None and duration > self.slow_call_threshold:
+            self.record_failure()
+            return
+        with self.lock:
+            state = self._current_state()
+            if state == self.OPEN:
+                return
+            if state == self.HALF_OPEN and time.monotonic() - duration < self.opened_at:
+                # A leftover call from before the breaker opened, not the probe
+                return
+            self._state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def reset(self) -> None:
+        with self.lock:
+            self._state = self.CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.rejected_calls = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State summary for health checks"""
+        with self.lock:
+            state = self._current_state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(self.recovery_timeout - (time.monotonic() - self.opened_at), 1)
+            return {
+                'state': state,
+                'consecutive_failures': self.consecutive_failures,
+                'rejected_calls': self.rejected_calls,
+                'retry_in_seconds': retry_in,
+            }
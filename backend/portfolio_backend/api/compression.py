@@ -0,0 +1,85 @@
+"""
+Pre-compressed response bodies
+Cached payloads keep gzip (and brotli, when installed) copies made once when they are stored
+"""
+
+import gzip
+from functools import lru_cache
+from typing import Dict, Tuple
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional: pip install portfolio-backend[compression]
+    brotli = None
+
+IDENTITY = 'identity'
+
+# Offered in this order when the client rates them equally
+PREFERRED_ENCODINGS = ('br', 'gzip')
+
+
+def compress_variants(content: bytes) -> Dict[str, bytes]:
+    """``{encoding: body}`` for ``content``, keeping only variants that are smaller
+
+    Compression happens once per cached payload, so the slowest and
+    smallest settings are affordable.
+    """
+    variants = {IDENTITY: content}
+    if len(content) < getattr(settings, 'COMPRESS_MIN_SIZE', 200):
+        return variants
+    compressed = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed['br'] = brotli.compress(content, quality=11)
+    for encoding, body in compressed.items():
+        if len(body) < len(content):
+            variants[encoding] = body
+    return variants
+
+
+@lru_cache(maxsize=256)
+def choose_encoding(accept_encoding: str, available: Tuple[str, ...]) -> str:
+    """Best of ``available`` for an Accept-Encoding header, else identity"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            accepted[coding.strip().lower()] = quality
+    # Codings the header leaves out are only acceptable through "*"
+    wildcard = accepted.get('*', 0.0)
+    best, best_quality = IDENTITY, 0.0
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding in available:
+            quality = accepted.get(encoding, wildcard)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+    return best
+
+
+def serve_variant(request, response, variants: Dict[str, bytes]):
+    """Put the variant the client accepts into ``response``
+
+    Compressed bodies differ from the identity body, so an existing ETag
+    becomes weak, as with Django's GZipMiddleware.
+    """
+    if len(variants) == 1:
+        response.content = variants[IDENTITY]
+        return response
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), tuple(variants))
+    response.content = variants[encoding]
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if encoding != IDENTITY:
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and not etag.startswith('W/'):
+            response['ETag'] = f"W/{etag}"
+    return response
@@ -0,0 +1,53 @@
+"""
+Conditional GET support for the read-only API
+Answers If-None-Match / If-Modified-Since with 304 from the cached representation
+"""
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from .caching import ContentModelsMixin, content_fingerprint, content_last_modified
+
+
+class ConditionalGetMixin(ContentModelsMixin):
+    """Adds ETag / Last-Modified validators to list and detail endpoints
+
+    Validators come from the cached content versions. The request is
+    still answered first, so a missing object is a 404 rather than a 304.
+    With VersionedCacheMixin this is a cache read, not a serialization.
+    A 304 carries the ETag and Vary of the representation it stands in
+    for, e.g. a weak ETag for a compressed body.
+    """
+
+    def get_validators(self, request):
+        # The body depends on the URL (pk, filters, page) and the negotiated renderer
+        etag = content_fingerprint(
+            self.get_content_versions(),
+            request.get_full_path(), request.accepted_media_type
+        )
+        last_modified = content_last_modified(self.get_content_models())
+        return quote_etag(etag), last_modified
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        # Applied in finalize_response, once any compressed variant is chosen
+        self._validators = self.get_validators(request)
+        return handler(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, '_validators', None)
+        if validators is None or not 200 <= response.status_code < 300:
+            return response
+        etag, last_modified = validators
+        # A compressed body is only weakly equivalent to the identity one
+        response['ETag'] = f"W/{etag}" if response.has_header('Content-Encoding') else etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return get_conditional_response(
+            request, etag=response['ETag'], last_modified=last_modified, response=response
+        ) or response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
@@ -0,0 +1,307 @@
+"""
+Conversation stores for the AI secretary
+In-process (bounded, per worker) and cache-backed (shared across workers)
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import timedelta
+from typing import List, Dict, Any
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message bookkeeping cost on top of the text itself
+MESSAGE_OVERHEAD_BYTES = 256
+
+
+def _message_size(message: Dict[str, Any]) -> int:
+    return MESSAGE_OVERHEAD_BYTES + sum(len(str(key)) + len(str(value)) for key, value in message.items())
+
+
+class ConversationStore:
+    """Interface shared by all conversation backends"""
+
+    def __init__(self, max_messages: int = 10):
+        self.max_messages = max_messages
+
+    def append(self, session_id: str, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def history(self, session_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def aappend(self, session_id: str, message: Dict[str, Any]) -> None:
+        await sync_to_async(self.append)(session_id, message)
+
+    async def ahistory(self, session_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        return await sync_to_async(self.history)(session_id, limit)
+
+    def cleanup(self, max_age: timedelta) -> int:
+        """Drop sessions idle for longer than ``max_age``, return how many"""
+        return 0
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+
+class StoredMessage:
+    """Compact in-memory form of one chat message"""
+    __slots__ = ('role', 'content', 'timestamp', 'extra', 'size')
+
+    def __init__(self, message: Dict[str, Any], timestamp: str):
+        self.role = message.get('role')
+        self.content = message.get('content')
+        self.timestamp = timestamp
+        extra = {key: value for key, value in message.items() if key not in ('role', 'content')}
+        self.extra = extra or None
+        self.size = _message_size(message)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'role': self.role, 'content': self.content, **(self.extra or {}), 'timestamp': self.timestamp}
+
+
+class StoredSession:
+    """Bounded message history plus activity bookkeeping for one session"""
+    __slots__ = ('messages', 'last_activity', 'size')
+
+    def __init__(self, max_messages: int):
+        self.messages = deque(maxlen=max_messages)
+        self.last_activity = 0.0
+        self.size = 0
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Per-process store with a hard cap on sessions and memory
+
+    Sessions live in an OrderedDict kept in last-activity order, so the
+    stalest session is always at the front: expiry and cap eviction pop
+    from the front in O(1) per session removed, never scanning the rest.
+    Expired sessions are dropped lazily on every access and by an
+    optional background sweep thread.
+    """
+
+    def __init__(self, max_messages: int = 10, max_sessions: int = 10000,
+                 max_bytes: int = 32 * 1024 * 1024, ttl: int = 60 * 60 * 24,
+                 sweep_interval: int = 0):
+        super().__init__(max_messages)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.sessions = OrderedDict()
+        self.total_bytes = 0
+        self.total_messages = 0
+        self.lock = threading.Lock()
+        self._sweeper = None
+
+    def _drop_oldest(self) -> None:
+        _, session = self.sessions.popitem(last=False)
+        self.total_bytes -= session.size
+        self.total_messages -= len(session.messages)
+
+    def _expire(self, cutoff: float) -> int:
+        """Pop sessions idle since before ``cutoff``; caller holds the lock"""
+        expired = 0
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.last_activity >= cutoff:
+                break
+            self._drop_oldest()
+            expired += 1
+        return expired
+
+    def _start_sweeper(self) -> None:
+        if not self.sweep_interval or self._sweeper is not None:
+            return
+        self._sweeper = threading.Thread(target=self._sweep_forever, name='conversation-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def _sweep_forever(self) -> None:
+        while True:
+            time.sleep(self.sweep_interval)
+            expired = self.sweep()
+            if expired:
+                logger.debug(f"Swept {expired} expired conversations")
+
+    def sweep(self) -> int:
+        """Drop every session past its TTL"""
+        with self.lock:
+            return self._expire(time.monotonic() - self.ttl)
+
+    def append(self, session_id: str, message: Dict[str, Any]) -> None:
+        stored = StoredMessage(message, timezone.now().isoformat())
+        now = time.monotonic()
+
+        with self.lock:
+            self._start_sweeper()
+            self._expire(now - self.ttl)
+
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = StoredSession(self.max_messages)
+            else:
+                self.sessions.move_to_end(session_id)
+
+            # The deque drops the oldest message itself once full
+            if len(session.messages) == session.messages.maxlen:
+                dropped = session.messages[0]
+                session.size -= dropped.size
+                self.total_bytes -= dropped.size
+                self.total_messages -= 1
+            session.messages.append(stored)
+            session.size += stored.size
+            session.last_activity = now
+            self.total_bytes += stored.size
+            self.total_messages += 1
+
+            while self.sessions and (
+                len(self.sessions) > self.max_sessions or self.total_bytes > self.max_bytes
+            ):
+                self._drop_oldest()
+
+    def history(self, session_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        with self.lock:
+            self._expire(time.monotonic() - self.ttl)
+            session = self.sessions.get(session_id)
+            if session is None:
+                return []
+            messages = list(session.messages)[-limit:]
+        return [message.as_dict() for message in messages]
+
+    # The lock is only held for in-memory bookkeeping, so the async
+    # variants can run inline on the event loop
+    async def aappend(self, session_id: str, message: Dict[str, Any]) -> None:
+        self.append(session_id, message)
+
+    async def ahistory(self, session_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        return self.history(session_id, limit)
+
+    def cleanup(self, max_age: timedelta) -> int:
+        with self.lock:
+            return self._expire(time.monotonic() - max_age.total_seconds())
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                'total_conversations': len(self.sessions),
+                'total_messages': self.total_messages,
+            }
+
+
+class CacheConversationStore(ConversationStore):
+    """Store shared by every worker through a Django cache (e.g. Redis)
+
+    Each session is a ring buffer of ``max_messages`` slots. ``cache.incr``
+    on the session's sequence key hands out slots atomically, so appending
+    and trimming is a single atomic step even with concurrent writers, and
+    every key expires ``ttl`` seconds after the last message.
+    """
+
+    def __init__(self, max_messages: int = 10, ttl: int = 60 * 60 * 24,
+                 alias: str = 'default', prefix: str = 'ai:conversation'):
+        super().__init__(max_messages)
+        self.ttl = ttl
+        self.alias = alias
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _seq_key(self, session_id: str) -> str:
+        return f"{self.prefix}:{session_id}:seq"
+
+    def _slot_key(self, session_id: str, seq: int) -> str:
+        return f"{self.prefix}:{session_id}:{seq % self.max_messages}"
+
+    def _count(self, name: str) -> None:
+        key = f"{self.prefix}:stats:{name}"
+        self.cache.add(key, 0, None)
+        self.cache.incr(key)
+
+    def append(self, session_id: str, message: Dict[str, Any]) -> None:
+        message = {**message, 'timestamp': timezone.now().isoformat()}
+        seq_key = self._seq_key(session_id)
+        if self.cache.add(seq_key, 0, self.ttl):
+            self._count('conversations')
+        seq = self.cache.incr(seq_key)
+        self.cache.set(self._slot_key(session_id, seq), (seq, message), self.ttl)
+        self.cache.touch(seq_key, self.ttl)
+        self._count('messages')
+
+    async def _acount(self, name: str) -> None:
+        key = f"{self.prefix}:stats:{name}"
+        await self.cache.aadd(key, 0, None)
+        await self.cache.aincr(key)
+
+    async def aappend(self, session_id: str, message: Dict[str, Any]) -> None:
+        message = {**message, 'timestamp': timezone.now().isoformat()}
+        seq_key = self._seq_key(session_id)
+        if await self.cache.aadd(seq_key, 0, self.ttl):
+            await self._acount('conversations')
+        seq = await self.cache.aincr(seq_key)
+        await self.cache.aset(self._slot_key(session_id, seq), (seq, message), self.ttl)
+        await self.cache.atouch(seq_key, self.ttl)
+        await self._acount('messages')
+
+    def _window(self, seq: int, limit: int) -> range:
+        return range(max(1, seq - min(limit, self.max_messages) + 1), seq + 1)
+
+    def _collect(self, session_id: str, wanted: range, slots: Dict[str, Any]) -> List[Dict[str, Any]]:
+        messages = []
+        for n in wanted:
+            entry = slots.get(self._slot_key(session_id, n))
+            # A slot may already hold a newer message from a concurrent writer
+            if entry and entry[0] == n:
+                messages.append(entry[1])
+        return messages
+
+    def history(self, session_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        seq = self.cache.get(self._seq_key(session_id))
+        if not seq:
+            return []
+        wanted = self._window(seq, limit)
+        slots = self.cache.get_many([self._slot_key(session_id, n) for n in wanted])
+        return self._collect(session_id, wanted, slots)
+
+    async def ahistory(self, session_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        seq = await self.cache.aget(self._seq_key(session_id))
+        if not seq:
+            return []
+        wanted = self._window(seq, limit)
+        slots = await self.cache.aget_many([self._slot_key(session_id, n) for n in wanted])
+        return self._collect(session_id, wanted, slots)
+
+    def stats(self) -> Dict[str, int]:
+        # Sessions expire on their own, so these are running totals
+        counters = self.cache.get_many([
+            f"{self.prefix}:stats:conversations", f"{self.prefix}:stats:messages"
+        ])
+        return {
+            'total_conversations': counters.get(f"{self.prefix}:stats:conversations", 0),
+            'total_messages': counters.get(f"{self.prefix}:stats:messages", 0),
+        }
+
+
+def build_conversation_store() -> ConversationStore:
+    """Create the store selected by ``AI_SECRETARY_STORE``"""
+    backend = getattr(settings, 'AI_SECRETARY_STORE', 'memory')
+    max_messages = getattr(settings, 'AI_SECRETARY_MAX_MESSAGES', 10)
+    if backend == 'cache':
+        return CacheConversationStore(
+            max_messages=max_messages,
+            ttl=getattr(settings, 'AI_SECRETARY_SESSION_TTL', 60 * 60 * 24),
+        )
+    return InMemoryConversationStore(
+        max_messages=max_messages,
+        max_sessions=getattr(settings, 'AI_SECRETARY_MAX_SESSIONS', 10000),
+        max_bytes=getattr(settings, 'AI_SECRETARY_MAX_STORE_BYTES', 32 * 1024 * 1024),
+        ttl=getattr(settings, 'AI_SECRETARY_SESSION_TTL', 60 * 60 * 24),
+        sweep_interval=getattr(settings, 'AI_SECRETARY_SWEEP_INTERVAL', 0),
+    )
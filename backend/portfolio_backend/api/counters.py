@@ -0,0 +1,264 @@
+"""
+Write-behind analytics counters
+Requests bump a cache counter; a periodic flush adds the totals to PortfolioAnalytics
+"""
+
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .heavy_hitters import SpaceSaving
+from .hyperloglog import HyperLogLog
+from .models import PortfolioAnalytics
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = (
+    'page_views', 'contact_submissions', 'ai_chat_interactions', 'project_views', 'chat_opens',
+)
+
+# Counters outlive any sane flush interval, so nothing expires unflushed
+COUNTER_TTL = 60 * 60 * 24 * 7
+
+# Projects tracked per day; memory stays fixed however many are viewed
+TOP_PROJECTS_CAPACITY = getattr(settings, 'TOP_PROJECTS_CAPACITY', 100)
+
+
+def counter_key(day: date, field: str) -> str:
+    return f"analytics:counter:{day.isoformat()}:{field}"
+
+
+def add_to_daily_row(day: date, **deltas: int) -> None:
+    """Add ``deltas`` to the day's analytics row with F(), creating it if needed"""
+    if not deltas:
+        return
+    rows = PortfolioAnalytics.objects.filter(date=day)
+    increments = {field: F(field) + value for field, value in deltas.items()}
+    if rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            PortfolioAnalytics.objects.create(date=day, **deltas)
+    except IntegrityError:
+        # Another flush created the row first
+        rows.update(**increments)
+
+
+def _set_on_daily_row(day: date, **values) -> None:
+    rows = PortfolioAnalytics.objects.filter(date=day)
+    if rows.update(**values):
+        return
+    try:
+        with transaction.atomic():
+            PortfolioAnalytics.objects.create(date=day, **values)
+    except IntegrityError:
+        rows.update(**values)
+
+
+def sketch_key(day: date) -> str:
+    return f"analytics:visitors:{day.isoformat()}"
+
+
+def load_visitor_sketch(day: date) -> Optional[HyperLogLog]:
+    """The day's shared visitor sketch, from the cache or else the database"""
+    data = cache.get(sketch_key(day))
+    if data is None:
+        data = PortfolioAnalytics.objects.filter(date=day).values_list('visitor_sketch', flat=True).first()
+    return HyperLogLog.from_bytes(bytes(data)) if data else None
+
+
+def merge_visitor_sketch(day: date, sketch: HyperLogLog) -> bool:
+    """Fold a worker's sketch into the day's shared one
+
+    Returns False when another worker holds the merge lock; merging the
+    same sketch again later is harmless.
+    """
+    lock = f"{sketch_key(day)}:lock"
+    if not cache.add(lock, 1, 10):
+        return False
+    try:
+        shared = load_visitor_sketch(day) or HyperLogLog(sketch.precision)
+        cache.set(sketch_key(day), shared.merge(sketch).to_bytes(), COUNTER_TTL)
+    finally:
+        cache.delete(lock)
+    return True
+
+
+def save_visitor_sketch(day: date) -> Optional[int]:
+    """Store the day's shared sketch and its estimate on the analytics row"""
+    data = cache.get(sketch_key(day))
+    if not data:
+        return None
+    visitors = HyperLogLog.from_bytes(data).count()
+    _set_on_daily_row(day, visitor_sketch=data, unique_visitors=visitors)
+    return visitors
+
+
+def count_unique_visitors(start: date, end: date) -> int:
+    """Distinct visitors between two dates inclusive, merged from the daily sketches"""
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    cached = cache.get_many([sketch_key(day) for day in days])
+    stored = dict(
+        PortfolioAnalytics.objects.filter(date__range=(start, end), visitor_sketch__isnull=False)
+        .values_list('date', 'visitor_sketch')
+    )
+    total = HyperLogLog()
+    for day in days:
+        data = cached.get(sketch_key(day)) or stored.get(day)
+        if data:
+            total.merge(HyperLogLog.from_bytes(bytes(data)))
+    return total.count()
+
+
+def top_projects_key(day: date) -> str:
+    return f"analytics:top-projects:{day.isoformat()}"
+
+
+def load_top_projects(day: date) -> SpaceSaving:
+    """The day's shared project view summary, from the cache or else the database"""
+    entries = cache.get(top_projects_key(day))
+    if entries is None:
+        entries = PortfolioAnalytics.objects.filter(date=day).values_list('top_projects_viewed', flat=True).first()
+    return SpaceSaving.from_list(entries or [], TOP_PROJECTS_CAPACITY)
+
+
+def merge_top_projects(day: date, summary: SpaceSaving) -> bool:
+    """Add a worker's project views to the day's shared summary
+
+    Unlike visitor sketches these are counts: on False (another worker
+    holds the lock) the caller keeps ``summary`` and tries again later.
+    """
+    lock = f"{top_projects_key(day)}:lock"
+    if not cache.add(lock, 1, 10):
+        return False
+    try:
+        shared = load_top_projects(day).merge(summary)
+        cache.set(top_projects_key(day), shared.to_list(), COUNTER_TTL)
+    finally:
+        cache.delete(lock)
+    return True
+
+
+def save_top_projects(day: date) -> None:
+    """Store the day's shared summary as top_projects_viewed"""
+    entries = cache.get(top_projects_key(day))
+    if entries:
+        _set_on_daily_row(day, top_projects_viewed=entries)
+
+
+def popular_projects(start: date, end: date, limit: int = 10) -> List[Tuple[int, int]]:
+    """``(project id, views)`` between two dates inclusive, most viewed first"""
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    cached = cache.get_many([top_projects_key(day) for day in days])
+    stored = dict(
+        PortfolioAnalytics.objects.filter(date__range=(start, end)).values_list('date', 'top_projects_viewed')
+    )
+    total = SpaceSaving(TOP_PROJECTS_CAPACITY)
+    for day in days:
+        total.merge(SpaceSaving.from_list(cached.get(top_projects_key(day)) or stored.get(day) or []))
+    return total.top(limit)
+
+
+class AnalyticsCounters:
+    """Exact daily counters without a database write per event
+
+    ``increment`` is a single atomic ``cache.incr``. ``flush`` reads each
+    counter, subtracts exactly what it read (increments that land in
+    between survive for the next flush) and adds it to the day's row.
+    Every ``flush_interval`` seconds the next increment starts a flush on
+    a background thread; ``manage.py flush_analytics`` does it on demand.
+    A flush also stores each day's shared visitor sketch and top projects.
+    """
+
+    def __init__(self, flush_interval: float = 60, lookback_days: int = 2):
+        self.flush_interval = flush_interval
+        self.lookback_days = lookback_days
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        self.flushing = False
+
+    def _key(self, field: str, day: date = None) -> str:
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown analytics counter: {field}")
+        return counter_key(day or timezone.localdate(), field)
+
+    def increment(self, field: str, amount: int = 1, day: date = None) -> None:
+        key = self._key(field, day)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            if not cache.add(key, amount, COUNTER_TTL):
+                cache.incr(key, amount)
+        self.maybe_flush()
+
+    async def aincrement(self, field: str, amount: int = 1) -> None:
+        key = self._key(field)
+        try:
+            await cache.aincr(key, amount)
+        except ValueError:
+            if not await cache.aadd(key, amount, COUNTER_TTL):
+                await cache.aincr(key, amount)
+        self.maybe_flush()
+
+    def pending(self, day: date = None) -> Dict[str, int]:
+        """Counts not yet written to the database"""
+        keys = {self._key(field, day): field for field in COUNTER_FIELDS}
+        return {keys[key]: value for key, value in cache.get_many(list(keys)).items() if value}
+
+    def flush(self) -> Dict[date, Dict[str, int]]:
+        """Move pending counts into PortfolioAnalytics, return what moved"""
+        today = timezone.localdate()
+        flushed = {}
+        # Yesterday's counters may still hold increments from before midnight
+        for day in (today - timedelta(days=offset) for offset in range(self.lookback_days)):
+            deltas = {}
+            for field, value in self.pending(day).items():
+                cache.decr(self._key(field, day), value)
+                deltas[field] = value
+            if deltas:
+                try:
+                    add_to_daily_row(day, **deltas)
+                except Exception:
+                    # Hand the counts back so the next flush retries them
+                    for field, value in deltas.items():
+                        cache.incr(self._key(field, day), value)
+                    raise
+                flushed[day] = deltas
+            save_visitor_sketch(day)
+            save_top_projects(day)
+        self.last_flush = time.monotonic()
+        return flushed
+
+    def maybe_flush(self) -> None:
+        if not self.flush_interval or time.monotonic() - self.last_flush < self.flush_interval:
+            return
+        with self.lock:
+            if self.flushing:
+                return
+            self.flushing = True
+            self.last_flush = time.monotonic()
+        # One worker flushes per interval across all processes
+        if not cache.add('analytics:counter:flush-lock', 1, self.flush_interval):
+            self.flushing = False
+            return
+        threading.Thread(target=self._flush_in_background, name='analytics-flush', daemon=True).start()
+
+    def _flush_in_background(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Analytics flush failed: {e!r}")
+        finally:
+            self.flushing = False
+            connection.close()
+
+
+analytics_counters = AnalyticsCounters(
+    flush_interval=getattr(settings, 'ANALYTICS_FLUSH_INTERVAL', 60),
+)
@@ -0,0 +1,186 @@
+"""
+Client event ingestion
+Events are tallied in process memory and handed to the analytics counters in bulk
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+from django.conf import settings
+from django.utils import timezone
+from .counters import TOP_PROJECTS_CAPACITY, analytics_counters, merge_top_projects, merge_visitor_sketch
+from .heavy_hitters import SpaceSaving
+from .renderers import FastJSONParser
+from .hyperloglog import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+# Event type -> PortfolioAnalytics counter it feeds
+EVENT_COUNTERS = {
+    'page_view': 'page_views',
+    'project_view': 'project_views',
+    'chat_open': 'chat_opens',
+}
+
+
+class BeaconJSONParser(FastJSONParser):
+    """JSON sent by ``navigator.sendBeacon``, which posts it as text/plain"""
+    media_type = 'text/plain'
+
+
+def is_valid_event(event) -> bool:
+    if not isinstance(event, dict) or event.get('type') not in EVENT_COUNTERS:
+        return False
+    if event['type'] == 'project_view':
+        project = event.get('project')
+        return isinstance(project, int) and not isinstance(project, bool) and project > 0
+    return True
+
+
+class EventBuffer:
+    """Per-process tally of client events
+
+    ``add`` only bumps an in-memory Counter under a lock. Once
+    ``max_events`` have piled up, ``max_age`` seconds have passed or the
+    day has changed, the totals go to the cache counters in one
+    ``incr`` per field, and from there to PortfolioAnalytics on the
+    counters' own flush. A background thread hands off batches that
+    reach ``max_age`` with no further ``add`` to do it, so a quiet
+    worker holds events for at most that long.
+
+    Visitors go into a HyperLogLog sketch per day that lives here all day.
+    On each hand-off it is merged into the day's shared sketch in the cache.
+    The merge is idempotent, so a failed merge is simply repeated later.
+    Project views go into a Space-Saving summary that is handed off and
+    restarted, and kept for the next hand-off if it could not be shared.
+    """
+
+    def __init__(self, max_events: int = 500, max_age: float = 5):
+        self.max_events = max_events
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.counts: Counter = Counter()
+        self.size = 0
+        self.day = timezone.localdate()
+        self.started = time.monotonic()
+        self.visitors: Dict[date, HyperLogLog] = {}
+        self.unshared = set()
+        self.projects: Dict[date, SpaceSaving] = {}
+        self._flusher = None
+
+    def _start_flusher(self) -> None:
+        if not self.max_age or self._flusher is not None:
+            return
+        self._flusher = threading.Thread(target=self._flush_forever, name='event-flusher', daemon=True)
+        self._flusher.start()
+
+    def _flush_forever(self) -> None:
+        while True:
+            with self.lock:
+                wait = self.started + self.max_age - time.monotonic()
+                taken = None
+                if wait <= 0:
+                    if self.size or self.unshared or self.projects:
+                        taken = self._take_locked()
+                    else:
+                        self.started = time.monotonic()
+                    wait = self.max_age
+            if taken:
+                # _hand_off logs and keeps what it could not share
+                self._hand_off(*taken)
+            time.sleep(wait)
+
+    def add(self, events: Iterable[dict], visitor: Optional[str] = None) -> Tuple[int, int]:
+        """Tally valid events from ``visitor``; returns (accepted, rejected)"""
+        accepted = rejected = 0
+        fields = Counter()
+        projects = []
+        for event in events:
+            if is_valid_event(event):
+                fields[EVENT_COUNTERS[event['type']]] += 1
+                accepted += 1
+                if event['type'] == 'project_view':
+                    projects.append(event['project'])
+            else:
+                rejected += 1
+        if not accepted:
+            return accepted, rejected
+        today = timezone.localdate()
+        batches = []
+        with self.lock:
+            self._start_flusher()
+            if today != self.day:
+                # Yesterday's tally goes out under yesterday's date
+                batches.append(self._take_locked())
+                self.day = today
+            self.counts.update(fields)
+            self.size += accepted
+            if visitor:
+                self.visitors.setdefault(today, HyperLogLog()).add(visitor)
+                self.unshared.add(today)
+            if projects:
+                self.projects.setdefault(today, SpaceSaving(TOP_PROJECTS_CAPACITY)).update(projects)
+            if self.size >= self.max_events or time.monotonic() - self.started >= self.max_age:
+                batches.append(self._take_locked())
+        for batch in batches:
+            self._hand_off(*batch)
+        return accepted, rejected
+
+    def _take_locked(self) -> Tuple[date, Dict[str, int], Dict[date, HyperLogLog], Dict[date, SpaceSaving]]:
+        sketches = {day: self.visitors[day].copy() for day in self.unshared}
+        self.unshared.clear()
+        # Past days are shared from the copy and come back only if that fails
+        self.visitors = {day: sketch for day, sketch in self.visitors.items() if day == self.day}
+        taken = (self.day, dict(self.counts), sketches, self.projects)
+        self.projects = {}
+        self.counts.clear()
+        self.size = 0
+        self.started = time.monotonic()
+        return taken
+
+    def _hand_off(self, day: date, counts: Dict[str, int], sketches: Dict[date, HyperLogLog],
+                  projects: Dict[date, SpaceSaving]) -> None:
+        # Cache round trips happen outside the lock so ``add`` never waits on them
+        for field, value in counts.items():
+            try:
+                analytics_counters.increment(field, value, day=day)
+            except Exception as e:
+                logger.error(f"Dropped {value} {field} events: {e!r}")
+        for sketch_day, sketch in sketches.items():
+            try:
+                shared = merge_visitor_sketch(sketch_day, sketch)
+            except Exception as e:
+                logger.warning(f"Visitor sketch merge failed: {e!r}")
+                shared = False
+            if not shared:
+                with self.lock:
+                    mine = self.visitors.get(sketch_day)
+                    self.visitors[sketch_day] = mine.merge(sketch) if mine else sketch
+                    self.unshared.add(sketch_day)
+        for summary_day, summary in projects.items():
+            try:
+                shared = merge_top_projects(summary_day, summary)
+            except Exception as e:
+                logger.warning(f"Project view merge failed: {e!r}")
+                shared = False
+            if not shared:
+                with self.lock:
+                    self.projects.setdefault(summary_day, SpaceSaving(TOP_PROJECTS_CAPACITY)).merge(summary)
+
+    def flush(self) -> Dict[str, int]:
+        """Hand everything tallied so far to the analytics counters"""
+        with self.lock:
+            taken = self._take_locked()
+        self._hand_off(*taken)
+        return taken[1]
+
+
+event_buffer = EventBuffer(
+    max_events=getattr(settings, 'EVENT_BUFFER_MAX_EVENTS', 500),
+    max_age=getattr(settings, 'EVENT_BUFFER_MAX_AGE', 5),
+)
+atexit.register(event_buffer.flush)
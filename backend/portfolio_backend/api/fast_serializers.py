@@ -0,0 +1,180 @@
+"""
+Read-only fast path for the list endpoints
+Renders ``.values()`` rows in the exact shape of the DRF serializers
+"""
+
+from collections import defaultdict
+from functools import partial
+from typing import Dict, Iterable, List, Optional
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from .models import Project, Technology
+from .serializers import (
+    DEFAULT_PROJECT_IMAGE, ProjectSerializer, SkillSerializer, ExperienceSerializer,
+    EducationSerializer, TechnologySerializer, SocialProfileSerializer
+)
+
+ISO_8601 = 'iso-8601'
+
+# Beyond this many rows, related lookups read the whole link table rather
+# than bind one parameter per id
+ID_FILTER_LIMIT = 500
+
+# Field types whose representation of a ``.values()`` value is the value itself
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+    serializers.ChoiceField, serializers.JSONField,
+)
+
+
+def _iso_date(value):
+    return value.isoformat()
+
+
+def _iso_datetime(value, tz=None):
+    value = value.astimezone(tz).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+class FastSerializer:
+    """Stand-in for a read-only ModelSerializer that skips model instances
+
+    The plan is worked out once from ``serializer_class``'s fields: plain
+    columns are copied and dates are formatted as DRF would. Other fields
+    need a handler. ``computed`` maps a field to the columns it reads and a
+    function of the row. ``related`` fields call a method with all the
+    page's ids, so each relation costs one query per page. A serializer
+    field without a handler is a configuration error, so the two paths
+    cannot drift apart silently.
+    """
+    serializer_class = None
+    computed = {}
+    related = {}
+
+    def __init__(self):
+        self.fields = self.serializer_class.Meta.fields
+        self.plan = []
+        declared = self.serializer_class().fields
+        for name in self.fields:
+            self.plan.append((name, self._converter(name, declared[name])))
+
+    def _converter(self, name, field):
+        if name in self.computed or name in self.related:
+            return None
+        if isinstance(field, serializers.DateTimeField):
+            if (getattr(field, 'format', api_settings.DATETIME_FORMAT) or '').lower() != ISO_8601 or not settings.USE_TZ:
+                return field.to_representation
+            return _iso_datetime
+        if isinstance(field, serializers.DateField):
+            if (getattr(field, 'format', api_settings.DATE_FORMAT) or '').lower() != ISO_8601:
+                return field.to_representation
+            return _iso_date
+        if isinstance(field, PASSTHROUGH_FIELDS) and field.source == name:
+            return None
+        raise ImproperlyConfigured(f"{type(self).__name__} has no handler for {name}")
+
+    def columns(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Columns ``.values()`` has to select to render ``names`` (default all)"""
+        wanted = self.fields if names is None else [name for name in self.fields if name in names]
+        columns = {'id': None}
+        for name in wanted:
+            if name in self.computed:
+                columns.update(dict.fromkeys(self.computed[name][0]))
+            elif name not in self.related:
+                columns[name] = None
+        return list(columns)
+
+    def values(self, queryset, names: Optional[Iterable[str]] = None):
+        return queryset.values(*self.columns(names))
+
+    def render(self, rows, names: Optional[Iterable[str]] = None) -> List[dict]:
+        """Serialize ``.values()`` rows; ``names`` narrows the fields like ``?fields=``"""
+        rows = list(rows)
+        # Datetimes are shown in the active time zone, as DRF does
+        in_zone = partial(_iso_datetime, tz=timezone.get_current_timezone())
+        plan = [(name, in_zone if convert is _iso_datetime else convert)
+                for name, convert in self.plan if names is None or name in names]
+        ids = [row['id'] for row in rows]
+        fetched = {name: getattr(self, method)(ids) for name, method in self.related.items()
+                   if rows and any(step[0] == name for step in plan)}
+        computed = self.computed
+        data = []
+        for row in rows:
+            item = {}
+            for name, convert in plan:
+                if name in fetched:
+                    item[name] = fetched[name].get(row['id'], [])
+                elif name in computed:
+                    item[name] = computed[name][1](row)
+                else:
+                    value = row[name]
+                    item[name] = convert(value) if convert is not None and value is not None else value
+            data.append(item)
+        return data
+
+
+class ProjectFastSerializer(FastSerializer):
+    serializer_class = ProjectSerializer
+    computed = {
+        'image': (('image_url',), lambda row: row['image_url'] or DEFAULT_PROJECT_IMAGE),
+        'links': (('github_url', 'live_url'), lambda row: {'github': row['github_url'], 'live': row['live_url']}),
+    }
+    related = {'technologies': 'technology_names'}
+
+    def technology_names(self, ids) -> Dict[int, List[str]]:
+        """Technology names per project, in Technology's default order like the prefetch"""
+        names = defaultdict(list)
+        ordering = [f"{'-' if key.startswith('-') else ''}technology__{key.lstrip('-')}"
+                    for key in Technology._meta.ordering]
+        links = Project.technologies.through.objects.order_by(*ordering, 'technology_id')
+        if len(ids) <= ID_FILTER_LIMIT:
+            links = links.filter(project_id__in=ids)
+        wanted = set(ids)
+        for project_id, name in links.values_list('project_id', 'technology__name'):
+            if project_id in wanted:
+                names[project_id].append(name)
+        return names
+
+
+class SimpleFastSerializer(FastSerializer):
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        super().__init__()
+
+
+FAST_SERIALIZERS = {
+    ProjectSerializer: ProjectFastSerializer(),
+    **{serializer_class: SimpleFastSerializer(serializer_class) for serializer_class in (
+        SkillSerializer, ExperienceSerializer, EducationSerializer,
+        TechnologySerializer, SocialProfileSerializer,
+    )},
+}
+
+
+def fast_serializer_for(serializer_class) -> Optional[FastSerializer]:
+    return FAST_SERIALIZERS.get(serializer_class)
+
+
+class FastListMixin:
+    """Serves ``list`` through the fast serializer for the view's serializer class
+
+    Requests that ask for nested objects (``?expand=``) still go through
+    DRF, as does anything rendered without a fast serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        fast = fast_serializer_for(serializer_class)
+        if fast is None or serializer_class.expanded_fields(request):
+            return super().list(request, *args, **kwargs)
+
+        names = serializer_class.requested_fields(request)
+        rows = fast.values(self.filter_queryset(self.get_queryset()), names)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast.render(page, names))
+        return Response(fast.render(rows, names))
@@ -0,0 +1,88 @@
+"""
+Sparse fieldsets for the read API
+``?fields=`` / ``?omit=`` pick what a response carries and what the query loads
+"""
+
+from typing import Iterable, Optional, Set, Tuple
+
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _param_names(request, param: str) -> Optional[Set[str]]:
+    # Writes validate and save every field, whatever the query string says
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    raw = getattr(request, 'query_params', request.GET).get(param)
+    if raw is None:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class DynamicFieldsMixin:
+    """Serializer fields chosen per request
+
+    ``?fields=title,image`` keeps only those fields, ``?omit=description``
+    drops some, and ``?expand=`` swaps a relation listed in
+    ``Meta.expandable`` for its nested serializer. Without a request in
+    the context, or on a write, every field is kept, as before.
+
+    ``Meta.field_sources`` names the columns behind fields that are not
+    columns themselves. ``Meta.prefetch_fields`` lists the relations that
+    need a prefetch. SparseFieldsMixin uses both to narrow the queryset.
+    """
+
+    @classmethod
+    def requested_fields(cls, request) -> Optional[Set[str]]:
+        """Field names to render for ``request``, or None for all of them"""
+        fields = _param_names(request, 'fields')
+        omit = _param_names(request, 'omit')
+        if fields is None and omit is None:
+            return None
+        declared = set(cls.Meta.fields)
+        chosen = declared if fields is None else fields & declared
+        return chosen - (omit or set())
+
+    @classmethod
+    def expanded_fields(cls, request) -> Set[str]:
+        return (_param_names(request, 'expand') or set()) & set(getattr(cls.Meta, 'expandable', {}))
+
+    @classmethod
+    def model_fields_for(cls, names: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """``(columns, relations to prefetch)`` behind the given field names"""
+        sources = getattr(cls.Meta, 'field_sources', {})
+        relations = set(getattr(cls.Meta, 'prefetch_fields', ()))
+        columns = set()
+        for name in set(names) - relations:
+            columns.update(sources.get(name, (name,)))
+        return columns, relations & set(names)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        keep = self.requested_fields(request)
+        if keep is not None:
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+        for name in self.expanded_fields(request):
+            if name in self.fields:
+                self.fields[name] = self.Meta.expandable[name](many=True, read_only=True)
+
+
+class SparseFieldsMixin:
+    """Loads only the columns and relations the serializer will render
+
+    Unrequested columns are left out with ``.only()``. A relation's
+    prefetch is dropped unless that relation was asked for.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        names = serializer_class.requested_fields(self.request)
+        if names is None:
+            return queryset
+        columns, prefetch = serializer_class.model_fields_for(names)
+        if queryset._prefetch_related_lookups:
+            queryset = queryset.prefetch_related(None).prefetch_related(*prefetch)
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+        return queryset.only(*(columns & concrete))
@@ -2,9 +2,15 @@
 Simple Gemini AI service for portfolio chat
 """
 
+import asyncio
 import logging
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional
 from django.conf import settings
+from .answer_cache import build_answer_cache
+from .circuit_breaker import CircuitBreaker
+from .singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +21,22 @@ class GeminiService:
         self.api_key = getattr(settings, 'GOOGLE_GEMINI_API_KEY', None)
         self.model_name = getattr(settings, 'GEMINI_MODEL', 'gemini-1.5-flash')
         self.available = bool(self.api_key)
+        self.answer_cache = build_answer_cache()
+        self.single_flight = SingleFlight(
+            distributed=getattr(settings, 'AI_SINGLE_FLIGHT_DISTRIBUTED', False)
+        )
+        self.timeout = getattr(settings, 'GEMINI_TIMEOUT', 10.0)
+        self.breaker = CircuitBreaker(
+            failure_threshold=getattr(settings, 'GEMINI_BREAKER_FAILURES', 5),
+            recovery_timeout=getattr(settings, 'GEMINI_BREAKER_RECOVERY', 30.0),
+            slow_call_threshold=getattr(settings, 'GEMINI_SLOW_CALL_SECONDS', None),
+            # A probe that has not reported by then is presumed lost
+            probe_timeout=self.timeout * 2,
+        )
+        # Sync calls run here so the deadline holds even if the SDK ignores it
+        self.executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'GEMINI_MAX_CONCURRENCY', 8), thread_name_prefix='gemini'
+        )
         
         if self.available:
             try:
@@ -35,18 +57,138 @@ class GeminiService:
         """Check if Gemini AI is available"""
         return self.available
     
-    def generate_response(self, prompt: str, context: str = "") -> Optional[str]:
-        """Generate AI response using Gemini"""
+    def generate_response(self, prompt: str, context: str = "", use_cache: bool = True) -> Optional[str]:
+        """Generate AI response using Gemini, reusing cached answers"""
         if not self.available:
             return None
         
+        if use_cache:
+            cached = self.answer_cache.get(prompt, context)
+            if cached is not None:
+                return cached
+        
+        # Identical questions arriving together share one upstream call
+        key = self.answer_cache.make_key(prompt, context)
+        return self.single_flight.do(key, lambda: self._generate(prompt, context))
+    
+    def _generate(self, prompt: str, context: str) -> Optional[str]:
+        if not self.breaker.allow_request():
+            return None
+        
+        started = time.monotonic()
+        future = None
         try:
-            full_prompt = f"{context}\n\nUser: {prompt}\nAssistant:"
-            response = self.model.generate_content(full_prompt)
-            return response.text.strip()
+            future = self.executor.submit(
+                self.model.generate_content, self._build_prompt(prompt, context),
+                request_options={'timeout': self.timeout}
+            )
+            answer = future.result(timeout=self.timeout).text.strip()
         except Exception as e:
-            logger.error(f"Gemini AI generation error: {e}")
+            if future is not None:
+                # A timed-out call still queued never reaches the upstream; a
+                # running one ends on its own request timeout
+                future.cancel()
+            self.breaker.record_failure()
+            logger.error(f"Gemini AI generation error: {e!r}")
+            return None
+        self.breaker.record_success(time.monotonic() - started)
+        
+        if answer:
+            self.answer_cache.set(prompt, context, answer)
+        return answer
+    
+    async def generate_response_async(self, prompt: str, context: str = "") -> Optional[str]:
+        """Generate AI response without holding a worker thread"""
+        if not self.available:
             return None
+        
+        cached = await self.answer_cache.aget(prompt, context)
+        if cached is not None:
+            return cached
+        
+        key = self.answer_cache.make_key(prompt, context)
+        return await self.single_flight.ado(key, lambda: self._agenerate(prompt, context))
+    
+    async def _agenerate(self, prompt: str, context: str) -> Optional[str]:
+        if not self.breaker.allow_request():
+            return None
+        
+        started = time.monotonic()
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(
+                    self._build_prompt(prompt, context), request_options={'timeout': self.timeout}
+                ),
+                self.timeout
+            )
+            answer = response.text.strip()
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Gemini AI generation error: {e!r}")
+            return None
+        except BaseException:
+            # Cancelled (the client went away): no verdict on the upstream
+            self.breaker.release()
+            raise
+        self.breaker.record_success(time.monotonic() - started)
+        
+        if answer:
+            await self.answer_cache.aset(prompt, context, answer)
+        return answer
+    
+    async def stream_response_async(self, prompt: str, context: str = "") -> AsyncIterator[str]:
+        """Yield the AI response text chunk by chunk as Gemini generates it
+        
+        Yields nothing if the model is unavailable or fails before the
+        first chunk; a failure mid-stream ends the stream early.
+        """
+        if not self.available:
+            return
+        
+        cached = await self.answer_cache.aget(prompt, context)
+        if cached is not None:
+            yield cached
+            return
+        
+        if not self.breaker.allow_request():
+            return
+        
+        chunks = []
+        started = time.monotonic()
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(
+                    self._build_prompt(prompt, context), stream=True,
+                    request_options={'timeout': self.timeout}
+                ),
+                self.timeout
+            )
+            # The deadline applies to the wait for each chunk
+            chunk_iterator = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunk_iterator.__anext__(), self.timeout)
+                except StopAsyncIteration:
+                    break
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Gemini AI streaming error: {e!r}")
+            return
+        except BaseException:
+            # Cancelled, or the consumer closed the stream (GeneratorExit)
+            self.breaker.release()
+            raise
+        self.breaker.record_success(time.monotonic() - started)
+        
+        answer = ''.join(chunks).strip()
+        if answer:
+            await self.answer_cache.aset(prompt, context, answer)
+    
+    def _build_prompt(self, prompt: str, context: str) -> str:
+        return f"{context}\n\nUser: {prompt}\nAssistant:"
 
 # Global service instance
 gemini_service = GeminiService()
\ No newline at end of file
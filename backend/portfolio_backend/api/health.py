@@ -53,10 +53,15 @@ class DetailedHealthCheckView(View):
         # AI Service check
         try:
             from .gemini_service import gemini_service
-            if gemini_service.is_available():
+            breaker = gemini_service.breaker.snapshot()
+            if not gemini_service.is_available():
+                health_data['checks']['ai_service'] = 'unavailable'
+            elif breaker['state'] == 'closed':
                 health_data['checks']['ai_service'] = 'healthy'
             else:
-                health_data['checks']['ai_service'] = 'unavailable'
+                # Chat still answers from the fallback, so the app stays healthy
+                health_data['checks']['ai_service'] = 'degraded'
+            health_data['checks']['ai_circuit_breaker'] = breaker
         except Exception as e:
             health_data['checks']['ai_service'] = f'error: {str(e)}'
         
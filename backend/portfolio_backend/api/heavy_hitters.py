@@ -0,0 +1,91 @@
+"""
+Space-Saving heavy hitters
+Tracks the most frequent items of an unbounded stream in fixed memory
+"""
+
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+
+class SpaceSaving:
+    """Approximate top-k counter over at most ``capacity`` items
+
+    While there is room every item is counted exactly. After that a new
+    item takes the place of one with the smallest count and inherits that
+    count as its possible overestimate (``error``). Any item seen more than
+    ``1 / capacity`` of the time is guaranteed to be tracked. Counts sit in
+    buckets keyed by count, so a single ``add`` is O(1). Weighted adds,
+    which only come from ``merge``, may rescan the bucket keys.
+    """
+
+    def __init__(self, capacity: int = 100):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        # count -> items with that count, oldest first
+        self.buckets: Dict[int, Dict[Hashable, None]] = {}
+        self.min_count = 0
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, item) -> bool:
+        return item in self.counts
+
+    def _unlink(self, item, count: int) -> None:
+        bucket = self.buckets[count]
+        del bucket[item]
+        if not bucket:
+            del self.buckets[count]
+
+    def _link(self, item, count: int) -> None:
+        self.buckets.setdefault(count, {})[item] = None
+
+    def add(self, item: Hashable, weight: int = 1, error: int = 0) -> None:
+        count = self.counts.get(item)
+        if count is not None:
+            self.errors[item] += error
+            self._unlink(item, count)
+        elif len(self.counts) < self.capacity:
+            count = 0
+            self.errors[item] = error
+        else:
+            # Replace the oldest of the least counted items
+            count = self.min_count
+            victim = next(iter(self.buckets[count]))
+            self._unlink(victim, count)
+            del self.counts[victim], self.errors[victim]
+            self.errors[item] = count + error
+        self.counts[item] = count + weight
+        self._link(item, count + weight)
+        if not count:
+            self.min_count = weight if len(self.counts) == 1 else min(self.min_count, weight)
+        elif count == self.min_count and count not in self.buckets:
+            # The last item at the minimum moved up
+            self.min_count = count + 1 if weight == 1 else min(self.buckets)
+
+    def update(self, items: Iterable[Hashable]) -> None:
+        for item in items:
+            self.add(item)
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Add ``other``'s counts to this summary and return it"""
+        for item, count in other.counts.items():
+            self.add(item, count, other.errors[item])
+        return self
+
+    def top(self, n: int = None) -> List[Tuple[Hashable, int]]:
+        """``(item, count)`` pairs, most frequent first; counts may be over by ``error``"""
+        ranked = sorted(self.counts.items(), key=lambda pair: pair[1], reverse=True)
+        return ranked[:n] if n is not None else ranked
+
+    def to_list(self) -> List[dict]:
+        return [{'id': item, 'views': count, 'error': self.errors[item]} for item, count in self.top()]
+
+    @classmethod
+    def from_list(cls, entries: Iterable[dict], capacity: int = 100) -> 'SpaceSaving':
+        summary = cls(capacity)
+        for entry in entries:
+            summary.add(entry['id'], entry['views'], entry.get('error', 0))
+        return summary
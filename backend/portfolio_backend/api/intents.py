@@ -0,0 +1,87 @@
+"""
+Intent matching for AI secretary messages
+One precompiled regex classifies a message in a single pass
+"""
+
+import re
+from typing import Dict, Iterable, List
+from django.conf import settings
+
+# Intent label -> trigger phrases, in priority order.
+# Override with settings.AI_SECRETARY_INTENTS.
+DEFAULT_INTENTS = {
+    'greeting': ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening'],
+    'projects': ['project', 'projects', 'work', 'portfolio', 'built', 'build'],
+    'skills': ['skill', 'skills', 'technology', 'technologies', 'tech', 'stack'],
+    'contact': ['contact', 'hire', 'hiring', 'available', 'availability', 'work with',
+                'freelance', 'email', 'reach'],
+}
+
+# Intents that signal a potential work inquiry worth flagging in the logs
+LEAD_INTENTS = frozenset({'projects', 'contact'})
+
+
+def _normalize_phrase(phrase: str) -> str:
+    return ' '.join(phrase.lower().split())
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Regex source matching any of ``phrases``, factored by common prefix
+
+    Python's regex engine tries alternatives one by one, so a flat
+    ``a|b|c`` costs one attempt per phrase at every position. Sharing
+    prefixes makes that one attempt per distinct leading character.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [
+            (r'\s+' if char == ' ' else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional suffix, so the longest phrase at a position wins
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """Classifies text against phrase lists with one compiled regex
+
+    Phrases match whole words only ("hi" does not fire inside "this"),
+    and at any position the longest phrase wins, so "work with" is a
+    contact intent rather than a projects one.
+    """
+
+    def __init__(self, intents: Dict[str, Iterable[str]]):
+        self.labels = list(intents)
+        self.phrase_labels = {}
+        for label, phrases in intents.items():
+            for phrase in phrases:
+                self.phrase_labels.setdefault(_normalize_phrase(phrase), label)
+        source = _trie_pattern(self.phrase_labels) if self.phrase_labels else '(?!)'
+        self.pattern = re.compile(r'\b' + source + r'\b')
+
+    def match(self, text: str) -> List[str]:
+        """Intent labels found in ``text``, in priority order"""
+        found = set()
+        for phrase in self.pattern.findall(text.lower()):
+            label = self.phrase_labels.get(phrase)
+            found.add(label if label is not None else self.phrase_labels[_normalize_phrase(phrase)])
+        return [label for label in self.labels if label in found]
+
+
+intent_matcher = IntentMatcher(getattr(settings, 'AI_SECRETARY_INTENTS', DEFAULT_INTENTS))
+
+
+def classify(text: str) -> List[str]:
+    """Intent labels for a visitor message, highest priority first"""
+    return intent_matcher.match(text)
@@ -0,0 +1,214 @@
+import random
+import time
+from datetime import date, datetime, timezone
+from io import BytesIO
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from api.intents import DEFAULT_INTENTS, intent_matcher
+from api.portfolio_context import build_relevant_context, project_line
+from api import retrieval
+from api.fast_serializers import fast_serializer_for
+from api.models import Project, Technology
+from api.renderers import FastJSONParser, FastJSONRenderer
+from api.serializers import DEFAULT_PROJECT_IMAGE, ProjectSerializer
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+SAMPLE_MESSAGES = [
+    "Hi there!",
+    "What projects has Didier built with Django?",
+    "Is this person available for freelance work?",
+    "Which technologies are in his stack?",
+    "Tell me something about the weather in Kigali this week, please.",
+    "Can I hire him to work with our team on a long-running data platform project?",
+]
+
+
+def _substring_scan(message):
+    """The per-intent ``any(word in text)`` scan the matcher replaced"""
+    message_lower = message.lower()
+    return [label for label, words in DEFAULT_INTENTS.items()
+            if any(word in message_lower for word in words)]
+
+
+def bench_intents(iterations):
+    rounds = max(1, iterations // len(SAMPLE_MESSAGES))
+    results = {}
+    for name, fn in (("substring scan", _substring_scan), ("compiled matcher", intent_matcher.match)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for message in SAMPLE_MESSAGES:
+                fn(message)
+        elapsed = time.perf_counter() - start
+        results[name] = elapsed / (rounds * len(SAMPLE_MESSAGES))
+    return results, {}
+
+
+TECHNOLOGIES = ["Django", "PostgreSQL", "Redis", "Celery", "Docker", "Kubernetes", "React", "Solidity",
+                "FastAPI", "PyTest", "Terraform", "GraphQL", "Kafka", "AWS", "NumPy", "Pandas"]
+DOMAINS = ["inventory", "payments", "agriculture", "logistics", "healthcare", "education", "analytics",
+           "blockchain", "messaging", "booking", "supply chain", "career guidance", "e-commerce", "monitoring"]
+RETRIEVAL_QUERIES = [
+    "Has he built anything for agriculture with blockchain?",
+    "Which projects use Celery and Redis?",
+    "Tell me about his healthcare analytics work",
+    "Does he have Kubernetes experience?",
+]
+
+
+def _synthetic_projects(count):
+    rng = random.Random(42)
+    for n in range(count):
+        domain = rng.choice(DOMAINS)
+        technologies = rng.sample(TECHNOLOGIES, 3)
+        project = SimpleNamespace(
+            title=f"{domain.title()} Platform {n}",
+            description=f"A {domain} system built with {', '.join(technologies)} handling "
+                        f"{rng.randint(1, 500)}k requests per day with full test coverage.",
+            start_date=date(2020, 1, 1),
+        )
+        yield n, project, technologies
+
+
+def bench_retrieval(iterations):
+    if retrieval.np is None:
+        raise CommandError("numpy is not installed")
+    projects = list(_synthetic_projects(10000))
+    index = retrieval.VectorIndex()
+
+    start = time.perf_counter()
+    for n, project, technologies in projects:
+        index.upsert(("project", n), f"{project.title} {project.description} {' '.join(technologies)}",
+                     project_line(project, technologies))
+    results = {"index one row": (time.perf_counter() - start) / len(projects)}
+
+    rounds = max(1, min(iterations, 2000) // len(RETRIEVAL_QUERIES))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in RETRIEVAL_QUERIES:
+            index.search(query, 5)
+    results["top-5 of 10k rows"] = (time.perf_counter() - start) / (rounds * len(RETRIEVAL_QUERIES))
+
+    full_prompt = sum(len(project_line(project, technologies)) + 1 for _, project, technologies in projects)
+    lines = [line for _, line in index.search(RETRIEVAL_QUERIES[0], 5)]
+    retrieved_prompt = len(build_relevant_context(lines, 100000))
+    return results, {"full prompt (chars)": full_prompt, "top-5 prompt (chars)": retrieved_prompt}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def bench_serializers(iterations):
+    """DRF vs the ``.values()`` fast path over 10k projects, queries included"""
+    fast = fast_serializer_for(ProjectSerializer)
+    results = {}
+    try:
+        # The rows only exist inside this transaction
+        with transaction.atomic():
+            technologies = Technology.objects.bulk_create(Technology(name=name) for name in TECHNOLOGIES)
+            by_name = {technology.name: technology for technology in technologies}
+            projects, links = [], []
+            for n, project, names in _synthetic_projects(10000):
+                projects.append(Project(title=project.title, description=project.description,
+                                        start_date=project.start_date, features=["API", "Tests"],
+                                        github_url=f"https://github.com/example/{n}"))
+            projects = Project.objects.bulk_create(projects, batch_size=500)
+            for project, (_, _, names) in zip(projects, _synthetic_projects(10000)):
+                links += [Project.technologies.through(project_id=project.id, technology_id=by_name[name].id)
+                          for name in names]
+            Project.technologies.through.objects.bulk_create(links, batch_size=2000)
+
+            rounds = max(1, min(iterations, 30) // 10)
+            for label, serialize in (
+                ("DRF serializer", lambda: ProjectSerializer(
+                    Project.objects.prefetch_related('technologies'), many=True).data),
+                ("values() fast path", lambda: fast.render(fast.values(Project.objects.all()))),
+            ):
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    serialize()
+                results[f"{label} (10k rows)"] = (time.perf_counter() - start) / rounds
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results, {"projects": 10000}
+
+
+def _project_page(count):
+    """A ``/api/projects/`` response body with ``count`` results"""
+    stamp = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc).isoformat().replace('+00:00', 'Z')
+    results = [{
+        'id': n, 'title': project.title, 'description': project.description, 'category': 'web',
+        'technologies': technologies, 'image': DEFAULT_PROJECT_IMAGE,
+        'links': {'github': f"https://github.com/example/{n}", 'live': None},
+        'features': ["Authentication", "REST API", "Caf\u00e9 mode"], 'created_at': stamp, 'updated_at': stamp,
+    } for n, project, technologies in _synthetic_projects(count)]
+    return {'count': count, 'next': None, 'previous': None, 'results': results}
+
+
+def _contact_page(count):
+    """A ``/api/contacts/`` response body with ``count`` messages"""
+    stamp = "2024-05-01T14:30:15.123456+02:00"
+    results = [{'id': n, 'name': f"Visitor {n}", 'email': f"visitor{n}@example.com",
+                'message': "Hello, I would like to talk about a project. " * 4, 'created_at': stamp}
+               for n in range(count)]
+    return {'count': count, 'next': None, 'previous': None, 'results': results}
+
+
+def bench_renderers(iterations):
+    """DRF's stdlib JSON vs FastJSONRenderer/FastJSONParser on endpoint-shaped bodies"""
+    payloads = {
+        "projects x100": _project_page(100),
+        "projects x500": _project_page(500),
+        "contacts x100": _contact_page(100),
+    }
+    results, sizes = {}, {}
+    rounds = max(1, min(iterations, 20000) // 100)
+    for label, payload in payloads.items():
+        for name, renderer in (("stdlib", JSONRenderer()), ("fast", FastJSONRenderer())):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                body = renderer.render(payload)
+            results[f"render {label} {name}"] = (time.perf_counter() - start) / rounds
+        sizes[f"{label} (bytes)"] = len(body)
+
+    submission = b'{"name": "Visitor", "email": "visitor@example.com", "message": "' + b"Hello there. " * 40 + b'"}'
+    rounds = max(1, iterations // 10)
+    for name, parser in (("stdlib", JSONParser()), ("fast", FastJSONParser())):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            parser.parse(BytesIO(submission))
+        results[f"parse contact {name}"] = (time.perf_counter() - start) / rounds
+    return results, sizes
+
+
+BENCHMARKS = {
+    "intents": bench_intents,
+    "retrieval": bench_retrieval,
+    "serializers": bench_serializers,
+    "renderers": bench_renderers,
+}
+
+
+class Command(BaseCommand):
+    help = "Run micro-benchmarks for hot code paths and print the per-operation cost"
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+        parser.add_argument("--iterations", type=int, default=100000, help="Operations per benchmark")
+
+    def handle(self, *args, **options):
+        names = options["names"] or list(BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            timings, sizes = BENCHMARKS[name](options["iterations"])
+            for label, seconds in timings.items():
+                self.stdout.write(f"  {label:<24} {seconds * 1e6:12.2f} us/op")
+            for label, value in sizes.items():
+                self.stdout.write(f"  {label:<24} {value:12}")
@@ -0,0 +1,29 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.outbox import drain_outbox
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails, retrying failed ones with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50, help="Emails claimed per batch")
+        parser.add_argument(
+            "--digest", action="store_true", default=getattr(settings, "OUTBOX_DIGEST", False),
+            help="Send one combined email per kind and recipient list per batch",
+        )
+        parser.add_argument(
+            "--loop", type=float, metavar="SECONDS",
+            help="Keep running, draining again every SECONDS",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            totals = drain_outbox(batch_size=options["batch_size"], digest=options["digest"])
+            self.stdout.write(self.style.SUCCESS(
+                f"Outbox drained: {totals['sent']} sent in {totals['emails']} emails, "
+                f"{totals['retrying']} to retry, {totals['failed']} failed"
+            ))
+            if not options["loop"]:
+                break
+            time.sleep(options["loop"])
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from datetime import timedelta
+from django.utils import timezone
+from api.counters import analytics_counters, count_unique_visitors
+
+class Command(BaseCommand):
+    help = "Write pending analytics counters from the cache to PortfolioAnalytics"
+
+    def handle(self, *args, **options):
+        flushed = analytics_counters.flush()
+        for day, deltas in sorted(flushed.items()):
+            counts = ", ".join(f"{field}+{value}" for field, value in sorted(deltas.items()))
+            self.stdout.write(f"{day}: {counts}")
+        self.stdout.write(self.style.SUCCESS(f"Analytics flushed for {len(flushed)} day(s)"))
+        today = timezone.localdate()
+        for label, days in (("today", 1), ("last 7 days", 7), ("last 30 days", 30)):
+            visitors = count_unique_visitors(today - timedelta(days=days - 1), today)
+            self.stdout.write(f"Unique visitors {label}: {visitors}")
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.ai_secretary import ai_secretary_service
+from api.gemini_service import gemini_service
+
+class Command(BaseCommand):
+    help = "Pre-answer frequently asked AI secretary questions into the shared answer cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--question", action="append", dest="questions",
+            help="Question to warm (repeatable); defaults to settings.AI_SECRETARY_FAQ",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Regenerate answers that are already cached",
+        )
+
+    def handle(self, *args, **options):
+        if not gemini_service.is_available():
+            raise CommandError("Gemini AI is not configured; nothing to warm")
+
+        questions = options["questions"] or getattr(settings, "AI_SECRETARY_FAQ", [])
+        warmed = skipped = failed = 0
+
+        for question in questions:
+            context = ai_secretary_service.get_chat_context(question)
+            if not options["force"] and gemini_service.answer_cache.get(question, context) is not None:
+                skipped += 1
+                continue
+            if gemini_service.generate_response(question, context, use_cache=False):
+                warmed += 1
+            else:
+                failed += 1
+                self.stderr.write(f"No answer for: {question}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Answer cache warmed: {warmed} new, {skipped} already cached, {failed} failed"
+        ))
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+from api.search import install_search_indexes, uninstall_search_indexes
+
+# Frozen copy of api.search.SEARCH_INDEXES at the time of this migration
+INDEXES = {
+    'api_project': (('title', 'A'), ('description', 'B')),
+    'api_experience': (('position', 'A'), ('company', 'A'), ('description', 'B')),
+}
+
+
+def install(apps, schema_editor):
+    install_search_indexes(schema_editor, INDEXES)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_indexes(schema_editor, INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
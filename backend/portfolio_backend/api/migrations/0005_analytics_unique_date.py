@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+COUNTER_FIELDS = ('page_views', 'contact_submissions', 'ai_chat_interactions', 'unique_visitors')
+
+
+def merge_duplicate_days(apps, schema_editor):
+    """Fold rows sharing a date into the oldest one before adding the constraint"""
+    PortfolioAnalytics = apps.get_model('api', 'PortfolioAnalytics')
+    keep = {}
+    for row in PortfolioAnalytics.objects.order_by('date', 'id'):
+        first = keep.get(row.date)
+        if first is None:
+            keep[row.date] = row
+            continue
+        for field in COUNTER_FIELDS:
+            setattr(first, field, getattr(first, field) + getattr(row, field))
+        first.save()
+        row.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_outbox_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_days, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='portfolioanalytics',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate, unique=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_analytics_unique_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolioanalytics',
+            name='chat_opens',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='portfolioanalytics',
+            name='project_views',
+            field=models.IntegerField(default=0),
+        ),
+    ]
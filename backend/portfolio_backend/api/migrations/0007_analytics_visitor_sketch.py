@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_analytics_event_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolioanalytics',
+            name='visitor_sketch',
+            field=models.BinaryField(blank=True, help_text="HyperLogLog of the day's visitors", null=True),
+        ),
+    ]
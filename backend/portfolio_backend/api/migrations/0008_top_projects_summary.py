@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_analytics_visitor_sketch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='portfolioanalytics',
+            name='top_projects_viewed',
+            field=models.JSONField(default=list, help_text='Most viewed projects as {id, views, error}, most viewed first'),
+        ),
+    ]
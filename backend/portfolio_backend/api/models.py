@@ -1,8 +1,10 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 class Technology(models.Model):
     name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.name
@@ -35,6 +37,8 @@ class Project(models.Model):
     
     class Meta:
         ordering = ['-start_date']
+        # Keyset pages walk this index (see api.pagination)
+        indexes = [models.Index(fields=['-start_date', '-id'])]
     
     def __str__(self):
         return self.title
@@ -45,9 +49,11 @@ class Skill(models.Model):
         default=0, validators=[MinValueValidator(0), MaxValueValidator(100)]
     )
     category = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-proficiency', 'name']
+        indexes = [models.Index(fields=['-proficiency', 'name', 'id'])]
     
     def __str__(self):
         return self.name
@@ -67,9 +73,11 @@ class Experience(models.Model):
     # New fields to match frontend structure
     type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='work')
     organization = models.CharField(max_length=200, blank=True, help_text="Alternative to company name")
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-start_date']
+        indexes = [models.Index(fields=['-start_date', '-id'])]
     
     def __str__(self):
         return f"{self.position} at {self.company}"
@@ -80,10 +88,12 @@ class Education(models.Model):
     description = models.TextField()
     start_date = models.DateField()
     end_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = "Education"
         ordering = ['-start_date']
+        indexes = [models.Index(fields=['-start_date', '-id'])]
     
     def __str__(self):
         return f"{self.degree} at {self.institution}"
@@ -113,11 +123,43 @@ class Contact(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['-created_at', '-id'])]
+
+class OutboxEmail(models.Model):
+    """Email queued in the same transaction as the data it reports on"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=50, blank=True, help_text="Messages of one kind can be sent as a digest")
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Outbox email"
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+    
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
 
 class SocialProfile(models.Model):
     platform = models.CharField(max_length=100)
     handle = models.CharField(max_length=100)
     url = models.URLField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['platform']
@@ -128,12 +170,15 @@ class SocialProfile(models.Model):
 
 class PortfolioAnalytics(models.Model):
     """Simple analytics tracking for portfolio insights"""
-    date = models.DateField(auto_now_add=True)
+    date = models.DateField(default=timezone.localdate, unique=True)
     page_views = models.IntegerField(default=0)
     contact_submissions = models.IntegerField(default=0)
     ai_chat_interactions = models.IntegerField(default=0)
-    top_projects_viewed = models.JSONField(default=list, help_text="List of most viewed project IDs")
+    project_views = models.IntegerField(default=0)
+    chat_opens = models.IntegerField(default=0)
+    top_projects_viewed = models.JSONField(default=list, help_text="Most viewed projects as {id, views, error}, most viewed first")
     unique_visitors = models.IntegerField(default=0)
+    visitor_sketch = models.BinaryField(null=True, blank=True, editable=False, help_text="HyperLogLog of the day's visitors")
     
     class Meta:
         verbose_name = "Portfolio Analytics"
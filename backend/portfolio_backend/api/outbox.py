@@ -0,0 +1,177 @@
+"""
+Transactional email outbox
+Emails are stored with the data they describe and sent later by a worker
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# How long a drainer owns the rows it picked before another may retry them
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def enqueue_email(subject: str, body: str, to: Sequence[str], kind: str = '',
+                  from_email: Optional[str] = None, reply_to: Sequence[str] = ()) -> OutboxEmail:
+    """Queue an email; call inside the transaction that creates its data
+
+    The row commits or rolls back with that data. With
+    ``OUTBOX_WORKER = 'thread'`` a background drain starts once the
+    transaction commits; otherwise ``manage.py drain_outbox`` sends it.
+    """
+    email = OutboxEmail.objects.create(
+        kind=kind, subject=subject, body=body, to=list(to), reply_to=list(reply_to),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+    if getattr(settings, 'OUTBOX_WORKER', 'command') == 'thread':
+        transaction.on_commit(outbox_worker.kick)
+    return email
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    base = getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 30)
+    ceiling = getattr(settings, 'OUTBOX_RETRY_MAX_SECONDS', 60 * 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+
+def _claim_batch(batch_size: int) -> List[OutboxEmail]:
+    """Pick due rows and push their next attempt out so other drainers skip them"""
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboxEmail.objects.filter(status='pending', next_attempt_at__lte=now).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            next_attempt_at=now + CLAIM_TIMEOUT
+        )
+    return batch
+
+
+def _digest_groups(batch: List[OutboxEmail]) -> List[List[OutboxEmail]]:
+    """Merge same-kind emails to the same recipients; others go alone"""
+    groups: Dict[tuple, List[OutboxEmail]] = defaultdict(list)
+    singles = []
+    for email in batch:
+        if email.kind:
+            groups[(email.kind, tuple(email.to), email.from_email)].append(email)
+        else:
+            singles.append([email])
+    return list(groups.values()) + singles
+
+
+def _build_message(group: List[OutboxEmail], mail_connection) -> EmailMessage:
+    first = group[0]
+    if len(group) == 1:
+        subject, body, reply_to = first.subject, first.body, first.reply_to
+    else:
+        subject = f"{len(group)} new {first.kind} messages"
+        separator = '\n\n' + '-' * 40 + '\n\n'
+        body = separator.join(f"{email.subject}\n\n{email.body}" for email in group)
+        reply_to = []
+    return EmailMessage(
+        subject=subject, body=body, from_email=first.from_email,
+        to=first.to, reply_to=reply_to or None, connection=mail_connection,
+    )
+
+
+def _record_failure(group: List[OutboxEmail], error: Exception, max_attempts: int) -> int:
+    """Schedule a retry with backoff, or give up; returns rows given up on"""
+    now = timezone.now()
+    given_up = 0
+    for email in group:
+        email.attempts += 1
+        email.last_error = repr(error)[:1000]
+        if email.attempts >= max_attempts:
+            email.status = 'failed'
+            given_up += 1
+        email.next_attempt_at = now + _retry_delay(email.attempts)
+    OutboxEmail.objects.bulk_update(group, ['attempts', 'last_error', 'status', 'next_attempt_at'])
+    return given_up
+
+
+def drain_outbox(batch_size: int = 50, digest: bool = False, max_attempts: Optional[int] = None) -> Dict[str, int]:
+    """Send every due email over one mail connection, batch by batch
+
+    A failed send is retried with exponential backoff until
+    ``max_attempts``, then marked failed. With ``digest`` every batch sends
+    one combined email per kind and recipient list instead of one each.
+    """
+    max_attempts = max_attempts or getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    totals = {'sent': 0, 'retrying': 0, 'failed': 0, 'emails': 0}
+    mail_connection = get_connection(fail_silently=False)
+    try:
+        while True:
+            batch = _claim_batch(batch_size)
+            if not batch:
+                break
+            groups = _digest_groups(batch) if digest else [[email] for email in batch]
+            sent_ids = []
+            for group in groups:
+                try:
+                    mail_connection.send_messages([_build_message(group, mail_connection)])
+                except Exception as e:
+                    logger.warning(f"Outbox send failed for {len(group)} email(s): {e!r}")
+                    given_up = _record_failure(group, e, max_attempts)
+                    totals['failed'] += given_up
+                    totals['retrying'] += len(group) - given_up
+                    # Start the next message on a fresh connection
+                    mail_connection.close()
+                    continue
+                sent_ids.extend(email.pk for email in group)
+                totals['emails'] += 1
+            OutboxEmail.objects.filter(pk__in=sent_ids).update(status='sent', sent_at=timezone.now())
+            totals['sent'] += len(sent_ids)
+    finally:
+        mail_connection.close()
+    return totals
+
+
+class OutboxWorker:
+    """Drains the outbox on a background thread after each commit
+
+    Kicks that arrive while a drain is running are folded into it, so at
+    most one thread per process talks to the mail server.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = threading.Event()
+        self.thread = None
+
+    def kick(self) -> None:
+        with self.lock:
+            self.pending.set()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='outbox-worker', daemon=True)
+                self.thread.start()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self.lock:
+                    if not self.pending.is_set():
+                        self.thread = None
+                        return
+                    self.pending.clear()
+                try:
+                    totals = drain_outbox(digest=getattr(settings, 'OUTBOX_DIGEST', False))
+                    if totals['sent'] or totals['retrying'] or totals['failed']:
+                        logger.info(f"Outbox drained: {totals}")
+                except Exception as e:
+                    logger.error(f"Outbox worker error: {e!r}")
+        finally:
+            close_old_connections()
+            connection.close()
+
+
+outbox_worker = OutboxWorker()
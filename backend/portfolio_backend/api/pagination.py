@@ -0,0 +1,148 @@
+"""
+Pagination for the list endpoints
+Page numbers by default; ``?cursor`` switches a request to keyset pagination
+"""
+
+import base64
+import json
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PortfolioPagination(PageNumberPagination):
+    """Page numbers unless the request asks for a cursor
+
+    ``?cursor`` (empty for the first page) pages by the queryset's
+    ordering plus ``id``. Each page is one range scan starting at the last
+    row seen, with no COUNT(*) and no OFFSET, so page 500 costs what page
+    1 does. ``?page_size=`` works in both modes up to ``max_page_size``;
+    ``page_size=all`` asks for up to ``PAGINATION_ALL_PAGE_SIZE`` rows.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        if request.query_params.get(self.page_size_query_param) == 'all':
+            return getattr(settings, 'PAGINATION_ALL_PAGE_SIZE', 500)
+        return super().get_page_size(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        values, backwards = self.decode_cursor(request)
+
+        directions = [(field.name, descending != backwards) for field, descending in self.ordering]
+        queryset = self.load_ordering_fields(queryset)
+        queryset = queryset.order_by(*[f"-{name}" if descending else name for name, descending in directions])
+        if values is not None:
+            queryset = queryset.filter(self.after(directions, values))
+        rows = list(queryset[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        has_next = more if not backwards else values is not None
+        has_previous = more if backwards else values is not None
+        self.next_cursor = self.encode_cursor(rows[-1], False) if rows and has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], True) if rows and has_previous else None
+        return rows
+
+    def get_ordering(self, queryset):
+        """``[(field, descending)]`` ending in the primary key"""
+        opts = queryset.model._meta
+        ordering = []
+        for item in queryset.query.order_by or opts.ordering:
+            if not isinstance(item, str):
+                raise ValidationError({self.cursor_query_param: 'Cursor pagination is not available for ranked results.'})
+            name = item.lstrip('-')
+            name = opts.pk.name if name == 'pk' else name
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                field = None
+            if field is None or field.null or not field.concrete:
+                raise ValidationError({self.cursor_query_param: f'Cursor pagination cannot order by {name}.'})
+            ordering.append((field, item.startswith('-')))
+            if field.primary_key:
+                return ordering
+        # The primary key makes every position unique
+        ordering.append((opts.pk, ordering[-1][1] if ordering else False))
+        return ordering
+
+    def load_ordering_fields(self, queryset):
+        """Undefer the ordering columns, which the cursors are built from"""
+        names = {field.name for field, _ in self.ordering}
+        if queryset._fields is not None:
+            # .values() rows, see FastListMixin
+            missing = [name for name in names if name not in queryset._fields]
+            return queryset.values(*queryset._fields, *missing) if missing else queryset
+        loading, deferring = queryset.query.deferred_loading
+        if deferring and loading & names:
+            return queryset.defer(None).defer(*(loading - names))
+        if not deferring and loading and not names <= loading:
+            return queryset.only(*loading, *names)
+        return queryset
+
+    @staticmethod
+    def after(directions, values) -> Q:
+        """Rows strictly after ``values`` in the given order"""
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(directions, values):
+            condition |= Q(**equal, **{f"{name}__{'lt' if descending else 'gt'}": value})
+            equal[name] = value
+        # Redundant bound on the leading column so the index range scan starts at the cursor
+        (name, descending), value = directions[0], values[0]
+        return Q(**{f"{name}__{'lte' if descending else 'gte'}": value}) & condition
+
+    def encode_cursor(self, row, backwards: bool) -> str:
+        if isinstance(row, dict):
+            values = [row[field.name] for field, _ in self.ordering]
+        else:
+            values = [getattr(row, field.attname) for field, _ in self.ordering]
+        # isoformat keeps microseconds, which DjangoJSONEncoder would cut to milliseconds
+        raw = json.dumps({'v': values, 'b': backwards}, default=lambda value: value.isoformat()
+                         if hasattr(value, 'isoformat') else str(value), separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        """``(ordering values, backwards)``; values are None for the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            if len(raw['v']) != len(self.ordering):
+                raise ValueError(raw['v'])
+            values = [field.to_python(value) for (field, _), value in zip(self.ordering, raw['v'])]
+            return values, bool(raw['b'])
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_cursor_link(self.next_cursor),
+            'previous': self.get_cursor_link(self.previous_cursor),
+            'results': data,
+        })
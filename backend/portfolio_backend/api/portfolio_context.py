@@ -0,0 +1,158 @@
+"""
+Portfolio context for the AI secretary's system prompt
+Rendered from the database, cached per content version and kept within a size budget
+"""
+
+import json
+import logging
+from typing import Iterable, List, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from .models import Project, Skill, Experience, Education, Technology, SocialProfile
+from .caching import content_versions, versioned_key
+
+logger = logging.getLogger(__name__)
+
+# Models whose versions key the cached context
+CONTEXT_MODELS = (Project, Technology, Skill, Experience, Education, SocialProfile)
+
+# Rows considered per section; the character budget usually trims further
+MAX_SECTION_ITEMS = 50
+SUMMARY_CHARS = 140
+
+INSTRUCTIONS = """INSTRUCTIONS:
+1. Be professional and helpful
+2. Answer questions about {name}'s backend development and testing expertise
+3. For work inquiries, direct them to {email}
+4. Stay focused on professional topics
+5. Be specific about technologies and experience"""
+
+
+def _summary(text: str) -> str:
+    """First bullet or line of a description, shortened for the prompt"""
+    text = (text or '').strip()
+    if text.startswith('['):
+        try:
+            bullets = json.loads(text)
+            text = str(bullets[0]) if bullets else ''
+        except (ValueError, TypeError):
+            pass
+    text = ' '.join(text.splitlines()[0].split()) if text else ''
+    if len(text) > SUMMARY_CHARS:
+        text = text[:SUMMARY_CHARS - 3].rstrip() + '...'
+    return text
+
+
+def _period(start_date, end_date) -> str:
+    end = end_date.year if end_date else 'present'
+    return f"{start_date.year}-{end}"
+
+
+def skill_line(skill) -> str:
+    return f"- {skill.name} ({skill.proficiency}%)"
+
+
+def project_line(project, technologies: Iterable[str]) -> str:
+    line = f"- {project.title}"
+    technologies = ', '.join(technologies)
+    if technologies:
+        line += f" ({technologies})"
+    summary = _summary(project.description)
+    return f"{line}: {summary}" if summary else line
+
+
+def experience_line(experience) -> str:
+    where = experience.company or experience.organization
+    return f"- {experience.position} at {where} ({_period(experience.start_date, experience.end_date)})"
+
+
+def _skill_lines() -> Iterable[str]:
+    for skill in Skill.objects.all()[:MAX_SECTION_ITEMS]:
+        yield skill_line(skill)
+
+
+def _project_lines() -> Iterable[str]:
+    projects = Project.objects.prefetch_related('technologies')[:MAX_SECTION_ITEMS]
+    for project in projects:
+        yield project_line(project, (tech.name for tech in project.technologies.all()))
+
+
+def _experience_lines() -> Iterable[str]:
+    for experience in Experience.objects.all()[:MAX_SECTION_ITEMS]:
+        yield experience_line(experience)
+
+
+def _profile_lines() -> Iterable[str]:
+    for profile in SocialProfile.objects.all()[:MAX_SECTION_ITEMS]:
+        yield f"- {profile.platform}: {profile.url}"
+
+
+def _education_lines() -> Iterable[str]:
+    for education in Education.objects.all()[:MAX_SECTION_ITEMS]:
+        yield f"- {education.degree}, {education.institution} ({_period(education.start_date, education.end_date)})"
+
+
+# Highest priority first: when the budget runs out, later sections lose
+# their trailing rows first and are dropped entirely if nothing fits
+CONTEXT_SECTIONS = (
+    ('KEY SKILLS', _skill_lines),
+    ('MAJOR PROJECTS', _project_lines),
+    ('EXPERIENCE', _experience_lines),
+    ('PROFILES', _profile_lines),
+    ('EDUCATION', _education_lines),
+)
+
+
+def _render(sections: Iterable[Tuple[str, Iterable[str]]], max_chars: int) -> str:
+    """Profile header, as many section rows as fit, then the instructions"""
+    name = getattr(settings, 'AI_SECRETARY_OWNER', 'the portfolio owner')
+    email = getattr(settings, 'ADMIN_EMAIL', '')
+    profile = [f"- {line}" for line in getattr(settings, 'AI_SECRETARY_PROFILE', [])]
+    if email:
+        profile.append(f"- Contact: {email}")
+    header = f"You are {name}'s professional AI secretary.\n\n{name.upper()}'S PROFILE:\n" + '\n'.join(profile)
+    footer = INSTRUCTIONS.format(name=name, email=email)
+
+    blocks: List[str] = [header]
+    remaining = max_chars - len(header) - len(footer) - 2
+    trimmed = 0
+    for title, lines in sections:
+        block = f"{title}:"
+        cost = len(block) + 2
+        rows = 0
+        for line in lines:
+            if cost + len(line) + 1 > remaining:
+                trimmed += 1
+                continue
+            block += f"\n{line}"
+            cost += len(line) + 1
+            rows += 1
+        if rows:
+            blocks.append(block)
+            remaining -= cost
+    blocks.append(footer)
+
+    if trimmed:
+        logger.info(f"AI context trimmed {trimmed} rows to fit {max_chars} characters")
+    return '\n\n'.join(blocks)
+
+
+def build_portfolio_context(max_chars: int) -> str:
+    """Render the system prompt from current content, within ``max_chars``"""
+    return _render(((title, lines()) for title, lines in CONTEXT_SECTIONS), max_chars)
+
+
+def build_relevant_context(lines: Iterable[str], max_chars: int) -> str:
+    """System prompt carrying only the rows retrieved for one question"""
+    return _render([('RELEVANT PORTFOLIO DETAILS', lines)], max_chars)
+
+
+def get_portfolio_context() -> str:
+    """Cached context for the current content versions and budget"""
+    max_chars = getattr(settings, 'AI_SECRETARY_CONTEXT_MAX_CHARS', 4000)
+    key = versioned_key('ai:context', content_versions(CONTEXT_MODELS), max_chars)
+    context = cache.get(key)
+    if context is None:
+        context = build_portfolio_context(max_chars)
+        cache.set(key, context, None)
+    return context
@@ -0,0 +1,235 @@
+"""
+Rate limiting and client IP resolution
+Token buckets live in process memory and reconcile with the cache in batches
+"""
+
+import heapq
+import ipaddress
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, Union
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+# The policy that only applies to anonymous users, like DRF's AnonRateThrottle
+ANON_POLICY = 'anon'
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+@lru_cache(maxsize=64)
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """``'30/m'`` -> ``(30, 60)``; the unit may be spelled out (``'100/day'``)"""
+    count, _, unit = rate.partition('/')
+    return int(count), PERIODS[unit.strip()[:1].lower()]
+
+
+def policy_rate(policy: str) -> Tuple[int, int]:
+    try:
+        return parse_rate(settings.RATE_LIMITS[policy])
+    except (AttributeError, KeyError):
+        raise ValueError(f"Unknown rate limit policy: {policy}") from None
+
+
+class Bucket:
+    __slots__ = ('tokens', 'updated', 'full_at', 'pending', 'synced')
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.full_at = now
+        # Requests allowed here that the shared counter has not seen yet
+        self.pending = 0
+        self.synced = float('-inf')
+
+
+class TokenBucketLimiter:
+    """Per-process token buckets kept roughly in step across workers
+
+    A hit refills and spends the bucket for ``(policy, key)`` in memory.
+    Only when a bucket has unsynced hits and ``sync_interval`` seconds
+    have passed (always on a key's first hit in this process) does it add
+    them to a fixed-window counter in the cache. It then caps its own
+    tokens by what the whole fleet has left in that window. Within a
+    worker the limit is exact; across workers it can overshoot by what
+    the other workers allow during one sync interval.
+    """
+
+    def __init__(self, sync_interval: float = 1.0, max_keys: int = 10000):
+        self.sync_interval = sync_interval
+        self.max_keys = max_keys
+        self.buckets: Dict[Tuple[str, str], Bucket] = {}
+        self.lock = threading.Lock()
+
+    def _take(self, policy: str, key: str):
+        limit, period = policy_rate(policy)
+        rate = limit / period
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get((policy, key))
+            if bucket is None:
+                if len(self.buckets) >= self.max_keys:
+                    self._prune_locked(now)
+                bucket = self.buckets[(policy, key)] = Bucket(limit, now)
+            else:
+                bucket.tokens = min(limit, bucket.tokens + (now - bucket.updated) * rate)
+                bucket.updated = now
+            allowed = bucket.tokens >= 1
+            if allowed:
+                bucket.tokens -= 1
+                bucket.pending += 1
+            retry_after = 0.0 if allowed else (1 - bucket.tokens) / rate
+            bucket.full_at = now + (limit - bucket.tokens) / rate
+            sync = 0
+            if bucket.pending and now - bucket.synced >= self.sync_interval:
+                sync, bucket.pending, bucket.synced = bucket.pending, 0, now
+        return bucket, allowed, retry_after, sync, limit, period
+
+    def _prune_locked(self, now: float) -> None:
+        # Refilled buckets are the same as new ones, so forgetting them changes nothing
+        full = [name for name, bucket in self.buckets.items() if bucket.full_at <= now]
+        if not full:
+            # Otherwise free a tenth of the cap, starting with the buckets
+            # closest to full, which forgives the fewest spent tokens
+            full = heapq.nsmallest(max(self.max_keys // 10, 1), self.buckets,
+                                   key=lambda name: self.buckets[name].full_at)
+        for name in full:
+            del self.buckets[name]
+
+    def _settle(self, bucket: Bucket, limit: int, used: int) -> None:
+        with self.lock:
+            bucket.tokens = min(bucket.tokens, max(limit - used, 0))
+
+    @staticmethod
+    def _window_key(policy: str, key: str, period: int) -> str:
+        return f"ratelimit:{policy}:{key}:{int(time.time() // period)}"
+
+    def hit(self, policy: str, key: str) -> Tuple[bool, float]:
+        """Spend a token; returns (allowed, seconds until the next token)"""
+        bucket, allowed, retry_after, sync, limit, period = self._take(policy, key)
+        if sync:
+            window = self._window_key(policy, key, period)
+            try:
+                try:
+                    used = cache.incr(window, sync)
+                except ValueError:
+                    used = sync if cache.add(window, sync, period + 1) else cache.incr(window, sync)
+            except Exception as e:
+                # The local bucket still limits this worker
+                logger.warning(f"Rate limit sync failed: {e!r}")
+            else:
+                self._settle(bucket, limit, used)
+        return allowed, retry_after
+
+    async def ahit(self, policy: str, key: str) -> Tuple[bool, float]:
+        bucket, allowed, retry_after, sync, limit, period = self._take(policy, key)
+        if sync:
+            window = self._window_key(policy, key, period)
+            try:
+                try:
+                    used = await cache.aincr(window, sync)
+                except ValueError:
+                    used = sync if await cache.aadd(window, sync, period + 1) else await cache.aincr(window, sync)
+            except Exception as e:
+                logger.warning(f"Rate limit sync failed: {e!r}")
+            else:
+                self._settle(bucket, limit, used)
+        return allowed, retry_after
+
+    def reset(self) -> None:
+        with self.lock:
+            self.buckets.clear()
+
+
+rate_limiter = TokenBucketLimiter(
+    sync_interval=getattr(settings, 'RATE_LIMIT_SYNC_INTERVAL', 1.0),
+)
+
+
+def client_ip(request) -> str:
+    """The address ClientIPMiddleware resolved, or REMOTE_ADDR without it"""
+    return getattr(request, 'client_ip', None) or request.META.get('REMOTE_ADDR', '')
+
+
+class RateLimitThrottle(BaseThrottle):
+    """Applies the view's ``rate_limits`` policies to the client IP
+
+    Views list policy names from ``settings.RATE_LIMITS``; without the
+    attribute only the ``anon`` policy applies. A refusal becomes a 429
+    with Retry-After.
+    """
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        for policy in getattr(view, 'rate_limits', (ANON_POLICY,)):
+            if policy == ANON_POLICY and request.user and request.user.is_authenticated:
+                continue
+            allowed, retry_after = rate_limiter.hit(policy, client_ip(request))
+            if not allowed:
+                self.retry_after = retry_after
+                return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+def parse_ip(value: str) -> Optional[Union[ipaddress.IPv4Address, ipaddress.IPv6Address]]:
+    try:
+        return ipaddress.ip_address(value)
+    except ValueError:
+        return None
+
+
+def parse_networks(networks: Iterable[str]) -> tuple:
+    return tuple(ipaddress.ip_network(network.strip(), strict=False) for network in networks if network.strip())
+
+
+class ClientIPMiddleware(MiddlewareMixin):
+    """Resolves the real client address once per request as ``request.client_ip``
+
+    X-Forwarded-For is only believed when the request came from a trusted
+    proxy. Its entries are read right to left, skipping trusted proxies,
+    and the first untrusted one is the client. Clients cannot spoof their
+    address by sending the header themselves.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.trusted = parse_networks(getattr(settings, 'TRUSTED_PROXIES', ()))
+        self._trusted_cache: Dict[str, bool] = {}
+
+    def is_trusted(self, ip: str) -> bool:
+        trusted = self._trusted_cache.get(ip)
+        if trusted is None:
+            if len(self._trusted_cache) > 4096:
+                self._trusted_cache.clear()
+            address = parse_ip(ip)
+            trusted = address is not None and any(address in network for network in self.trusted)
+            self._trusted_cache[ip] = trusted
+        return trusted
+
+    def resolve(self, remote_addr: str, forwarded_for: str) -> str:
+        client = remote_addr
+        if not forwarded_for or not self.is_trusted(client):
+            return client
+        for hop in reversed(forwarded_for.split(',')):
+            hop = hop.strip()
+            if parse_ip(hop) is None:
+                break
+            client = hop
+            if not self.is_trusted(hop):
+                break
+        return client
+
+    def process_request(self, request):
+        request.client_ip = self.resolve(
+            request.META.get('REMOTE_ADDR', ''), request.META.get('HTTP_X_FORWARDED_FOR', '')
+        )
+
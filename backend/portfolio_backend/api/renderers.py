@@ -0,0 +1,63 @@
+"""
+JSON renderer and parser for the API
+Uses orjson when it is installed and DRF's stdlib implementation otherwise
+"""
+
+import re
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+# U+2028 / U+2029, which DRF escapes so the JSON is also valid JavaScript
+LINE_SEPARATORS = re.compile(b'\xe2\x80[\xa8\xa9]')
+
+_drf_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """DRF's JSON output, encoded by orjson
+
+    Dates and times, Decimals, lazy strings, querysets and anything else
+    orjson does not handle natively go through DRF's encoder, so ``Z``
+    suffixes and precision match; UUIDs come out the same natively. Only
+    float exponents may be spelled differently (``1e-7`` vs ``1e-07``).
+    Indented output (``?format=api``, ``; indent=4``) and non-default
+    UNICODE_JSON / COMPACT_JSON settings use the stdlib path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_drf_default,
+                           option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+        # isascii() is nearly free and rules out both for most bodies
+        if not ret.isascii() and LINE_SEPARATORS.search(ret):
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser on orjson; non-UTF-8 bodies are decoded first"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, LookupError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,252 @@
+"""
+Retrieval index over portfolio content for the AI secretary
+Hashed term vectors in a NumPy matrix, scored by cosine similarity
+"""
+
+import logging
+import re
+import threading
+import zlib
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .models import Project, Skill, Experience, Technology
+from .caching import content_versions
+from .portfolio_context import project_line, skill_line, experience_line
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install portfolio-backend[retrieval]
+    np = None
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+")
+
+STOP_WORDS = frozenset("""
+a an and are as at be by can did do does for from had has have he her his how i in is it its
+me my of on or our she so than that the their them they this to was we were what when where
+which who why will with you your about tell any some
+""".split())
+
+# Models whose versions tell the index it may be out of date
+RETRIEVAL_MODELS = (Project, Technology, Skill, Experience)
+
+# Rows saved this close to the last sync are re-read, covering clock skew
+# between workers and transactions that committed after the sync started
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stop words, plural 's' folded"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if len(token) < 2 or token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class VectorIndex:
+    """Rows of hashed term-frequency vectors with cosine top-k search
+
+    Tokens are hashed into ``dim`` buckets, so there is no vocabulary to
+    maintain and any row can be added, replaced or removed on its own.
+    Rows are stored L2-normalised with sublinear term frequency; queries
+    are weighted by inverse document frequency, kept up to date as rows
+    change, and scored with one product over the query's own columns.
+    """
+
+    def __init__(self, dim: int = 1024):
+        if np is None:
+            raise RuntimeError("numpy is required for the retrieval index")
+        self.dim = dim
+        self.keys: List[tuple] = []
+        self.lines: List[str] = []
+        self.rows: Dict[tuple, int] = {}
+        # Column-major: a query only reads the columns of its own terms
+        self.matrix = np.zeros((16, dim), dtype=np.float32, order='F')
+        self.doc_freq = np.zeros(dim, dtype=np.float32)
+        self.buckets: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _bucket(self, token: str) -> int:
+        bucket = self.buckets.get(token)
+        if bucket is None:
+            bucket = self.buckets[token] = zlib.crc32(token.encode()) % self.dim
+        return bucket
+
+    def vectorize(self, text: str):
+        buckets = [self._bucket(token) for token in tokenize(text)]
+        vector = np.log1p(np.bincount(buckets, minlength=self.dim).astype(np.float32))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def upsert(self, key: tuple, text: str, line: str) -> None:
+        """Add a row, or replace the row already stored under ``key``"""
+        vector = self.vectorize(text)
+        terms = np.flatnonzero(vector)
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            if row == len(self.matrix):
+                grown = np.zeros((2 * row, self.dim), dtype=np.float32, order='F')
+                grown[:row] = self.matrix
+                self.matrix = grown
+            self.rows[key] = row
+            self.keys.append(key)
+            self.lines.append(line)
+        else:
+            self._clear_row(row)
+            self.lines[row] = line
+        self.matrix[row, terms] = vector[terms]
+        self.doc_freq[terms] += 1
+
+    def _clear_row(self, row: int) -> None:
+        terms = np.flatnonzero(self.matrix[row])
+        self.doc_freq[terms] -= 1
+        self.matrix[row, terms] = 0
+
+    def remove(self, key: tuple) -> None:
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        self._clear_row(row)
+        last = len(self.keys) - 1
+        # Move the last row into the hole so rows stay contiguous
+        if row != last:
+            terms = np.flatnonzero(self.matrix[last])
+            self.matrix[row, terms] = self.matrix[last, terms]
+            self.matrix[last, terms] = 0
+            self.keys[row] = self.keys[last]
+            self.lines[row] = self.lines[last]
+            self.rows[self.keys[row]] = row
+        self.keys.pop()
+        self.lines.pop()
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.05) -> List[Tuple[float, str]]:
+        """Best ``k`` rows for ``query`` as (score, line), best first"""
+        size = len(self.keys)
+        if not size:
+            return []
+        query_vector = self.vectorize(query)
+        terms = np.flatnonzero(query_vector)
+        if not len(terms):
+            return []
+        weights = query_vector[terms] * (np.log((size + 1) / (self.doc_freq[terms] + 1)) + 1)
+        # Zero query entries contribute nothing, so only the query's own
+        # columns need scoring
+        scores = self.matrix[:size, terms] @ (weights / np.linalg.norm(weights))
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[row]), self.lines[row]) for row in top if scores[row] >= min_score]
+
+
+def _project_rows(queryset):
+    for project in queryset.prefetch_related('technologies'):
+        technologies = [tech.name for tech in project.technologies.all()]
+        features = ' '.join(str(feature) for feature in project.features or [])
+        text = ' '.join([project.title, project.title, project.description, features, *technologies])
+        yield ('project', project.pk), text, project_line(project, technologies)
+
+
+def _experience_rows(queryset):
+    for experience in queryset:
+        text = ' '.join([experience.position, experience.company, experience.organization, experience.description])
+        yield ('experience', experience.pk), text, experience_line(experience)
+
+
+def _skill_rows(queryset):
+    for skill in queryset:
+        yield ('skill', skill.pk), f"{skill.name} {skill.category} skill", skill_line(skill)
+
+
+# Index key kind -> (model, row builder, filter for rows changed since a time)
+INDEX_SOURCES = {
+    'project': (Project, _project_rows,
+                lambda since: Q(updated_at__gte=since) | Q(technologies__updated_at__gte=since)),
+    'experience': (Experience, _experience_rows, lambda since: Q(updated_at__gte=since)),
+    'skill': (Skill, _skill_rows, lambda since: Q(updated_at__gte=since)),
+}
+
+
+class PortfolioRetriever:
+    """Keeps a VectorIndex in step with the database and answers queries
+
+    Saving a content model bumps its cache version (see ``signals``). The
+    next search in any worker notices the new versions and re-indexes
+    only the rows whose ``updated_at`` moved since its last sync, then
+    drops rows that were deleted. Technology edits and deletes, and
+    changes to a project's technologies, touch the linked projects'
+    ``updated_at`` so their lines are rebuilt too.
+    """
+
+    def __init__(self, dim: int = 1024, top_k: int = 5, min_score: float = 0.05):
+        self.dim = dim
+        self.top_k = top_k
+        self.min_score = min_score
+        self.lock = threading.Lock()
+        self.index: Optional[VectorIndex] = None
+        self.versions = None
+        self.synced_at = None
+
+    @property
+    def available(self) -> bool:
+        return np is not None
+
+    def _sync(self) -> None:
+        versions = content_versions(RETRIEVAL_MODELS)
+        if versions == self.versions:
+            return
+        started = timezone.now()
+        if self.index is None:
+            self.index = VectorIndex(self.dim)
+            for model, build_rows, _ in INDEX_SOURCES.values():
+                for key, text, line in build_rows(model.objects.all()):
+                    self.index.upsert(key, text, line)
+            logger.info(f"Retrieval index built with {len(self.index)} rows")
+        else:
+            since = self.synced_at - SYNC_OVERLAP
+            for kind, (model, build_rows, changed) in INDEX_SOURCES.items():
+                for key, text, line in build_rows(model.objects.filter(changed(since)).distinct()):
+                    self.index.upsert(key, text, line)
+                live = set(model.objects.values_list('pk', flat=True))
+                for key in [key for key in self.index.keys if key[0] == kind and key[1] not in live]:
+                    self.index.remove(key)
+        self.versions = versions
+        self.synced_at = started
+
+    def search(self, query: str, k: Optional[int] = None) -> List[str]:
+        """Prompt lines for the rows most relevant to ``query``"""
+        if not self.available:
+            return []
+        with self.lock:
+            self._sync()
+            results = self.index.search(query, k or self.top_k, self.min_score)
+        return [line for _, line in results]
+
+    def reset(self) -> None:
+        with self.lock:
+            self.index = None
+            self.versions = None
+            self.synced_at = None
+
+
+def build_retriever() -> PortfolioRetriever:
+    if np is None and getattr(settings, 'AI_RETRIEVAL_ENABLED', True):
+        logger.warning("numpy not installed, AI secretary will send the full portfolio context")
+    return PortfolioRetriever(
+        dim=getattr(settings, 'AI_RETRIEVAL_DIM', 1024),
+        top_k=getattr(settings, 'AI_RETRIEVAL_TOP_K', 5),
+        min_score=getattr(settings, 'AI_RETRIEVAL_MIN_SCORE', 0.05),
+    )
+
+
+portfolio_retriever = build_retriever()
@@ -0,0 +1,205 @@
+"""
+Full-text search for the list endpoints
+FTS5 index on SQLite, stored tsvector with a GIN index on PostgreSQL
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Case, IntegerField, When
+from rest_framework import filters
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+# Table -> indexed (column, weight) pairs, weight 'A' (highest) to 'D'.
+# Installed by migrations; changing an entry needs a new migration.
+SEARCH_INDEXES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    'api_project': (('title', 'A'), ('description', 'B')),
+    'api_experience': (('position', 'A'), ('company', 'A'), ('description', 'B')),
+}
+
+
+def search_tokens(terms: Sequence[str]) -> List[str]:
+    """Plain word tokens; operators and quotes in user input are dropped"""
+    return _WORD.findall(' '.join(terms).lower())
+
+
+class SearchBackend:
+    """Database-specific index DDL and ranked lookup for one table"""
+
+    def __init__(self, connection, table: str, columns: Sequence[Tuple[str, str]]):
+        self.connection = connection
+        self.table = table
+        self.columns = columns
+        self.quote = connection.ops.quote_name
+
+    def install_sql(self) -> List[str]:
+        raise NotImplementedError
+
+    def uninstall_sql(self) -> List[str]:
+        raise NotImplementedError
+
+    def ranked_ids(self, cursor, tokens: List[str], limit: int) -> List[int]:
+        raise NotImplementedError
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5 external-content table kept in step with the base table by triggers"""
+
+    WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table}_fts"
+
+    def install_sql(self) -> List[str]:
+        table, fts = self.quote(self.table), self.quote(self.fts_table)
+        names = [name for name, _ in self.columns]
+        columns = ', '.join(self.quote(name) for name in names)
+        new_values = ', '.join(f"new.{self.quote(name)}" for name in names)
+        old_values = ', '.join(f"old.{self.quote(name)}" for name in names)
+        insert = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});"
+        delete = (f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+                  f"VALUES ('delete', old.id, {old_values});")
+        return [
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, content={table}, "
+            f"content_rowid='id', tokenize='porter unicode61')",
+            f"CREATE TRIGGER {self.quote(self.fts_table + '_ai')} AFTER INSERT ON {table} BEGIN {insert} END",
+            f"CREATE TRIGGER {self.quote(self.fts_table + '_ad')} AFTER DELETE ON {table} BEGIN {delete} END",
+            f"CREATE TRIGGER {self.quote(self.fts_table + '_au')} AFTER UPDATE ON {table} BEGIN {delete} {insert} END",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ]
+
+    def uninstall_sql(self) -> List[str]:
+        statements = [
+            f"DROP TRIGGER IF EXISTS {self.quote(self.fts_table + suffix)}" for suffix in ('_ai', '_ad', '_au')
+        ]
+        return statements + [f"DROP TABLE IF EXISTS {self.quote(self.fts_table)}"]
+
+    def ranked_ids(self, cursor, tokens, limit):
+        fts = self.quote(self.fts_table)
+        # Every token must match, each as a word prefix
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        weights = ', '.join(str(self.WEIGHTS[weight]) for _, weight in self.columns)
+        cursor.execute(
+            f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s ORDER BY bm25({fts}, {weights}) LIMIT %s",
+            [match, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Generated ``search_vector`` tsvector column with a GIN index"""
+
+    CONFIG = 'english'
+
+    def install_sql(self) -> List[str]:
+        table = self.quote(self.table)
+        vector = ' || '.join(
+            f"setweight(to_tsvector('{self.CONFIG}', coalesce({self.quote(name)}, '')), '{weight}')"
+            for name, weight in self.columns
+        )
+        return [
+            f"ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED",
+            f"CREATE INDEX {self.quote(self.table + '_search_gin')} ON {table} USING GIN (search_vector)",
+        ]
+
+    def uninstall_sql(self) -> List[str]:
+        return [
+            f"DROP INDEX IF EXISTS {self.quote(self.table + '_search_gin')}",
+            f"ALTER TABLE {self.quote(self.table)} DROP COLUMN IF EXISTS search_vector",
+        ]
+
+    def ranked_ids(self, cursor, tokens, limit):
+        query = ' & '.join(f"{token}:*" for token in tokens)
+        cursor.execute(
+            f"SELECT id FROM {self.quote(self.table)}, to_tsquery('{self.CONFIG}', %s) query "
+            f"WHERE search_vector @@ query ORDER BY ts_rank(search_vector, query) DESC LIMIT %s",
+            [query, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(table: str, alias: str = 'default') -> Optional[SearchBackend]:
+    """The full-text backend for ``table`` on this database, if there is one"""
+    connection = connections[alias]
+    backend_class = SEARCH_BACKENDS.get(connection.vendor)
+    if backend_class is None or table not in SEARCH_INDEXES:
+        return None
+    return backend_class(connection, table, SEARCH_INDEXES[table])
+
+
+def install_search_indexes(schema_editor, indexes) -> None:
+    """Create the index for each table; used by migrations"""
+    backend_class = SEARCH_BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class is None:
+        return
+    for table, columns in indexes.items():
+        backend = backend_class(schema_editor.connection, table, columns)
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for statement in backend.install_sql():
+                    schema_editor.execute(statement)
+        except DatabaseError as e:
+            # e.g. SQLite built without FTS5: search falls back to icontains
+            logger.warning(f"Full-text index for {table} not installed: {e}")
+
+
+def uninstall_search_indexes(schema_editor, indexes) -> None:
+    backend_class = SEARCH_BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class is None:
+        return
+    for table, columns in indexes.items():
+        for statement in backend_class(schema_editor.connection, table, columns).uninstall_sql():
+            schema_editor.execute(statement)
+
+
+def ranked_search(queryset, terms: Sequence[str], limit: int):
+    """``queryset`` narrowed to the best ``limit`` matches, best first
+
+    Returns None when the database has no full-text index for the model,
+    so the caller can fall back to plain lookups.
+    """
+    backend = get_search_backend(queryset.model._meta.db_table, queryset.db)
+    tokens = search_tokens(terms)
+    if backend is None or not tokens:
+        return None
+    try:
+        with transaction.atomic(using=queryset.db), backend.connection.cursor() as cursor:
+            ids = backend.ranked_ids(cursor, tokens, limit)
+    except DatabaseError as e:
+        logger.warning(f"Full-text search on {backend.table} failed, using icontains: {e}")
+        return None
+    if not ids:
+        return queryset.none()
+    rank = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(rank)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """``?search=`` served from the full-text index, ranked by relevance
+
+    Every word must match as a word prefix in one of the indexed columns.
+    Views whose ``search_fields`` differ from the indexed columns, and
+    databases without an index, keep SearchFilter's ``icontains`` lookups.
+    An explicit ``?ordering=`` still overrides the ranking.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        indexed = [name for name, _ in SEARCH_INDEXES.get(queryset.model._meta.db_table, ())]
+        if terms and list(self.get_search_fields(view, request) or []) == indexed:
+            results = ranked_search(queryset, terms, getattr(settings, 'SEARCH_MAX_RESULTS', 1000))
+            if results is not None:
+                return results
+        return super().filter_queryset(request, queryset, view)
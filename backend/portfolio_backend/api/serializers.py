@@ -3,13 +3,17 @@ from .models import (
     Project, Skill, Experience, Education, Contact,
     Technology, SocialProfile
 )
+from .fieldsets import DynamicFieldsMixin
 
-class TechnologySerializer(serializers.ModelSerializer):
+# Shown for projects without an image_url
+DEFAULT_PROJECT_IMAGE = "https://images.unsplash.com/photo-1517077304055-6e89abbf09b0"
+
+class TechnologySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Technology
         fields = ['id', 'name']
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     technologies = serializers.StringRelatedField(many=True, read_only=True)
     image = serializers.SerializerMethodField()
     links = serializers.SerializerMethodField()
@@ -20,10 +24,13 @@ class ProjectSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'category', 'technologies', 
             'image', 'links', 'features', 'created_at', 'updated_at'
         ]
+        field_sources = {'image': ('image_url',), 'links': ('github_url', 'live_url')}
+        prefetch_fields = ('technologies',)
+        expandable = {'technologies': TechnologySerializer}
     
     def get_image(self, obj):
         """Return image URL or default placeholder"""
-        return obj.image_url if obj.image_url else "https://images.unsplash.com/photo-1517077304055-6e89abbf09b0"
+        return obj.image_url if obj.image_url else DEFAULT_PROJECT_IMAGE
     
     def get_links(self, obj):
         """Format links to match frontend structure"""
@@ -32,17 +39,17 @@ class ProjectSerializer(serializers.ModelSerializer):
             'live': obj.live_url
         }
 
-class SkillSerializer(serializers.ModelSerializer):
+class SkillSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Skill
         fields = ['id', 'name', 'proficiency', 'category']
 
-class ExperienceSerializer(serializers.ModelSerializer):
+class ExperienceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Experience
         fields = ['id', 'company', 'position', 'description', 'start_date', 'end_date']
 
-class EducationSerializer(serializers.ModelSerializer):
+class EducationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Education
         fields = ['id', 'institution', 'degree', 'description', 'start_date', 'end_date']
@@ -53,7 +60,7 @@ class ContactSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'email', 'message', 'created_at']
         read_only_fields = ['id', 'created_at']
 
-class SocialProfileSerializer(serializers.ModelSerializer):
+class SocialProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = SocialProfile
-        fields = ['id', 'platform', 'handle', 'url']
\ No newline at end of file
+        fields = ['id', 'platform', 'handle', 'url']
@@ -0,0 +1,66 @@
+"""
+Model signal receivers that keep derived data in sync with admin edits
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Project, Technology
+from .caching import bump_version
+from .snapshot import SNAPSHOT_MODELS
+
+
+def content_changed(sender, **kwargs):
+    """Invalidate derived data after any content model changes"""
+    bump_version(sender)
+    # A read racing the open transaction may have cached the old rows
+    # under the new version; bumping again on commit retires them
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump_version(sender))
+
+
+for model in SNAPSHOT_MODELS:
+    post_save.connect(content_changed, sender=model, dispatch_uid=f'content_saved_{model.__name__}')
+    post_delete.connect(content_changed, sender=model, dispatch_uid=f'content_deleted_{model.__name__}')
+
+
+def touch_projects(project_ids) -> None:
+    """Mark projects as changed so derived copies of them are rebuilt"""
+    if project_ids:
+        Project.objects.filter(pk__in=project_ids).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Project.technologies.through, dispatch_uid='project_technologies_changed')
+def project_technologies_changed(sender, action, **kwargs):
+    """Adding or removing technologies does not save the project itself"""
+    if action in ('pre_clear', 'post_add', 'post_remove'):
+        # Bump updated_at so conditional GETs notice the relation change
+        instance = kwargs['instance']
+        if kwargs['reverse']:
+            project_ids = kwargs['pk_set'] if action != 'pre_clear' else set(
+                instance.projects.values_list('pk', flat=True)
+            )
+        else:
+            project_ids = {instance.pk}
+        touch_projects(project_ids)
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        content_changed(Project, **kwargs)
+
+
+@receiver(post_save, sender=Technology, dispatch_uid='technology_saved_touch_projects')
+def technology_saved(sender, instance, created, **kwargs):
+    """A renamed technology changes the text of every project using it"""
+    if not created:
+        touch_projects(set(instance.projects.values_list('pk', flat=True)))
+
+
+@receiver(pre_delete, sender=Technology, dispatch_uid='technology_deleting_touch_projects')
+def technology_deleting(sender, instance, **kwargs):
+    # The links are gone by post_delete, so note the projects now
+    instance._linked_project_ids = set(instance.projects.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Technology, dispatch_uid='technology_deleted_touch_projects')
+def technology_deleted(sender, instance, **kwargs):
+    touch_projects(getattr(instance, '_linked_project_ids', ()))
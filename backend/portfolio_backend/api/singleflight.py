@@ -0,0 +1,165 @@
+"""
+Single-flight request coalescing
+Concurrent calls with the same key share one execution and its result
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict
+from django.core.cache import caches
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces identical in-flight calls
+
+    Within a process, threads share a call through ``do`` and coroutines
+    on the same event loop through ``ado``. With ``distributed=True`` the
+    leader also takes a short lock in the shared cache and publishes its
+    result there, so workers in other processes wait for it instead of
+    making the same upstream call. A None result means failure or fallback
+    and is never published, so the next caller tries the upstream again.
+    If an async leader is cancelled, its followers retry instead of hanging.
+    """
+
+    def __init__(self, distributed: bool = False, alias: str = 'default',
+                 prefix: str = 'singleflight', lock_timeout: float = 30.0,
+                 result_ttl: int = 30, poll_interval: float = 0.05):
+        self.distributed = distributed
+        self.alias = alias
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.calls: Dict[str, _Call] = {}
+        self.futures: Dict[tuple, asyncio.Future] = {}
+        self.upstream_calls = 0
+        self.shared_calls = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _lock_key(self, key: str) -> str:
+        return f"{self.prefix}:{key}:lock"
+
+    def _result_key(self, key: str) -> str:
+        return f"{self.prefix}:{key}:result"
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run ``fn`` once for all concurrent callers with ``key``"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        if not leader:
+            self.shared_calls += 1
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_distributed(key, fn) if self.distributed else self._run(fn)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+        return call.result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``fn()`` once for all concurrent coroutines with ``key``"""
+        loop = asyncio.get_running_loop()
+        future_key = (id(loop), key)
+        while (future := self.futures.get(future_key)) is not None:
+            self.shared_calls += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: take over the call
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = self.futures[future_key] = loop.create_future()
+        try:
+            if self.distributed:
+                result = await self._arun_distributed(key, fn)
+            else:
+                self.upstream_calls += 1
+                result = await fn()
+        except Exception as e:
+            future.set_exception(e)
+            # Followers re-raise it; mark it retrieved for the leader
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self.futures[future_key]
+
+    def _run(self, fn):
+        self.upstream_calls += 1
+        return fn()
+
+    def _run_distributed(self, key: str, fn):
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            result = self.cache.get(self._result_key(key))
+            if result is not None:
+                self.shared_calls += 1
+                return result
+            if self.cache.add(self._lock_key(key), 1, self.lock_timeout):
+                try:
+                    result = self._run(fn)
+                    if result is not None:
+                        self.cache.set(self._result_key(key), result, self.result_ttl)
+                    return result
+                finally:
+                    self.cache.delete(self._lock_key(key))
+            if time.monotonic() > deadline:
+                # The other worker is stuck; stop waiting and do the work here
+                return self._run(fn)
+            time.sleep(self.poll_interval)
+
+    async def _arun_distributed(self, key: str, fn):
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            result = await self.cache.aget(self._result_key(key))
+            if result is not None:
+                self.shared_calls += 1
+                return result
+            if await self.cache.aadd(self._lock_key(key), 1, self.lock_timeout):
+                try:
+                    self.upstream_calls += 1
+                    result = await fn()
+                    if result is not None:
+                        await self.cache.aset(self._result_key(key), result, self.result_ttl)
+                    return result
+                finally:
+                    await self.cache.adelete(self._lock_key(key))
+            if time.monotonic() > deadline:
+                self.upstream_calls += 1
+                return await fn()
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> Dict[str, int]:
+        return {'upstream_calls': self.upstream_calls, 'shared_calls': self.shared_calls}
@@ -0,0 +1,55 @@
+"""
+Portfolio snapshot for the frontend's first paint
+Serializes every public collection into one pre-rendered JSON document
+"""
+
+import logging
+from django.core.cache import cache
+from .models import (
+    Project, Skill, Experience, Education,
+    Technology, SocialProfile
+)
+from .caching import content_versions, versioned_key
+from .compression import compress_variants
+from .fast_serializers import fast_serializer_for
+from .renderers import FastJSONRenderer
+from .serializers import (
+    ProjectSerializer, SkillSerializer, ExperienceSerializer,
+    EducationSerializer, TechnologySerializer, SocialProfileSerializer
+)
+
+logger = logging.getLogger(__name__)
+
+# Document key -> (queryset factory, serializer) in the order the frontend renders them
+SNAPSHOT_SECTIONS = {
+    'projects': (lambda: Project.objects.all(), ProjectSerializer),
+    'skills': (lambda: Skill.objects.all(), SkillSerializer),
+    'experiences': (lambda: Experience.objects.all(), ExperienceSerializer),
+    'educations': (lambda: Education.objects.all(), EducationSerializer),
+    'technologies': (lambda: Technology.objects.all(), TechnologySerializer),
+    'profiles': (lambda: SocialProfile.objects.all(), SocialProfileSerializer),
+}
+
+# Models whose versions key the cached snapshot
+SNAPSHOT_MODELS = (Project, Skill, Experience, Education, Technology, SocialProfile)
+
+
+def build_snapshot() -> bytes:
+    """Serialize all sections and render them to JSON bytes"""
+    document = {}
+    for name, (queryset, serializer_class) in SNAPSHOT_SECTIONS.items():
+        fast = fast_serializer_for(serializer_class)
+        document[name] = fast.render(fast.values(queryset())) if fast else serializer_class(queryset(), many=True).data
+    return FastJSONRenderer().render(document)
+
+
+def get_snapshot_variants() -> dict:
+    """The snapshot and its compressed variants for the current content versions, built once"""
+    key = versioned_key('portfolio:snapshot:variants', content_versions(SNAPSHOT_MODELS))
+    variants = cache.get(key)
+    if variants is None:
+        variants = compress_variants(build_snapshot())
+        cache.set(key, variants, None)
+        logger.info("Portfolio snapshot rebuilt (%s)", ", ".join(
+            f"{encoding} {len(body)} bytes" for encoding, body in variants.items()))
+    return variants
@@ -1,5 +1,10 @@
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncClient, SimpleTestCase, override_settings
+from unittest import mock
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -11,9 +16,85 @@ from .models import (
     Education,
     Contact,
     SocialProfile,
+    OutboxEmail,
+    PortfolioAnalytics,
 )
-from datetime import date
+from .conversation_store import InMemoryConversationStore, CacheConversationStore
+from .ai_secretary import AISecretaryService, ai_secretary_service
+from .gemini_service import gemini_service
+from .answer_cache import AnswerCache, normalize_question
+from .singleflight import SingleFlight
+from .circuit_breaker import CircuitBreaker
+from .intents import IntentMatcher, classify
+from .views_ai_secretary import ChatFallbackMixin, FALLBACK_RESPONSES
+from .health import DetailedHealthCheckView
+from .portfolio_context import build_portfolio_context, get_portfolio_context
+from .retrieval import VectorIndex, portfolio_retriever
+from .search import get_search_backend, ranked_search
+from .outbox import drain_outbox, enqueue_email
+from .counters import AnalyticsCounters, analytics_counters, counter_key, count_unique_visitors, sketch_key
+from .hyperloglog import HyperLogLog
+from .heavy_hitters import SpaceSaving
+from .ratelimit import ClientIPMiddleware, TokenBucketLimiter, rate_limiter
+from .events import EventBuffer, event_buffer
+from .fast_serializers import FAST_SERIALIZERS, FastSerializer, fast_serializer_for
+from .serializers import ProjectSerializer
+from .snapshot import SNAPSHOT_SECTIONS, build_snapshot
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers as drf_serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from .renderers import FastJSONParser, FastJSONRenderer
+from .compression import choose_encoding, compress_variants
+import gzip
+from django.utils import timezone
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from datetime import date, timedelta
+import asyncio
 import json
+import time
+
+class FakeGenerativeModel:
+    """Local stand-in for genai.GenerativeModel with configurable latency and errors"""
+
+    def __init__(self, reply="Fake reply", latency=0.0, error=None):
+        self.reply = reply
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.error:
+            raise self.error
+        return mock.Mock(text=self.reply)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.error:
+            raise self.error
+        if stream:
+            return self._stream()
+        return mock.Mock(text=self.reply)
+
+    async def _stream(self):
+        for word in self.reply.split(' '):
+            yield mock.Mock(text=word + ' ')
+
+
+def use_fake_model(model, breaker=None):
+    """Patch the global Gemini service to answer from ``model``"""
+    return mock.patch.multiple(
+        gemini_service, model=model, available=True,
+        breaker=breaker or CircuitBreaker(), create=True
+    )
 
 class BaseAPITest(APITestCase):
     def setUp(self):
@@ -290,6 +371,16 @@ class ContactAPITest(BaseAPITest):
         # Get the newest contact by created_at instead of using last()
         newest_contact = Contact.objects.order_by('-created_at').first()
         self.assertEqual(newest_contact.name, 'Test User')
+
+    def test_sparse_fieldset_params_do_not_reach_writes(self):
+        data = {'name': 'Test User', 'email': 'test@example.com', 'message': 'Hello'}
+        response = self.client.post(f"{reverse('contact-list')}?fields=name", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        contact = Contact.objects.get(name='Test User')
+        self.assertEqual((contact.email, contact.message), ('test@example.com', 'Hello'))
+        response = self.client.post(f"{reverse('contact-list')}?omit=email",
+                                    {**data, 'email': 'not-an-email'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
     def test_get_contacts_unauthenticated(self):
         response = self.client.get(reverse('contact-list'))
@@ -301,6 +392,16 @@ class ContactAPITest(BaseAPITest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
+    def test_admin_changelist_drills_down_by_date(self):
+        old = Contact.objects.create(name="Old Sender", email="old@example.com", message="Hi")
+        long_ago = timezone.now() - timedelta(days=800)
+        Contact.objects.filter(pk=old.pk).update(created_at=long_ago)
+        self.client.force_login(self.admin_user)
+        url = reverse('admin:api_contact_changelist')
+        response = self.client.get(url, {'created_at__year': timezone.localtime(long_ago).year})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([contact.pk for contact in response.context['cl'].result_list], [old.pk])
+
 
 class SocialProfileAPITest(BaseAPITest):
     def setUp(self):
@@ -315,6 +416,1789 @@ class SocialProfileAPITest(BaseAPITest):
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['platform'], 'GitHub')
 
+class PortfolioSnapshotTest(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.tech = Technology.objects.create(name="Python")
+        self.project = Project.objects.create(
+            title="Snapshot Project",
+            description="Snapshot Description",
+            start_date=date(2023, 1, 1)
+        )
+        self.project.technologies.add(self.tech)
+        Skill.objects.create(name="Python", proficiency=90)
+
+    def test_snapshot_contains_all_sections(self):
+        response = self.client.get(reverse('portfolio-snapshot'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(
+            set(data),
+            {'projects', 'skills', 'experiences', 'educations', 'technologies', 'profiles'}
+        )
+        self.assertEqual(data['projects'][0]['technologies'], ['Python'])
+        self.assertEqual(data['skills'][0]['name'], 'Python')
+
+    def test_snapshot_served_from_cache(self):
+        self.client.get(reverse('portfolio-snapshot'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('portfolio-snapshot'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_snapshot_rebuilt_after_save(self):
+        self.client.get(reverse('portfolio-snapshot'))
+        self.project.title = "Renamed Project"
+        self.project.save()
+        data = json.loads(self.client.get(reverse('portfolio-snapshot')).content)
+        self.assertEqual(data['projects'][0]['title'], 'Renamed Project')
+
+    def test_snapshot_rebuilt_after_technology_change(self):
+        self.client.get(reverse('portfolio-snapshot'))
+        self.project.technologies.add(Technology.objects.create(name="Django"))
+        data = json.loads(self.client.get(reverse('portfolio-snapshot')).content)
+        self.assertEqual(data['projects'][0]['technologies'], ['Django', 'Python'])
+
+class ConditionalGetTest(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.tech = Technology.objects.create(name="Python")
+        self.project = Project.objects.create(
+            title="Cached Project",
+            description="Cached Description",
+            start_date=date(2023, 1, 1)
+        )
+        self.project.technologies.add(self.tech)
+        self.experience = Experience.objects.create(
+            position="Engineer", company="Acme",
+            description="Built things", start_date=date(2022, 1, 1)
+        )
+
+    def test_list_returns_validators(self):
+        response = self.client.get(reverse('project-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_if_none_match_returns_304(self):
+        for url in (reverse('experience-list'),
+                    reverse('experience-detail', kwargs={'pk': self.experience.pk})):
+            etag = self.client.get(url)['ETag']
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get(reverse('project-list'))['Last-Modified']
+        response = self.client.get(reverse('project-list'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_object_is_404_not_304(self):
+        future = 'Fri, 01 Jan 2100 00:00:00 GMT'
+        etag = self.client.get(reverse('project-list'))['ETag']
+        for pk in (9999, 'abc'):
+            response = self.client.get(reverse('project-detail', kwargs={'pk': pk}),
+                                       HTTP_IF_MODIFIED_SINCE=future, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_304_matches_compressed_representation(self):
+        for n in range(5):
+            Project.objects.create(title=f"Project {n}", description="x" * 300, start_date=date(2023, 1, 1))
+        url = reverse('project-list')
+        for _ in range(2):
+            # Once rendered, once from the cache
+            compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=compressed['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertTrue(response['ETag'].startswith('W/"'))
+            self.assertEqual(response['ETag'], compressed['ETag'])
+            self.assertEqual(set(response['Vary'].split(', ')), set(compressed['Vary'].split(', ')))
+            cache.clear()
+
+    def test_etag_changes_after_edit(self):
+        etag = self.client.get(reverse('experience-list'))['ETag']
+        self.experience.position = "Senior Engineer"
+        self.experience.save()
+        response = self.client.get(reverse('experience-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_after_delete(self):
+        Experience.objects.create(
+            position="Intern", company="Acme",
+            description="Learned things", start_date=date(2020, 1, 1)
+        )
+        etag = self.client.get(reverse('experience-list'))['ETag']
+        Experience.objects.get(position="Intern").delete()
+        response = self.client.get(reverse('experience-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_project_etag_tracks_technologies(self):
+        url = reverse('project-detail', kwargs={'pk': self.project.pk})
+        etag = self.client.get(url)['ETag']
+        self.project.technologies.add(Technology.objects.create(name="Django"))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        etag = self.client.get(url)['ETag']
+        self.tech.name = "Python 3"
+        self.tech.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_etag_varies_by_query(self):
+        first = self.client.get(reverse('project-list'))['ETag']
+        second = self.client.get(f"{reverse('project-list')}?ordering=title")['ETag']
+        self.assertNotEqual(first, second)
+
+class VersionedCacheTest(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.skill = Skill.objects.create(name="Python", proficiency=90)
+        self.tech = Technology.objects.create(name="Python")
+        self.project = Project.objects.create(
+            title="Cached Project",
+            description="Cached Description",
+            start_date=date(2023, 1, 1)
+        )
+        self.project.technologies.add(self.tech)
+
+    def test_repeat_request_served_without_queries(self):
+        for url in (reverse('skill-list'), reverse('project-list'),
+                    reverse('project-detail', kwargs={'pk': self.project.pk})):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(first.content, second.content)
+
+    def test_save_invalidates_immediately(self):
+        self.client.get(reverse('skill-list'))
+        self.skill.name = "Python 3"
+        self.skill.save()
+        response = self.client.get(reverse('skill-list'))
+        self.assertEqual(json.loads(response.content)['results'][0]['name'], 'Python 3')
+
+    def test_delete_invalidates(self):
+        self.client.get(reverse('skill-list'))
+        self.skill.delete()
+        response = self.client.get(reverse('skill-list'))
+        self.assertEqual(json.loads(response.content)['results'], [])
+
+    def test_m2m_change_invalidates_projects(self):
+        self.client.get(reverse('project-list'))
+        self.project.technologies.remove(self.tech)
+        response = self.client.get(reverse('project-list'))
+        self.assertEqual(json.loads(response.content)['results'][0]['technologies'], [])
+
+    def test_related_model_change_invalidates_projects(self):
+        self.client.get(reverse('project-list'))
+        self.tech.name = "Python 3"
+        self.tech.save()
+        response = self.client.get(reverse('project-list'))
+        self.assertEqual(json.loads(response.content)['results'][0]['technologies'], ['Python 3'])
+
+    def test_unrelated_change_keeps_cache(self):
+        self.client.get(reverse('skill-list'))
+        self.project.title = "Renamed"
+        self.project.save()
+        with self.assertNumQueries(0):
+            self.client.get(reverse('skill-list'))
+
+    def test_lost_version_key_does_not_serve_stale_entry(self):
+        self.client.get(reverse('skill-list'))
+        cache.delete('content:version:api.skill')
+        Skill.objects.filter(pk=self.skill.pk).update(name="Go")
+        response = self.client.get(reverse('skill-list'))
+        self.assertEqual(json.loads(response.content)['results'][0]['name'], 'Go')
+
+    def test_unknown_query_params_are_not_stored(self):
+        url = reverse('skill-list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url, {'utm_source': 'x'})
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            for n in range(5):
+                self.client.get(url, {'page': 1, 'junk': n})
+        self.assertFalse([call for call in cache_set.call_args_list if 'api:response' in call.args[0]])
+
+    def test_query_param_order_is_normalised(self):
+        url = reverse('project-list')
+        self.client.get(f"{url}?ordering=title&fields=title")
+        with self.assertNumQueries(0):
+            response = self.client.get(f"{url}?fields=title&ordering=title")
+        self.assertEqual(list(json.loads(response.content)['results'][0]), ['title'])
+
+    def test_links_follow_the_requested_host(self):
+        for n in range(3):
+            Skill.objects.create(name=f"Skill {n}", proficiency=50)
+        url = f"{reverse('skill-list')}?page_size=1"
+        self.client.get(url)
+        for host, secure in (('localhost', False), ('testserver', True)):
+            response = self.client.get(url, HTTP_HOST=host, secure=secure)
+            scheme = 'https' if secure else 'http'
+            self.assertTrue(json.loads(response.content)['next'].startswith(f"{scheme}://{host}/"))
+
+    @override_settings(API_CACHE_TIMEOUT=300)
+    def test_entries_expire(self):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.client.get(reverse('skill-list'))
+        timeouts = [call.args[2] for call in cache_set.call_args_list if 'api:response' in call.args[0]]
+        self.assertEqual(timeouts, [300])
+
+class InMemoryConversationStoreTest(SimpleTestCase):
+    def test_history_keeps_last_messages(self):
+        store = InMemoryConversationStore(max_messages=3)
+        for n in range(5):
+            store.append('s1', {'role': 'user', 'content': f'message {n}'})
+        history = store.history('s1', limit=10)
+        self.assertEqual([m['content'] for m in history], ['message 2', 'message 3', 'message 4'])
+        self.assertEqual(store.history('missing'), [])
+
+    def test_session_cap_evicts_least_recent(self):
+        store = InMemoryConversationStore(max_sessions=2)
+        store.append('a', {'role': 'user', 'content': 'hi'})
+        store.append('b', {'role': 'user', 'content': 'hi'})
+        store.append('a', {'role': 'user', 'content': 'again'})
+        store.append('c', {'role': 'user', 'content': 'hi'})
+        self.assertEqual(store.history('b'), [])
+        self.assertEqual(len(store.history('a')), 2)
+        self.assertEqual(store.stats()['total_conversations'], 2)
+
+    def test_memory_cap_is_enforced(self):
+        store = InMemoryConversationStore(max_bytes=4096)
+        for n in range(100):
+            store.append(f'session-{n}', {'role': 'user', 'content': 'x' * 500})
+        self.assertLessEqual(store.total_bytes, 4096)
+        self.assertEqual(len(store.history('session-99')), 1)
+
+    def test_cleanup_removes_idle_sessions(self):
+        store = InMemoryConversationStore()
+        store.append('old', {'role': 'user', 'content': 'hi'})
+        store.sessions['old'].last_activity -= 3 * 60 * 60
+        store.append('new', {'role': 'user', 'content': 'hi'})
+        self.assertEqual(store.cleanup(timedelta(hours=1)), 1)
+        self.assertEqual(store.history('old'), [])
+
+    def test_expired_sessions_dropped_lazily(self):
+        store = InMemoryConversationStore(ttl=60)
+        store.append('old', {'role': 'user', 'content': 'hi'})
+        store.sessions['old'].last_activity -= 120
+        self.assertEqual(store.history('old'), [])
+        self.assertEqual(store.stats(), {'total_conversations': 0, 'total_messages': 0})
+
+    def test_expiry_stops_at_first_fresh_session(self):
+        store = InMemoryConversationStore(ttl=60)
+        for n in range(1000):
+            store.append(f'session-{n}', {'role': 'user', 'content': 'hi'})
+        for session in list(store.sessions.values())[:10]:
+            session.last_activity -= 120
+        self.assertEqual(store.sweep(), 10)
+        self.assertEqual(store.stats()['total_conversations'], 990)
+
+    def test_messages_round_trip_extra_fields(self):
+        store = InMemoryConversationStore()
+        store.append('s1', {'role': 'user', 'content': 'hi', 'ip_address': '10.0.0.1'})
+        message = store.history('s1')[0]
+        self.assertEqual(message['ip_address'], '10.0.0.1')
+        self.assertIn('timestamp', message)
+
+    def test_background_sweep(self):
+        store = InMemoryConversationStore(ttl=0, sweep_interval=0.01)
+        store.append('s1', {'role': 'user', 'content': 'hi'})
+        for _ in range(100):
+            if not store.sessions:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(store.sessions), 0)
+
+
+class CacheConversationStoreTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_history_shared_between_workers(self):
+        worker_a = AISecretaryService(CacheConversationStore())
+        worker_b = AISecretaryService(CacheConversationStore())
+        worker_a.store_conversation('s1', {'role': 'user', 'content': 'hello'})
+        worker_b.store_conversation('s1', {'role': 'assistant', 'content': 'hi there'})
+        history = worker_a.get_conversation_history('s1')
+        self.assertEqual([m['role'] for m in history], ['user', 'assistant'])
+
+    def test_append_trims_to_max_messages(self):
+        store = CacheConversationStore(max_messages=4)
+        for n in range(10):
+            store.append('s1', {'role': 'user', 'content': f'message {n}'})
+        history = store.history('s1', limit=10)
+        self.assertEqual([m['content'] for m in history], [f'message {n}' for n in range(6, 10)])
+        self.assertEqual([m['content'] for m in store.history('s1', limit=2)], ['message 8', 'message 9'])
+
+    def test_stats_count_sessions_and_messages(self):
+        service = AISecretaryService(CacheConversationStore())
+        service.store_conversation('s1', {'role': 'user', 'content': 'a'})
+        service.store_conversation('s1', {'role': 'user', 'content': 'b'})
+        service.store_conversation('s2', {'role': 'user', 'content': 'c'})
+        analytics = service.get_conversation_analytics()
+        self.assertEqual(analytics['total_conversations'], 2)
+        self.assertEqual(analytics['total_messages'], 3)
+
+    def test_sessions_expire(self):
+        store = CacheConversationStore(ttl=60)
+        store.append('s1', {'role': 'user', 'content': 'hi'})
+        cache.delete(store._seq_key('s1'))
+        self.assertEqual(store.history('s1'), [])
+
+class AISecretaryChatTest(SimpleTestCase):
+    # The system prompt is read from the (empty) portfolio tables
+    databases = {'default'}
+
+    def setUp(self):
+        cache.clear()
+        gemini_service.answer_cache.clear_local()
+        # Chats spend the anon quota, which the whole suite shares
+        rate_limiter.reset()
+
+    def test_sync_chat_uses_model(self):
+        with use_fake_model(FakeGenerativeModel(reply="Sync reply")):
+            response = self.client.post(
+                reverse('ai-secretary-chat'), {'message': 'What do you build?', 'session_id': 'sync'},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['reply'], 'Sync reply')
+
+    def test_async_chat_validates_input(self):
+        response = asyncio.run(AsyncClient().post(
+            reverse('ai-secretary-chat-async'), {'message': ''}, content_type='application/json'
+        ))
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_object_body_is_rejected(self):
+        for url in (reverse('ai-secretary-chat'), reverse('ai-secretary-chat-async')):
+            response = asyncio.run(AsyncClient().post(url, ['hello'], content_type='application/json'))
+            self.assertEqual(response.status_code, 400, url)
+
+    def test_async_chat_falls_back_without_model(self):
+        with mock.patch.object(gemini_service, 'available', False):
+            response = asyncio.run(AsyncClient().post(
+                reverse('ai-secretary-chat-async'), {'message': 'hello', 'session_id': 'fallback'},
+                content_type='application/json'
+            ))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['ai_powered'])
+        self.assertTrue(response.json()['reply'].startswith('Hello!'))
+
+    def test_async_chat_stores_history(self):
+        with use_fake_model(FakeGenerativeModel(reply="Async reply")):
+            response = asyncio.run(AsyncClient().post(
+                reverse('ai-secretary-chat-async'), {'message': 'hi', 'session_id': 'async-history'},
+                content_type='application/json'
+            ))
+        self.assertEqual(response.json()['reply'], 'Async reply')
+        history = ai_secretary_service.get_conversation_history('async-history')
+        self.assertEqual([m['role'] for m in history], ['user', 'assistant'])
+
+    def test_async_chat_overlaps_model_latency(self):
+        latency, chats = 0.2, 20
+        model = FakeGenerativeModel(latency=latency)
+
+        async def run_chats():
+            client = AsyncClient()
+            return await asyncio.gather(*(
+                client.post(reverse('ai-secretary-chat-async'),
+                            {'message': f'question {n}', 'session_id': f'concurrent-{n}'},
+                            content_type='application/json')
+                for n in range(chats)
+            ))
+
+        with use_fake_model(model):
+            started = time.perf_counter()
+            responses = asyncio.run(run_chats())
+            elapsed = time.perf_counter() - started
+
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        self.assertEqual(model.calls, chats)
+        # Serially this would take latency * chats = 4s
+        self.assertLess(elapsed, latency * chats / 4)
+
+class AISecretaryStreamTest(SimpleTestCase):
+    # The system prompt is read from the (empty) portfolio tables
+    databases = {'default'}
+
+    def setUp(self):
+        cache.clear()
+        gemini_service.answer_cache.clear_local()
+        # Chats spend the anon quota, which the whole suite shares
+        rate_limiter.reset()
+
+    def stream_chat(self, payload):
+        async def run():
+            response = await AsyncClient().post(
+                reverse('ai-secretary-chat-stream'), payload, content_type='application/json'
+            )
+            if not response.streaming:
+                return response, []
+            body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+            events = []
+            for block in body.strip().split('\n\n'):
+                event, data = block.split('\n')
+                events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+            return response, events
+        return asyncio.run(run())
+
+    def test_stream_emits_chunks_then_done(self):
+        with use_fake_model(FakeGenerativeModel(reply="Didier builds APIs")):
+            response, events = self.stream_chat({'message': 'What?', 'session_id': 'stream'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual([e for e, _ in events], ['chunk', 'chunk', 'chunk', 'done'])
+        self.assertEqual(''.join(d['text'] for e, d in events if e == 'chunk'), 'Didier builds APIs ')
+        self.assertTrue(events[-1][1]['ai_powered'])
+
+    def test_stream_stores_assembled_reply(self):
+        with use_fake_model(FakeGenerativeModel(reply="Didier builds APIs")):
+            self.stream_chat({'message': 'What?', 'session_id': 'stream-history'})
+        history = ai_secretary_service.get_conversation_history('stream-history')
+        self.assertEqual(history[-1]['content'], 'Didier builds APIs')
+
+    def test_stream_falls_back_without_model(self):
+        with mock.patch.object(gemini_service, 'available', False):
+            _, events = self.stream_chat({'message': 'hello', 'session_id': 'stream-fallback'})
+        self.assertTrue(events[0][1]['text'].startswith('Hello!'))
+        self.assertFalse(events[-1][1]['ai_powered'])
+
+    def test_stream_rejects_invalid_message(self):
+        response, _ = self.stream_chat({'message': 'x' * 1001})
+        self.assertEqual(response.status_code, 400)
+
+class PortfolioContextTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        django = Technology.objects.create(name="Django")
+        project = Project.objects.create(
+            title="Inventory API", description="Order tracking backend\nwith Celery workers",
+            start_date=date(2023, 1, 1)
+        )
+        project.technologies.add(django)
+        Skill.objects.create(name="Python", proficiency=95)
+        Experience.objects.create(
+            company="Acme", position="Backend Engineer",
+            description='["Built billing services", "Ran on-call"]', start_date=date(2022, 3, 1)
+        )
+
+    def test_renders_from_database(self):
+        context = get_portfolio_context()
+        self.assertIn("- Inventory API (Django): Order tracking backend", context)
+        self.assertIn("- Python (95%)", context)
+        self.assertIn("- Backend Engineer at Acme (2022-present)", context)
+        self.assertNotIn("EDUCATION:", context)
+
+    def test_cached_until_content_changes(self):
+        get_portfolio_context()
+        with self.assertNumQueries(0):
+            get_portfolio_context()
+        Skill.objects.create(name="PostgreSQL", proficiency=80)
+        self.assertIn("- PostgreSQL (80%)", get_portfolio_context())
+
+    def test_budget_trims_low_priority_rows(self):
+        for n in range(40):
+            Education.objects.create(
+                institution=f"School {n}", degree="Course", description="", start_date=date(2030 - n, 1, 1)
+            )
+        full = build_portfolio_context(100000)
+        self.assertIn("School 39", full)
+        trimmed = build_portfolio_context(len(full) - 200)
+        self.assertLessEqual(len(trimmed), len(full) - 200)
+        self.assertIn("- Python (95%)", trimmed)
+        self.assertIn("INSTRUCTIONS:", trimmed)
+        self.assertNotIn("School 39", trimmed)
+
+
+class VectorIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = VectorIndex(dim=256)
+        self.index.upsert(('project', 1), 'Blockchain supply chain for agriculture', 'farm')
+        self.index.upsert(('project', 2), 'Inventory management with Django and Celery', 'inventory')
+        self.index.upsert(('project', 3), 'Career guidance platform', 'career')
+
+    def test_ranks_by_similarity(self):
+        results = self.index.search('agricultural blockchain projects?', k=2)
+        self.assertEqual(results[0][1], 'farm')
+        self.assertEqual(self.index.search('celery workers')[0][1], 'inventory')
+
+    def test_replace_and_remove_rows(self):
+        self.index.upsert(('project', 1), 'Payments gateway', 'payments')
+        self.assertEqual(self.index.search('payments')[0][1], 'payments')
+        self.assertEqual(self.index.search('blockchain'), [])
+
+        self.index.remove(('project', 1))
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.search('payments'), [])
+        self.assertEqual(self.index.search('career')[0][1], 'career')
+        self.assertEqual(self.index.doc_freq.sum(), sum(
+            len(set(self.index.matrix[row].nonzero()[0])) for row in range(len(self.index))
+        ))
+
+    def test_no_match_returns_nothing(self):
+        self.assertEqual(self.index.search('hello there'), [])
+
+
+class PortfolioRetrieverTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        portfolio_retriever.reset()
+        self.solidity = Technology.objects.create(name="Solidity")
+        self.farm = Project.objects.create(
+            title="Agricultural Supply Chain", description="Tracks produce from farm to market",
+            start_date=date(2023, 1, 1)
+        )
+        self.farm.technologies.add(self.solidity)
+        Project.objects.create(title="Inventory System", description="Stock control", start_date=date(2022, 1, 1))
+        Skill.objects.create(name="PostgreSQL", proficiency=85, category="Databases")
+
+    def test_search_returns_prompt_lines(self):
+        lines = portfolio_retriever.search('Any farm or solidity work?')
+        self.assertEqual(lines[0], "- Agricultural Supply Chain (Solidity): Tracks produce from farm to market")
+        self.assertEqual(portfolio_retriever.search('Which databases?'), ["- PostgreSQL (85%)"])
+
+    def test_follows_saves_and_deletes(self):
+        portfolio_retriever.search('farm')
+        self.farm.title = "Coffee Traceability"
+        self.farm.save()
+        self.assertIn("Coffee Traceability", portfolio_retriever.search('coffee')[0])
+
+        self.solidity.name = "Vyper"
+        self.solidity.save()
+        self.assertIn("(Vyper)", portfolio_retriever.search('vyper')[0])
+
+        self.farm.delete()
+        self.assertEqual(portfolio_retriever.search('coffee'), [])
+
+    def test_technology_delete_and_unlink_rebuild_projects(self):
+        # Rows older than the sync overlap are only re-read when touched
+        vyper = Technology.objects.create(name="Vyper")
+        self.farm.technologies.add(vyper)
+        long_ago = timezone.now() - timedelta(days=1)
+        Project.objects.update(updated_at=long_ago)
+        Technology.objects.update(updated_at=long_ago)
+        portfolio_retriever.search('farm')
+
+        self.solidity.delete()
+        self.assertEqual(portfolio_retriever.search('farm')[0],
+                         "- Agricultural Supply Chain (Vyper): Tracks produce from farm to market")
+        Project.objects.update(updated_at=long_ago)
+        vyper.projects.remove(self.farm)
+        self.assertEqual(portfolio_retriever.search('farm')[0],
+                         "- Agricultural Supply Chain: Tracks produce from farm to market")
+
+    def test_chat_context_holds_only_relevant_rows(self):
+        context = ai_secretary_service.get_chat_context('Tell me about the inventory project')
+        self.assertIn("RELEVANT PORTFOLIO DETAILS:\n- Inventory System", context)
+        self.assertNotIn("Agricultural", context)
+        self.assertIn("INSTRUCTIONS:", context)
+
+    def test_chat_context_falls_back_to_full_context(self):
+        self.assertEqual(ai_secretary_service.get_chat_context('hello'), get_portfolio_context())
+        with mock.patch('api.retrieval.np', None):
+            context = ai_secretary_service.get_chat_context('inventory')
+        self.assertEqual(context, get_portfolio_context())
+
+
+class FullTextSearchTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.described = Project.objects.create(
+            title="Inventory Service", description="Order tracking built on Django", start_date=date(2023, 1, 1)
+        )
+        self.titled = Project.objects.create(
+            title="Django Starter Kit", description="Project template", start_date=date(2022, 1, 1)
+        )
+        Project.objects.create(title="Smart Contracts", description="Solidity tooling", start_date=date(2021, 1, 1))
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('project-list'), {'search': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [project['title'] for project in response.data['results']]
+
+    def test_uses_full_text_index(self):
+        self.assertIsNotNone(get_search_backend('api_project'))
+        self.assertIsNotNone(ranked_search(Project.objects.all(), ['django'], 10))
+
+    def test_ranks_title_matches_first(self):
+        self.assertEqual(self.search('django'), ["Django Starter Kit", "Inventory Service"])
+        self.assertEqual(self.search('django', ordering='-start_date'), ["Inventory Service", "Django Starter Kit"])
+
+    def test_matches_word_prefixes_of_every_term(self):
+        self.assertEqual(self.search('solid contr'), ["Smart Contracts"])
+        self.assertEqual(self.search('django solidity'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.titled.title = "Flask Starter Kit"
+        self.titled.save()
+        self.assertEqual(self.search('flask'), ["Flask Starter Kit"])
+        self.assertEqual(self.search('django'), ["Inventory Service"])
+        self.described.delete()
+        self.assertEqual(self.search('django'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"Django*" -('), ["Django Starter Kit", "Inventory Service"])
+        self.assertEqual(self.search('***'), [])
+
+
+class OutboxTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        # Resets the contact endpoint's rate limit
+        rate_limiter.reset()
+
+    def post_contact(self, name='Ada'):
+        return self.client.post(
+            reverse('contact-list'),
+            data=json.dumps({'name': name, 'email': f'{name.lower()}@example.com', 'message': 'Hello'}),
+            content_type='application/json'
+        )
+
+    def test_contact_is_queued_not_sent_inline(self):
+        response = self.post_contact()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.kind, email.status, email.reply_to), ('contact', 'pending', ['ada@example.com']))
+
+        totals = drain_outbox()
+        self.assertEqual(totals['sent'], 1)
+        self.assertEqual(mail.outbox[0].subject, 'Portfolio Contact: Ada')
+        self.assertEqual(mail.outbox[0].reply_to, ['ada@example.com'])
+        self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+        self.assertEqual(drain_outbox()['sent'], 0)
+
+    def test_batch_reuses_one_connection(self):
+        for name in ('Ada', 'Grace', 'Linus'):
+            self.post_contact(name)
+        with mock.patch('api.outbox.get_connection', wraps=mail.get_connection) as get_connection:
+            drain_outbox(batch_size=2)
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_digest_combines_same_kind(self):
+        for name in ('Ada', 'Grace', 'Linus'):
+            self.post_contact(name)
+        enqueue_email('Other', 'Body', to=['ops@example.com'])
+        totals = drain_outbox(digest=True)
+        self.assertEqual((totals['sent'], totals['emails']), (4, 2))
+        digest = next(message for message in mail.outbox if message.subject == '3 new contact messages')
+        self.assertIn('Portfolio Contact: Grace', digest.body)
+
+    def test_failed_sends_back_off_then_give_up(self):
+        self.post_contact()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            self.assertEqual(drain_outbox(max_attempts=2)['retrying'], 1)
+            email = OutboxEmail.objects.get()
+            self.assertEqual((email.status, email.attempts), ('pending', 1))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertEqual(drain_outbox(max_attempts=2)['retrying'], 0)
+
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(drain_outbox(max_attempts=2)['failed'], 1)
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('failed', 2))
+        self.assertIn('down', email.last_error)
+
+    def test_thread_worker_starts_after_commit(self):
+        with override_settings(OUTBOX_WORKER='thread'), \
+                mock.patch('api.outbox.outbox_worker.kick') as kick, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.post_contact()
+            kick.assert_not_called()
+        kick.assert_called_once()
+
+    def test_drain_command(self):
+        self.post_contact()
+        out = StringIO()
+        call_command('drain_outbox', stdout=out)
+        self.assertIn('1 sent', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class AnalyticsCountersTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.counters = AnalyticsCounters(flush_interval=0)
+
+    def test_increments_stay_in_cache_until_flushed(self):
+        with self.assertNumQueries(0):
+            self.counters.increment('page_views')
+            self.counters.increment('page_views', 2)
+        self.assertFalse(PortfolioAnalytics.objects.exists())
+        self.assertEqual(self.counters.pending(), {'page_views': 3})
+
+        self.counters.flush()
+        row = PortfolioAnalytics.objects.get(date=timezone.localdate())
+        self.assertEqual(row.page_views, 3)
+        self.assertEqual(self.counters.pending(), {})
+
+        self.counters.increment('page_views')
+        self.counters.flush()
+        self.counters.flush()
+        row.refresh_from_db()
+        self.assertEqual(row.page_views, 4)
+
+    def test_concurrent_increments_are_exact(self):
+        def bump(_):
+            for _ in range(250):
+                self.counters.increment('ai_chat_interactions')
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(bump, range(8)))
+        self.counters.flush()
+        self.assertEqual(PortfolioAnalytics.objects.get().ai_chat_interactions, 2000)
+
+    def test_flush_keeps_yesterdays_counts_on_their_day(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        cache.set(f"analytics:counter:{yesterday.isoformat()}:contact_submissions", 2)
+        self.counters.flush()
+        self.assertEqual(PortfolioAnalytics.objects.get(date=yesterday).contact_submissions, 2)
+
+    def test_failed_flush_keeps_counts(self):
+        self.counters.increment('page_views', 5)
+        with mock.patch('api.counters.add_to_daily_row', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                self.counters.flush()
+        self.assertEqual(self.counters.pending(), {'page_views': 5})
+
+    def test_unknown_counter_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.counters.increment('clicks')
+
+    def test_contact_submission_is_counted(self):
+        self.client.post(
+            reverse('contact-list'),
+            data=json.dumps({'name': 'Ada', 'email': 'ada@example.com', 'message': 'Hello'}),
+            content_type='application/json'
+        )
+        self.assertEqual(analytics_counters.pending(), {'contact_submissions': 1})
+        out = StringIO()
+        call_command('flush_analytics', stdout=out)
+        self.assertIn('contact_submissions+1', out.getvalue())
+        self.assertEqual(PortfolioAnalytics.objects.get().contact_submissions, 1)
+
+
+class EventIngestTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        event_buffer.flush()
+        self.url = reverse('event-ingest')
+
+    def test_batch_is_tallied_without_queries(self):
+        events = [
+            {'type': 'page_view', 'path': '/'},
+            {'type': 'page_view', 'path': '/projects'},
+            {'type': 'project_view', 'project': 7},
+            {'type': 'chat_open'},
+            {'type': 'project_view', 'project': 'seven'},
+            {'type': 'unknown'},
+        ]
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {'events': events}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data, {'accepted': 4, 'rejected': 2})
+
+        event_buffer.flush()
+        analytics_counters.flush()
+        row = PortfolioAnalytics.objects.get(date=timezone.localdate())
+        self.assertEqual((row.page_views, row.project_views, row.chat_opens), (2, 1, 1))
+
+    def test_quiet_buffer_flushes_in_background(self):
+        buffer = EventBuffer(max_age=0.05)
+        buffer.add([{'type': 'page_view'}, {'type': 'chat_open'}])
+        for _ in range(100):
+            if len(analytics_counters.pending()) == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(analytics_counters.pending(), {'page_views': 1, 'chat_opens': 1})
+        self.assertEqual(buffer.size, 0)
+
+    def test_accepts_beacon_payloads(self):
+        body = json.dumps([{'type': 'page_view'}])
+        response = self.client.post(self.url, body, content_type='text/plain;charset=UTF-8')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(event_buffer.flush(), {'page_views': 1})
+
+    def test_rejects_malformed_batches(self):
+        for payload in ({'events': 'page_view'}, {'events': []}, {'events': [{'type': 'page_view'}] * 51}):
+            response = self.client.post(self.url, payload, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(event_buffer.flush(), {})
+
+    def test_buffer_hands_off_at_size_threshold(self):
+        buffer = EventBuffer(max_events=3, max_age=3600)
+        buffer.add([{'type': 'page_view'}] * 2)
+        self.assertEqual(analytics_counters.pending(), {})
+        buffer.add([{'type': 'chat_open'}])
+        self.assertEqual(analytics_counters.pending(), {'page_views': 2, 'chat_opens': 1})
+
+    def test_buffer_keeps_yesterdays_events_on_their_day(self):
+        buffer = EventBuffer(max_events=100, max_age=3600)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        buffer.add([{'type': 'page_view'}] * 4)
+        buffer.day = yesterday
+        buffer.add([{'type': 'page_view'}])
+        self.assertEqual(cache.get(counter_key(yesterday, 'page_views')), 4)
+        self.assertEqual(buffer.flush(), {'page_views': 1})
+
+
+class HyperLogLogTest(SimpleTestCase):
+    def test_error_stays_within_bounds_at_a_million_visitors(self):
+        sketch = HyperLogLog()
+        for i in range(1_000_000):
+            sketch.add(f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}|Mozilla/5.0")
+        self.assertEqual(len(sketch.to_bytes()), 4096)
+        # Three standard errors of 1.04 / sqrt(4096)
+        self.assertLess(abs(sketch.count() - 1_000_000) / 1_000_000, 3 * 1.04 / 64)
+
+    def test_small_counts_are_near_exact(self):
+        sketch = HyperLogLog()
+        self.assertEqual(sketch.count(), 0)
+        for _ in range(3):
+            sketch.update(f"visitor-{i}" for i in range(100))
+        self.assertAlmostEqual(sketch.count(), 100, delta=2)
+
+    def test_merge_is_the_union_and_idempotent(self):
+        monday, tuesday = HyperLogLog(), HyperLogLog()
+        monday.update(str(i) for i in range(20_000))
+        tuesday.update(str(i) for i in range(10_000, 30_000))
+        week = HyperLogLog.from_bytes(monday.to_bytes()).merge(tuesday)
+        union = HyperLogLog()
+        union.update(str(i) for i in range(30_000))
+        self.assertEqual(week.to_bytes(), union.to_bytes())
+        self.assertEqual(week.merge(tuesday).count(), union.count())
+        with self.assertRaises(ValueError):
+            week.merge(HyperLogLog(precision=10))
+
+
+class UniqueVisitorsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        # The shared buffer keeps today's sketch from earlier tests
+        self.buffer = EventBuffer()
+        patcher = mock.patch('api.views.event_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post_events(self, ip, agent='Mozilla/5.0'):
+        return self.client.post(
+            reverse('event-ingest'), [{'type': 'page_view'}], format='json',
+            REMOTE_ADDR=ip, HTTP_USER_AGENT=agent,
+        )
+
+    def test_events_feed_unique_visitors(self):
+        for ip in ('10.0.0.1', '10.0.0.2', '10.0.0.1', '10.0.0.3'):
+            self.post_events(ip)
+        self.post_events('10.0.0.3', agent='curl/8.0')
+        self.buffer.flush()
+        analytics_counters.flush()
+        row = PortfolioAnalytics.objects.get(date=timezone.localdate())
+        self.assertEqual((row.page_views, row.unique_visitors), (5, 4))
+        self.assertEqual(len(bytes(row.visitor_sketch)), 4096)
+
+    def test_rollup_merges_daily_sketches(self):
+        today = timezone.localdate()
+        yesterday = HyperLogLog()
+        yesterday.update(f"old-{i}" for i in range(50))
+        yesterday.update(f"both-{i}" for i in range(50))
+        PortfolioAnalytics.objects.create(
+            date=today - timedelta(days=1), unique_visitors=100, visitor_sketch=yesterday.to_bytes(),
+        )
+        buffer = EventBuffer()
+        for i in range(50):
+            buffer.add([{'type': 'page_view'}], visitor=f"both-{i}")
+            buffer.add([{'type': 'page_view'}], visitor=f"new-{i}")
+        buffer.flush()
+        self.assertAlmostEqual(count_unique_visitors(today, today), 100, delta=2)
+        self.assertAlmostEqual(count_unique_visitors(today - timedelta(days=6), today), 150, delta=3)
+
+    def test_busy_merge_is_retried(self):
+        buffer = EventBuffer()
+        buffer.add([{'type': 'chat_open'}], visitor='10.0.0.9')
+        cache.add(f"{sketch_key(timezone.localdate())}:lock", 1)
+        buffer.flush()
+        self.assertIsNone(cache.get(sketch_key(timezone.localdate())))
+        cache.clear()
+        buffer.flush()
+        self.assertEqual(HyperLogLog.from_bytes(cache.get(sketch_key(timezone.localdate()))).count(), 1)
+
+
+class SpaceSavingTest(SimpleTestCase):
+    def test_counts_exactly_below_capacity(self):
+        summary = SpaceSaving(capacity=10)
+        summary.update([1, 2, 2, 3, 3, 3])
+        self.assertEqual(summary.top(), [(3, 3), (2, 2), (1, 1)])
+        self.assertEqual(summary.min_count, 1)
+
+    def test_heavy_hitters_survive_in_fixed_memory(self):
+        summary = SpaceSaving(capacity=20)
+        stream = []
+        for i in range(20_000):
+            stream.append(i % 3 if i % 2 else 1000 + i)  # three hot items among 10k one-offs
+        summary.update(stream)
+        self.assertEqual(len(summary), 20)
+        self.assertEqual({item for item, _ in summary.top(3)}, {0, 1, 2})
+        for item, count in summary.top(3):
+            true_count = stream.count(item)
+            self.assertLessEqual(count - summary.errors[item], true_count)
+            self.assertGreaterEqual(count, true_count)
+        self.assertEqual(summary.min_count, min(summary.counts.values()))
+
+    def test_merge_and_round_trip(self):
+        monday, tuesday = SpaceSaving(5), SpaceSaving(5)
+        monday.update([1, 1, 2])
+        tuesday.update([2, 2, 3])
+        week = SpaceSaving.from_list(monday.to_list(), capacity=5).merge(tuesday)
+        self.assertEqual(week.top(), [(2, 3), (1, 2), (3, 1)])
+        self.assertEqual(week.to_list()[0], {'id': 2, 'views': 3, 'error': 0})
+
+
+class PopularProjectsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        event_buffer.flush()
+        self.first = Project.objects.create(title="Search Engine", description="FTS", start_date=date(2023, 1, 1))
+        self.second = Project.objects.create(title="Chat Widget", description="SSE", start_date=date(2022, 1, 1))
+        Project.objects.create(title="Unviewed", description="Nobody looks", start_date=date(2021, 1, 1))
+
+    def view(self, project, times):
+        for _ in range(times):
+            response = self.client.get(reverse('project-detail', args=[project.pk]))
+            self.assertEqual(response.status_code, 200)
+
+    def popular(self, **params):
+        response = self.client.get(reverse('project-popular'), params)
+        self.assertEqual(response.status_code, 200)
+        return [(project['title'], project['views']) for project in response.data['results']]
+
+    def test_detail_views_and_events_rank_projects(self):
+        self.view(self.first, 3)
+        self.view(self.second, 1)
+        self.client.post(reverse('event-ingest'), [{'type': 'project_view', 'project': self.second.pk}] * 4, format='json')
+        self.client.get(reverse('project-detail', args=[9999]))
+        event_buffer.flush()
+        self.assertEqual(self.popular(), [("Chat Widget", 5), ("Search Engine", 3)])
+        self.assertEqual(self.popular(limit=1), [("Chat Widget", 5)])
+
+    def test_only_found_projects_are_counted(self):
+        future = 'Fri, 01 Jan 2100 00:00:00 GMT'
+        for pk in (9999, 'abc', self.first.pk):
+            self.client.get(reverse('project-detail', args=[pk]), HTTP_IF_MODIFIED_SINCE=future)
+        response = self.client.get(reverse('project-detail', args=['abc']), HTTP_IF_MODIFIED_SINCE=future)
+        self.assertEqual(response.status_code, 404)
+        event_buffer.flush()
+        self.assertEqual(self.popular(), [("Search Engine", 1)])
+
+    def test_flush_persists_top_projects(self):
+        self.view(self.first, 2)
+        event_buffer.flush()
+        analytics_counters.flush()
+        row = PortfolioAnalytics.objects.get(date=timezone.localdate())
+        self.assertEqual(row.top_projects_viewed, [{'id': self.first.pk, 'views': 2, 'error': 0}])
+        self.assertEqual(row.project_views, 2)
+        cache.clear()
+        self.assertEqual(self.popular(days=30), [("Search Engine", 2)])
+
+    def test_busy_merge_keeps_views(self):
+        buffer = EventBuffer()
+        buffer.add([{'type': 'project_view', 'project': self.first.pk}])
+        with mock.patch('api.events.merge_top_projects', return_value=False):
+            buffer.flush()
+        buffer.flush()
+        self.assertEqual(self.popular(), [("Search Engine", 1)])
+
+
+@override_settings(RATE_LIMITS={'test': '3/m', 'contact': '2/m', 'chat': '1/m', 'anon': '100/d'})
+class RateLimitTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        rate_limiter.reset()
+
+    def test_bucket_refills_over_time(self):
+        limiter = TokenBucketLimiter(sync_interval=3600)
+        with mock.patch('api.ratelimit.time.monotonic', return_value=1000.0):
+            self.assertEqual([limiter.hit('test', 'ip')[0] for _ in range(4)], [True, True, True, False])
+            self.assertAlmostEqual(limiter.hit('test', 'ip')[1], 20.0)
+        with mock.patch('api.ratelimit.time.monotonic', return_value=1020.0):
+            self.assertEqual([limiter.hit('test', 'ip')[0] for _ in range(2)], [True, False])
+        self.assertTrue(limiter.hit('test', 'other-ip')[0])
+
+    def test_key_cap_evicts_buckets_closest_to_full(self):
+        limiter = TokenBucketLimiter(sync_interval=3600, max_keys=10)
+        with mock.patch('api.ratelimit.time.monotonic', return_value=1000.0):
+            for n in range(10):
+                for _ in range(1 + n % 3):
+                    limiter.hit('test', f'ip-{n}')
+            limiter.hit('test', 'newcomer')
+            self.assertEqual(len(limiter.buckets), 10)
+            # ip-0 had spent the fewest tokens; the exhausted ip-2 keeps its bucket
+            self.assertNotIn(('test', 'ip-0'), limiter.buckets)
+            self.assertFalse(limiter.hit('test', 'ip-2')[0])
+
+    def test_workers_share_the_quota_through_the_cache(self):
+        first, second = TokenBucketLimiter(sync_interval=0), TokenBucketLimiter(sync_interval=0)
+        self.assertTrue(first.hit('test', 'ip')[0])
+        self.assertTrue(first.hit('test', 'ip')[0])
+        self.assertTrue(second.hit('test', 'ip')[0])
+        self.assertFalse(second.hit('test', 'ip')[0])
+
+    def test_hot_keys_sync_in_batches(self):
+        limiter = TokenBucketLimiter(sync_interval=3600)
+        with mock.patch('api.ratelimit.cache') as shared:
+            shared.incr.return_value = 1
+            for _ in range(3):
+                limiter.hit('test', 'ip')
+        self.assertEqual(shared.incr.call_count, 1)
+
+    def test_contact_limit_returns_429(self):
+        payload = {'name': 'Ada', 'email': 'ada@example.com', 'message': 'Hello'}
+        codes = [self.client.post(reverse('contact-list'), payload, format='json').status_code for _ in range(3)]
+        self.assertEqual(codes, [201, 201, 429])
+
+    def test_async_chat_limit_returns_429(self):
+        async def chat():
+            client = AsyncClient()
+            return [
+                (await client.post(reverse('ai-secretary-chat-async'), {'message': ''}, content_type='application/json'))
+                for _ in range(2)
+            ]
+        first, second = asyncio.run(chat())
+        self.assertEqual((first.status_code, second.status_code), (400, 429))
+        self.assertIn('Retry-After', second)
+
+    @override_settings(RATE_LIMITS={'chat': '100/m', 'anon': '1/d'})
+    def test_async_chat_applies_anon_limit(self):
+        async def chat():
+            client = AsyncClient()
+            return [
+                (await client.post(reverse('ai-secretary-chat-async'), {'message': ''}, content_type='application/json')).status_code
+                for _ in range(2)
+            ]
+        self.assertEqual(asyncio.run(chat()), [400, 429])
+
+
+@override_settings(TRUSTED_PROXIES=['10.0.0.0/8', '127.0.0.1/32'])
+class ClientIPMiddlewareTest(SimpleTestCase):
+    def resolve(self, remote_addr, forwarded_for=''):
+        middleware = ClientIPMiddleware(lambda request: None)
+        request = RequestFactory().get('/', REMOTE_ADDR=remote_addr, HTTP_X_FORWARDED_FOR=forwarded_for)
+        middleware.process_request(request)
+        return request.client_ip
+
+    def test_direct_clients_cannot_spoof(self):
+        self.assertEqual(self.resolve('203.0.113.7', '1.2.3.4'), '203.0.113.7')
+
+    def test_trusted_proxies_are_skipped(self):
+        self.assertEqual(self.resolve('10.0.0.2', '198.51.100.1, 203.0.113.7, 10.0.0.9'), '203.0.113.7')
+        self.assertEqual(self.resolve('127.0.0.1'), '127.0.0.1')
+        self.assertEqual(self.resolve('10.0.0.2', '10.0.0.3'), '10.0.0.3')
+
+    def test_garbage_entries_stop_the_walk(self):
+        self.assertEqual(self.resolve('10.0.0.2', '203.0.113.7, unknown'), '10.0.0.2')
+
+
+class KeysetPaginationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(25):
+            # Pairs of projects share a start date, so ties need the id tie-break
+            Project.objects.create(title=f"Project {i}", description="x", start_date=date(2020, 1, 1) + timedelta(days=i // 2))
+        self.expected = list(Project.objects.order_by('-start_date', '-id').values_list('title', flat=True))
+
+    def walk(self, url):
+        titles, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            titles += [project['title'] for project in response.data['results']]
+            pages.append(response.data)
+            url = response.data['next']
+        return titles, pages
+
+    def test_cursor_walk_visits_every_row_once_in_order(self):
+        titles, pages = self.walk(f"{reverse('project-list')}?cursor=&page_size=7")
+        self.assertEqual(titles, self.expected)
+        self.assertEqual(len(pages), 4)
+        self.assertIsNone(pages[0]['previous'])
+
+        back = self.client.get(pages[2]['previous']).data
+        self.assertEqual([project['title'] for project in back['results']], self.expected[7:14])
+        self.assertIsNotNone(back['next'])
+
+    def test_mixed_direction_ordering(self):
+        for i in range(12):
+            Skill.objects.create(name=f"Skill {i:02}", proficiency=90 - (i % 3) * 10)
+        expected = list(Skill.objects.order_by('-proficiency', 'name').values_list('name', flat=True))
+        url, names = f"{reverse('skill-list')}?cursor=&page_size=5", []
+        while url:
+            data = self.client.get(url).data
+            names += [skill['name'] for skill in data['results']]
+            url = data['next']
+        self.assertEqual(names, expected)
+
+    def test_deep_pages_skip_count_and_offset(self):
+        _, pages = self.walk(f"{reverse('project-list')}?cursor=&page_size=7")
+        self.client.get(pages[-2]['next'])
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(pages[-2]['next'])
+        sql = ' '.join(query['sql'] for query in queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_page_size_all_is_bounded(self):
+        response = self.client.get(reverse('project-list'), {'page_size': 'all'})
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertEqual(response.data['count'], 25)
+        with override_settings(PAGINATION_ALL_PAGE_SIZE=20):
+            response = self.client.get(reverse('project-list'), {'page_size': 'all', 'cursor': ''})
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_rejects_bad_cursors_and_orderings(self):
+        url = reverse('project-list')
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'cursor': '', 'ordering': 'end_date'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': '', 'ordering': 'title'}).status_code, 200)
+
+
+class SparseFieldsetTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        python = Technology.objects.create(name="Python")
+        for i in range(3):
+            project = Project.objects.create(
+                title=f"Project {i}", description="long " * 200, start_date=date(2020, 1, 1 + i),
+                image_url=f"https://example.com/{i}.png", github_url="https://github.com/x/y",
+            )
+            project.technologies.add(python)
+
+    def fetch(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{reverse('project-list')}?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'], [q['sql'] for q in queries.captured_queries]
+
+    def test_fields_narrow_payload_and_columns(self):
+        results, sql = self.fetch("fields=id,title,image")
+        self.assertEqual(set(results[0]), {'id', 'title', 'image'})
+        self.assertEqual(results[0]['image'], "https://example.com/2.png")
+        select = next(q for q in sql if 'FROM "api_project"' in q and 'COUNT' not in q)
+        self.assertIn('"image_url"', select)
+        self.assertNotIn('"description"', select)
+        # technologies was not asked for, so it is not prefetched
+        self.assertFalse(any('api_project_technologies' in q for q in sql))
+
+    def test_omit_defers_columns(self):
+        results, sql = self.fetch("omit=description,links")
+        self.assertNotIn('description', results[0])
+        self.assertNotIn('links', results[0])
+        self.assertEqual(results[0]['technologies'], ['Python'])
+        select = next(q for q in sql if 'FROM "api_project"' in q and 'COUNT' not in q)
+        self.assertNotIn('"description"', select)
+        self.assertNotIn('"github_url"', select)
+
+    def test_default_and_expanded_technologies(self):
+        results, _ = self.fetch("")
+        self.assertIn('description', results[0])
+        self.assertEqual(results[0]['technologies'], ['Python'])
+        results, _ = self.fetch("fields=title,technologies&expand=technologies")
+        self.assertEqual(results[0]['technologies'], [{'id': Technology.objects.get().id, 'name': 'Python'}])
+
+    def test_cursor_pages_with_deferred_ordering_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(f"{reverse('project-list')}?cursor=&page_size=2&fields=title").data
+        self.assertEqual(len(queries.captured_queries), 1)
+        data = self.client.get(data['next']).data
+        self.assertEqual([project['title'] for project in data['results']], ["Project 0"])
+
+    def test_retrieve_and_other_viewsets(self):
+        project = Project.objects.first()
+        response = self.client.get(f"{reverse('project-detail', args=[project.id])}?fields=title")
+        self.assertEqual(response.data, {'title': project.title})
+        Skill.objects.create(name="Django", proficiency=90)
+        response = self.client.get(f"{reverse('skill-list')}?omit=id")
+        self.assertNotIn('id', response.data['results'][0])
+        self.assertEqual(response.data['results'][0]['name'], "Django")
+
+
+class FastSerializerParityTest(APITestCase):
+    """The ``.values()`` fast path must render byte-for-byte what DRF does"""
+
+    def setUp(self):
+        cache.clear()
+        zeta, alpha, mid = (Technology.objects.create(name=name) for name in ("Zeta", "Alpha", "Mid"))
+        full = Project.objects.create(
+            title="Caf\u00e9 \"quoted\" <b>", description="Line one\nline two", start_date=date(2023, 5, 1),
+            end_date=date(2023, 9, 1), image_url="https://example.com/a.png", github_url="https://github.com/x/a",
+            live_url="https://a.example.com", category="mobile", features=["Offline", {"nested": [1, 2.5, None]}],
+        )
+        full.technologies.add(zeta, alpha, mid)
+        bare = Project.objects.create(title="Bare", description="", start_date=date(2021, 1, 1))
+        Project.objects.filter(pk=bare.pk).update(image_url="", features=[])
+        Project.objects.create(title="One tech", description="d", start_date=date(2022, 1, 1)).technologies.add(mid)
+        Skill.objects.create(name="Python", proficiency=95, category="Backend")
+        Skill.objects.create(name="Go", proficiency=60)
+        Experience.objects.create(company="Acme", position="Dev", description="Built things", start_date=date(2020, 1, 1))
+        Experience.objects.create(company="Beta", position="Lead", description="x", start_date=date(2019, 1, 1),
+                                  end_date=date(2019, 12, 31))
+        Education.objects.create(institution="Uni", degree="BSc", description="CS", start_date=date(2015, 9, 1),
+                                 end_date=date(2019, 6, 30))
+        SocialProfile.objects.create(platform="GitHub", handle="didier", url="https://github.com/didier")
+
+    def assertParity(self, serializer_class, queryset, names=None, request=None):
+        fast = fast_serializer_for(serializer_class)
+        expected = serializer_class(queryset, many=True, context={'request': request}).data
+        self.assertEqual(JSONRenderer().render(fast.render(fast.values(queryset, names), names)),
+                         JSONRenderer().render(expected))
+
+    def test_every_section_matches(self):
+        for name, (queryset, serializer_class) in SNAPSHOT_SECTIONS.items():
+            with self.subTest(section=name):
+                self.assertIn(serializer_class, FAST_SERIALIZERS)
+                self.assertParity(serializer_class, queryset().prefetch_related(
+                    *getattr(serializer_class.Meta, 'prefetch_fields', ())))
+
+    def test_datetimes_follow_the_active_time_zone(self):
+        queryset = Project.objects.prefetch_related('technologies')
+        for zone in ("UTC", "America/New_York", "Asia/Kolkata"):
+            with self.subTest(zone=zone), timezone.override(zone):
+                self.assertParity(ProjectSerializer, queryset)
+        with timezone.override("UTC"):
+            self.assertTrue(fast_serializer_for(ProjectSerializer).render(
+                Project.objects.values('id', 'created_at'), {'created_at'})[0]['created_at'].endswith('Z'))
+
+    def test_sparse_fields_match(self):
+        request = RequestFactory().get('/', {'fields': 'title,technologies,image', 'omit': 'image'})
+        names = ProjectSerializer.requested_fields(request)
+        self.assertParity(ProjectSerializer, Project.objects.prefetch_related('technologies'), names, request)
+
+    def test_list_endpoint_uses_fast_path(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('project-list'))
+        expected = ProjectSerializer(Project.objects.prefetch_related('technologies'), many=True).data
+        self.assertEqual(response.json()['results'], json.loads(JSONRenderer().render(expected)))
+        # COUNT, the values() rows and one technologies query
+        self.assertEqual(len(queries.captured_queries), 3)
+
+        expanded = self.client.get(f"{reverse('project-list')}?expand=technologies&fields=title,technologies")
+        self.assertEqual(expanded.json()['results'][0]['technologies'][0]['name'], "Alpha")
+
+    def test_snapshot_matches_drf(self):
+        expected = JSONRenderer().render({
+            name: serializer_class(queryset(), many=True).data
+            for name, (queryset, serializer_class) in SNAPSHOT_SECTIONS.items()
+        })
+        self.assertEqual(build_snapshot(), expected)
+
+    def test_unhandled_field_is_a_configuration_error(self):
+        class CustomSerializer(ProjectSerializer):
+            title = drf_serializers.SerializerMethodField()
+
+        class CustomFastSerializer(FastSerializer):
+            serializer_class = CustomSerializer
+
+        with self.assertRaises(ImproperlyConfigured):
+            CustomFastSerializer()
+
+
+class FastJSONTest(SimpleTestCase):
+    def payload(self):
+        from collections import OrderedDict
+        from decimal import Decimal
+        from uuid import UUID
+        from datetime import datetime, time as dt_time, timezone as dt_timezone
+        from django.utils.translation import gettext_lazy
+        return OrderedDict(
+            text="Caf\u00e9 \u2028 \u2029 \x01 \"q\" </script> \U0001f600",
+            numbers=[0, -1, 2 ** 53, 0.1, 2.5, Decimal("1.10"), True, None],
+            uuid=UUID("12345678-1234-5678-1234-567812345678"),
+            when=datetime(2024, 2, 29, 13, 5, 9, 123456, tzinfo=dt_timezone.utc),
+            naive=datetime(2024, 1, 1, 8, 0),
+            day=date(2024, 2, 29), at=dt_time(9, 30), lasted=timedelta(minutes=90),
+            lazy=gettext_lazy("Projects"), nested={1: [{"a": []}], "b": {}},
+        )
+
+    def test_matches_drf_renderer(self):
+        payload = self.payload()
+        expected = JSONRenderer().render(payload)
+        self.assertIn(b'"2024-02-29T13:05:09.123456Z"', expected)
+        self.assertEqual(FastJSONRenderer().render(payload), expected)
+        with mock.patch('api.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(payload), expected)
+        # Exponents may be spelled differently (1.5e-7 vs 1.5e-07) but parse the same
+        self.assertEqual(json.loads(FastJSONRenderer().render([1.5e-7, 1e22])), [1.5e-7, 1e22])
+
+    def test_indent_and_empty_bodies(self):
+        payload = {"a": [1, 2]}
+        self.assertEqual(FastJSONRenderer().render(payload, 'application/json; indent=4'),
+                         JSONRenderer().render(payload, 'application/json; indent=4'))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_parser_matches_drf(self):
+        from io import BytesIO
+        body = '{"name": "Caf\u00e9", "n": [1, 2.5, null, true]}'
+        for parser in (FastJSONParser(), JSONParser()):
+            with self.subTest(parser=type(parser).__name__):
+                self.assertEqual(parser.parse(BytesIO(body.encode())), {"name": "Caf\u00e9", "n": [1, 2.5, None, True]})
+                self.assertEqual(parser.parse(BytesIO(body.encode('latin-1')), None, {'encoding': 'latin-1'})["name"],
+                                 "Caf\u00e9")
+                for bad in (b'{"a": ', b'{"a": NaN}', b'', b'\xff'):
+                    with self.assertRaises(ParseError):
+                        parser.parse(BytesIO(bad))
+
+    def test_registered_for_the_api(self):
+        from rest_framework.settings import api_settings
+        self.assertIs(api_settings.DEFAULT_RENDERER_CLASSES[0], FastJSONRenderer)
+        self.assertIs(api_settings.DEFAULT_PARSER_CLASSES[0], FastJSONParser)
+
+
+class CompressedVariantsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(5):
+            Project.objects.create(title=f"Project {i}", description="A fairly long description. " * 10,
+                                   start_date=date(2023, 1, 1 + i))
+
+    def test_cached_list_served_precompressed(self):
+        url = reverse('project-list')
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        cache.clear()
+        miss = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        with mock.patch('api.compression.gzip.compress') as compress, self.assertNumQueries(0):
+            hit = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        compress.assert_not_called()
+        for response in (miss, hit):
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response['Vary'])
+            self.assertEqual(gzip.decompress(response.content), plain.content)
+            self.assertLess(len(response.content), len(plain.content))
+            self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertEqual(miss['ETag'], hit['ETag'])
+
+        revalidated = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=hit['ETag'])
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_snapshot_served_precompressed(self):
+        plain = self.client.get(reverse('portfolio-snapshot'))
+        response = self.client.get(reverse('portfolio-snapshot'), HTTP_ACCEPT_ENCODING='br;q=1, gzip;q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_brotli_preferred_when_installed(self):
+        fake = mock.Mock(compress=lambda content, quality: b'br')
+        with mock.patch('api.compression.brotli', fake):
+            variants = compress_variants(b'x' * 1000)
+        self.assertEqual(set(variants), {'identity', 'gzip', 'br'})
+        self.assertEqual(compress_variants(b'{"small": true}'), {'identity': b'{"small": true}'})
+
+    def test_choose_encoding(self):
+        both = ('identity', 'gzip', 'br')
+        for header, available, expected in (
+            ('', both, 'identity'),
+            ('gzip, deflate, br', both, 'br'),
+            ('gzip, deflate, br', ('identity', 'gzip'), 'gzip'),
+            ('gzip;q=1.0, br;q=0.4', both, 'gzip'),
+            ('br;q=0, *', both, 'gzip'),
+            ('gzip;q=0', both, 'identity'),
+            ('*;q=0.2, gzip;q=bogus', both, 'br'),
+            ('GZIP', ('identity', 'gzip'), 'gzip'),
+        ):
+            with self.subTest(header=header, available=available):
+                self.assertEqual(choose_encoding(header, available), expected)
+
+
+class IntentMatcherTest(SimpleTestCase):
+    def test_matches_whole_words_only(self):
+        self.assertEqual(classify('Is this the right place?'), [])
+        self.assertEqual(classify('Hi!'), ['greeting'])
+
+    def test_returns_labels_in_priority_order(self):
+        self.assertEqual(classify('Can I hire him for a project? Hello'), ['greeting', 'projects', 'contact'])
+
+    def test_longest_phrase_wins(self):
+        self.assertEqual(classify('I would like to work  with him'), ['contact'])
+        self.assertEqual(classify('Show me his work'), ['projects'])
+
+    def test_custom_intents(self):
+        matcher = IntentMatcher({'pricing': ['rate', 'hourly rate', 'price']})
+        self.assertEqual(matcher.match('What is his Hourly Rate?'), ['pricing'])
+        self.assertEqual(matcher.match('Accurate pirates'), [])
+        self.assertEqual(IntentMatcher({}).match('anything'), [])
+
+    def test_fallback_uses_intents(self):
+        fallback = ChatFallbackMixin()
+        self.assertEqual(fallback._get_fallback_response('hey'), FALLBACK_RESPONSES['greeting'])
+        self.assertEqual(fallback._get_fallback_response('What tech do you use?'), FALLBACK_RESPONSES['skills'])
+        self.assertIn("You asked about 'this is odd'", fallback._get_fallback_response('this is odd'))
+
+    def test_inquiry_logging_flags_contact_intent(self):
+        with self.assertLogs('api.ai_secretary', level='INFO') as logs:
+            ai_secretary_service.log_visitor_inquiry('Are you available for freelance?', 's1')
+            ai_secretary_service.log_visitor_inquiry('Thanks, that is all', 's2')
+        self.assertIn('Contact Intent: True', logs.output[0])
+        self.assertIn('Contact Intent: False', logs.output[1])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark', 'intents', '--iterations', '60', stdout=out)
+        self.assertIn('compiled matcher', out.getvalue())
+
+
+class AnswerCacheTest(SimpleTestCase):
+    # The system prompt is read from the (empty) portfolio tables
+    databases = {'default'}
+
+    def setUp(self):
+        cache.clear()
+        gemini_service.answer_cache.clear_local()
+        # Chats spend the anon quota, which the whole suite shares
+        rate_limiter.reset()
+
+    def test_normalize_question_folds_case_space_punctuation(self):
+        self.assertEqual(normalize_question("  What are his SKILLS?! "), "what are his skills")
+        self.assertEqual(normalize_question("what   are his skills"), "what are his skills")
+
+    def test_repeat_question_skips_model(self):
+        model = FakeGenerativeModel(reply="Python and Django")
+        with use_fake_model(model):
+            first = gemini_service.generate_response("What are his skills?", "ctx")
+            second = gemini_service.generate_response("what are his skills", "ctx")
+        self.assertEqual(first, second)
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(gemini_service.answer_cache.stats()['hits'], 1)
+
+    def test_context_change_misses(self):
+        model = FakeGenerativeModel()
+        with use_fake_model(model):
+            gemini_service.generate_response("Is he available?", "context v1")
+            gemini_service.generate_response("Is he available?", "context v2")
+        self.assertEqual(model.calls, 2)
+
+    def test_lru_and_ttl_eviction(self):
+        answers = AnswerCache(max_entries=2, ttl=60)
+        answers.set("a", "ctx", "A")
+        answers.set("b", "ctx", "B")
+        answers.get("a", "ctx")
+        answers.set("c", "ctx", "C")
+        self.assertNotIn(answers.make_key("b", "ctx"), answers.entries)
+        self.assertIn(answers.make_key("a", "ctx"), answers.entries)
+
+        expired = AnswerCache(ttl=0)
+        expired._set_local(expired.make_key("a", "ctx"), "A")
+        self.assertIsNone(expired._get_local(expired.make_key("a", "ctx")))
+
+    def test_async_path_uses_cache(self):
+        model = FakeGenerativeModel(reply="Cached async")
+        with use_fake_model(model):
+            asyncio.run(gemini_service.generate_response_async("hello", "ctx"))
+            reply = asyncio.run(gemini_service.generate_response_async("Hello!", "ctx"))
+        self.assertEqual(reply, "Cached async")
+        self.assertEqual(model.calls, 1)
+
+    def test_warm_command_fills_shared_cache(self):
+        model = FakeGenerativeModel(reply="Warm answer")
+        out = StringIO()
+        with use_fake_model(model):
+            call_command('warm_answer_cache', question=['Is he available?', 'What are his skills?'], stdout=out)
+            call_command('warm_answer_cache', question=['Is he available?'], stdout=out)
+        self.assertEqual(model.calls, 2)
+        self.assertIn('0 new, 1 already cached', out.getvalue())
+
+        # A fresh worker process only has the shared tier
+        worker = AnswerCache()
+        context = ai_secretary_service.get_portfolio_context()
+        self.assertEqual(worker.get('is he available', context), 'Warm answer')
+
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        gemini_service.answer_cache.clear_local()
+        # Chats spend the anon quota, which the whole suite shares
+        rate_limiter.reset()
+
+    def test_concurrent_threads_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'result'
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(lambda _: flight.do('key', slow), range(10)))
+        self.assertEqual(results, ['result'] * 10)
+        self.assertEqual(len(calls), 1)
+
+    def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+
+        def failing():
+            time.sleep(0.1)
+            raise RuntimeError('upstream down')
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(flight.do, 'key', failing) for _ in range(3)]
+        for future in futures:
+            self.assertRaises(RuntimeError, future.result)
+        self.assertEqual(flight.calls, {})
+
+    def test_concurrent_coroutines_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return 'result'
+
+        async def run():
+            return await asyncio.gather(*(flight.ado('key', slow) for _ in range(10)))
+
+        self.assertEqual(asyncio.run(run()), ['result'] * 10)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.futures, {})
+
+    def test_distributed_follower_reads_published_result(self):
+        leader, follower = SingleFlight(distributed=True), SingleFlight(distributed=True)
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'shared'
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(leader.do, 'key', slow)
+            time.sleep(0.05)
+            second = pool.submit(follower.do, 'key', slow)
+        self.assertEqual((first.result(), second.result()), ('shared', 'shared'))
+        self.assertEqual(len(calls), 1)
+
+    def test_cancelled_leader_hands_over_to_follower(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return 'result'
+
+        async def run():
+            leader = asyncio.create_task(flight.ado('key', slow))
+            await asyncio.sleep(0.01)
+            follower = asyncio.create_task(flight.ado('key', slow))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await asyncio.wait_for(follower, 2)
+
+        self.assertEqual(asyncio.run(run()), 'result')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(flight.futures, {})
+
+    def test_distributed_failure_is_not_shared(self):
+        first, second = SingleFlight(distributed=True), SingleFlight(distributed=True)
+        self.assertIsNone(first.do('key', lambda: None))
+        self.assertEqual(second.do('key', lambda: 'recovered'), 'recovered')
+        self.assertIsNone(asyncio.run(first.ado('akey', self.async_none)))
+        self.assertEqual(asyncio.run(second.ado('akey', self.async_recovered)), 'recovered')
+
+    async def async_none(self):
+        return None
+
+    async def async_recovered(self):
+        return 'recovered'
+
+    def test_gemini_burst_makes_one_upstream_call(self):
+        model = FakeGenerativeModel(reply="Coalesced", latency=0.2)
+
+        async def burst():
+            return await asyncio.gather(*(
+                gemini_service.generate_response_async("Hi there", "ctx") for _ in range(25)
+            ))
+
+        with use_fake_model(model):
+            replies = asyncio.run(burst())
+            with ThreadPoolExecutor(max_workers=10) as pool:
+                sync_replies = list(pool.map(
+                    lambda _: gemini_service.generate_response("What's new?", "ctx"), range(10)
+                ))
+        self.assertEqual(set(replies) | set(sync_replies), {"Coalesced"})
+        self.assertEqual(model.calls, 2)
+
+class CircuitBreakerTest(SimpleTestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker(failure_threshold=1, slow_call_threshold=0.5)
+        breaker.record_success(duration=0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_success(duration=2.0)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_half_open_probe_recovers_or_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_released_or_lost_probe_frees_the_slot(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0, probe_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.release()
+        self.assertTrue(breaker.allow_request())
+        # This probe never reports back
+        self.assertFalse(breaker.allow_request())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_only_probe_success_closes(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+        breaker.record_failure()
+        # A call admitted before the breaker opened finishes late
+        breaker.record_success(duration=1.0)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        time.sleep(0.06)
+        breaker.record_success(duration=1.0)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success(duration=0.01)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class GeminiResilienceTest(SimpleTestCase):
+    # The system prompt is read from the (empty) portfolio tables
+    databases = {'default'}
+
+    def setUp(self):
+        cache.clear()
+        gemini_service.answer_cache.clear_local()
+        # Chats spend the anon quota, which the whole suite shares
+        rate_limiter.reset()
+
+    def test_slow_upstream_hits_deadline(self):
+        model = FakeGenerativeModel(latency=1.0)
+        with use_fake_model(model), mock.patch.object(gemini_service, 'timeout', 0.1):
+            started = time.perf_counter()
+            self.assertIsNone(gemini_service.generate_response("slow sync", "ctx"))
+            self.assertIsNone(asyncio.run(gemini_service.generate_response_async("slow async", "ctx")))
+            elapsed = time.perf_counter() - started
+            self.assertEqual(gemini_service.breaker.consecutive_failures, 2)
+        self.assertLess(elapsed, 0.6)
+
+    def test_timed_out_calls_do_not_reach_upstream(self):
+        model = FakeGenerativeModel(latency=0.3)
+        breaker = CircuitBreaker(failure_threshold=10)
+        with use_fake_model(model, breaker), mock.patch.object(gemini_service, 'timeout', 0.05), \
+                mock.patch.object(gemini_service, 'executor', ThreadPoolExecutor(max_workers=1)):
+            for n in range(4):
+                self.assertIsNone(gemini_service.generate_response(f"queued {n}", "ctx"))
+            gemini_service.executor.shutdown(wait=True)
+        # Only the call already running when the first caller gave up was sent
+        self.assertEqual(model.calls, 1)
+
+    def test_open_breaker_skips_upstream(self):
+        model = FakeGenerativeModel(error=RuntimeError("503 upstream"))
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+        with use_fake_model(model, breaker):
+            for n in range(10):
+                self.assertIsNone(gemini_service.generate_response(f"question {n}", "ctx"))
+        self.assertEqual(model.calls, 3)
+        self.assertEqual(breaker.rejected_calls, 7)
+
+    def test_chat_falls_back_while_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        breaker.record_failure()
+        model = FakeGenerativeModel(reply="Should not be used")
+        with use_fake_model(model, breaker):
+            response = self.client.post(
+                reverse('ai-secretary-chat'), {'message': 'hello', 'session_id': 'breaker'},
+                content_type='application/json'
+            )
+        self.assertTrue(response.json()['reply'].startswith('Hello!'))
+        self.assertEqual(model.calls, 0)
+
+    def test_cancelled_probe_does_not_wedge_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        model = FakeGenerativeModel(latency=1.0)
+
+        async def cancel_probe():
+            task = asyncio.create_task(gemini_service._agenerate("cancelled", "ctx"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            stream = gemini_service.stream_response_async("closed", "ctx")
+            next_chunk = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0.05)
+            next_chunk.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await next_chunk
+            await stream.aclose()
+
+        with use_fake_model(model, breaker):
+            asyncio.run(cancel_probe())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(breaker.half_open_calls, 0)
+        self.assertTrue(breaker.allow_request())
+
+    def test_stream_failure_opens_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        model = FakeGenerativeModel(error=RuntimeError("stream broke"))
+
+        async def consume():
+            return [chunk async for chunk in gemini_service.stream_response_async("stream?", "ctx")]
+
+        with use_fake_model(model, breaker):
+            self.assertEqual(asyncio.run(consume()), [])
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_health_reports_breaker_state(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        breaker.record_failure()
+        with use_fake_model(FakeGenerativeModel(), breaker):
+            response = DetailedHealthCheckView.as_view()(RequestFactory().get('/health/detailed/'))
+        checks = json.loads(response.content)['checks']
+        self.assertEqual(checks['ai_service'], 'degraded')
+        self.assertEqual(checks['ai_circuit_breaker']['state'], 'open')
+
 class AuthenticationTest(BaseAPITest):
     def test_obtain_token(self):
         response = self.client.post(
@@ -2,7 +2,9 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 from .health import HealthCheckView
-from .views_ai_secretary import AISecretaryChatView, AISecretaryAnalyticsView
+from .views_ai_secretary import (
+    AISecretaryChatView, AsyncAISecretaryChatView, AISecretaryChatStreamView, AISecretaryAnalyticsView
+)
 
 router = DefaultRouter()
 router.register(r'projects', views.ProjectViewSet, basename='project')
@@ -15,9 +17,13 @@ router.register(r'contact', views.ContactViewSet, basename='contact')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('portfolio/', views.PortfolioSnapshotView.as_view(), name='portfolio-snapshot'),
+    path('events/', views.EventIngestView.as_view(), name='event-ingest'),
     path('health/', HealthCheckView.as_view(), name='health-check'),
     
     # AI Secretary endpoints
     path('ai-secretary/chat/', AISecretaryChatView.as_view(), name='ai-secretary-chat'),
+    path('ai-secretary/chat/async/', AsyncAISecretaryChatView.as_view(), name='ai-secretary-chat-async'),
+    path('ai-secretary/chat/stream/', AISecretaryChatStreamView.as_view(), name='ai-secretary-chat-stream'),
     path('ai-secretary/analytics/', AISecretaryAnalyticsView.as_view(), name='ai-secretary-analytics'),
 ]
@@ -1,14 +1,13 @@
 from rest_framework import viewsets, permissions, filters
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.views.decorators.cache import cache_page
-from django.utils.decorators import method_decorator
-from django_ratelimit.decorators import ratelimit
-from django.core.mail import send_mail
+from rest_framework.views import APIView
+from django.http import HttpResponse
+from django.db import transaction
 from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
 import logging
-
-logger = logging.getLogger('api')
-
 from .models import (
     Project, Skill, Experience, Education, Contact,
     Technology, SocialProfile
@@ -18,56 +17,100 @@ from .serializers import (
     EducationSerializer, ContactSerializer, TechnologySerializer,
     SocialProfileSerializer
 )
+from .snapshot import get_snapshot_variants
+from .caching import VersionedCacheMixin
+from .conditional import ConditionalGetMixin
+from .compression import serve_variant
+from .fieldsets import SparseFieldsMixin
+from .fast_serializers import FastListMixin
+from .search import FullTextSearchFilter
+from .outbox import enqueue_email
+from .counters import analytics_counters, popular_projects
+from .events import BeaconJSONParser, event_buffer
+from .renderers import FastJSONParser
+from .ratelimit import RateLimitThrottle, client_ip
+
+logger = logging.getLogger('api')
 
-class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
+
+class ProjectViewSet(ConditionalGetMixin, VersionedCacheMixin, SparseFieldsMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Project.objects.prefetch_related('technologies').all()
     serializer_class = ProjectSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    content_models = (Project, Technology)
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description']
     ordering_fields = ['start_date', 'end_date', 'title']
 
-class SkillViewSet(viewsets.ReadOnlyModelViewSet):
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # Only set once the project was found, whether rendered or cached
+        if getattr(self, 'object_pk', None) is not None:
+            event_buffer.add([{'type': 'project_view', 'project': self.object_pk}])
+        return response
+
+    @action(detail=False)
+    def popular(self, request):
+        """Most viewed projects over the last ``days`` days, from the daily summaries"""
+        try:
+            days = min(max(int(request.query_params.get('days', 7)), 1), 90)
+            limit = min(max(int(request.query_params.get('limit', 5)), 1), 20)
+        except ValueError:
+            return Response({"message": "days and limit must be integers"}, status=400)
+        today = timezone.localdate()
+        ranked = popular_projects(today - timedelta(days=days - 1), today, limit=limit)
+        projects = self.get_queryset().in_bulk([pk for pk, _ in ranked])
+        results = [
+            {**self.get_serializer(projects[pk]).data, 'views': views}
+            for pk, views in ranked if pk in projects
+        ]
+        return Response({'days': days, 'results': results})
+
+class SkillViewSet(ConditionalGetMixin, VersionedCacheMixin, SparseFieldsMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['proficiency', 'name']
 
-    @method_decorator(cache_page(60 * 30))
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
-
-class ExperienceViewSet(viewsets.ReadOnlyModelViewSet):
+class ExperienceViewSet(ConditionalGetMixin, VersionedCacheMixin, SparseFieldsMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Experience.objects.all()
     serializer_class = ExperienceSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['position', 'company', 'description']
     ordering_fields = ['start_date', 'end_date', 'company']
 
-class EducationViewSet(viewsets.ReadOnlyModelViewSet):
+class EducationViewSet(ConditionalGetMixin, VersionedCacheMixin, SparseFieldsMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Education.objects.all()
     serializer_class = EducationSerializer
     permission_classes = [permissions.AllowAny]
 
-class TechnologyViewSet(viewsets.ReadOnlyModelViewSet):
+class TechnologyViewSet(ConditionalGetMixin, VersionedCacheMixin, SparseFieldsMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Technology.objects.all()
     serializer_class = TechnologySerializer
     permission_classes = [permissions.AllowAny]
 
-class SocialProfileViewSet(viewsets.ReadOnlyModelViewSet):
+class SocialProfileViewSet(ConditionalGetMixin, VersionedCacheMixin, SparseFieldsMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = SocialProfile.objects.all()
     serializer_class = SocialProfileSerializer
     permission_classes = [permissions.AllowAny]
 
+class PortfolioSnapshotView(APIView):
+    """All public portfolio collections in one pre-rendered document"""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return serve_variant(request, HttpResponse(content_type='application/json'), get_snapshot_variants())
+
 class ContactViewSet(viewsets.ModelViewSet):
     queryset = Contact.objects.all()
     serializer_class = ContactSerializer
     http_method_names = ['post']
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RateLimitThrottle]
+    rate_limits = ('anon', 'contact')
 
-    @method_decorator(ratelimit(key="ip", rate="5/m", method="POST", block=True))
     def create(self, request, *args, **kwargs):
         # Basic validation
         required_fields = ['name', 'email', 'message']
@@ -80,47 +123,49 @@ class ContactViewSet(viewsets.ModelViewSet):
             return Response({"message": "Spam detected"}, status=400)
 
         # Log contact attempt
-        ip_address = request.META.get('HTTP_X_FORWARDED_FOR', 
-                                    request.META.get('REMOTE_ADDR', 'unknown'))
+        ip_address = client_ip(request)
         logger.info(f"Contact form submission from {ip_address}: {request.data.get('email')}")
         
         # Create contact
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-                # Add tracking information
-                contact = serializer.save(
-                    ip_address=request.META.get('HTTP_X_FORWARDED_FOR', 
-                                              request.META.get('REMOTE_ADDR')),
-                    user_agent=request.META.get('HTTP_USER_AGENT', '')
-                )
-                
-                # Send email notification
-                try:
-                    send_mail(
+                # The notification commits with the contact and is sent by the outbox worker
+                with transaction.atomic():
+                    contact = serializer.save(
+                        ip_address=ip_address or None,
+                        user_agent=request.META.get('HTTP_USER_AGENT', '')
+                    )
+                    enqueue_email(
                         subject=f"Portfolio Contact: {contact.name}",
-                        message=f"Name: {contact.name}\nEmail: {contact.email}\n\nMessage:\n{contact.message}",
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[settings.ADMIN_EMAIL],
-                        fail_silently=False,
+                        body=f"Name: {contact.name}\nEmail: {contact.email}\n\nMessage:\n{contact.message}",
+                        to=[settings.ADMIN_EMAIL],
+                        reply_to=[contact.email],
+                        kind='contact',
                     )
-                except Exception as e:
-                    print(f"Email sending failed: {e}")
                 
-                # Update analytics
-                from datetime import date
-                analytics, created = self.get_analytics_model().objects.get_or_create(
-                    date=date.today(),
-                    defaults={'contact_submissions': 1}
-                )
-                if not created:
-                    analytics.contact_submissions += 1
-                    analytics.save()
+                analytics_counters.increment('contact_submissions')
                 
                 return Response({"message": "Message sent successfully"}, status=201)
             
         return Response(serializer.errors, status=400)
-    
-    def get_analytics_model(self):
-        from .models import PortfolioAnalytics
-        return PortfolioAnalytics
 
+class EventIngestView(APIView):
+    """Batches of client analytics events, tallied in memory"""
+    permission_classes = [permissions.AllowAny]
+    parser_classes = [FastJSONParser, BeaconJSONParser]
+    # Every page load posts here, so it gets its own quota instead of the daily anon one
+    throttle_classes = [RateLimitThrottle]
+    rate_limits = ('events',)
+
+    def post(self, request):
+        events = request.data.get('events') if isinstance(request.data, dict) else request.data
+        max_batch = getattr(settings, 'EVENT_MAX_BATCH', 50)
+        if not isinstance(events, list) or not events:
+            return Response({"message": "Expected a list of events"}, status=400)
+        if len(events) > max_batch:
+            return Response({"message": f"At most {max_batch} events per batch"}, status=400)
+
+        # Only a hash of this lands in the visitor sketch
+        visitor = f"{client_ip(request)}|{request.META.get('HTTP_USER_AGENT', '')}"
+        accepted, rejected = event_buffer.add(events, visitor=visitor)
+        return Response({"accepted": accepted, "rejected": rejected}, status=202)
@@ -2,47 +2,84 @@
 AI Secretary API views for portfolio chat
 """
 
+import json
 import logging
+import math
 from datetime import datetime
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
-from django_ratelimit.decorators import ratelimit
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from .ai_secretary import ai_secretary_service
+from .counters import analytics_counters
 from .gemini_service import gemini_service
+from .intents import classify
+from .ratelimit import ANON_POLICY, RateLimitThrottle, client_ip, rate_limiter
 
 logger = logging.getLogger(__name__)
 
-class AISecretaryChatView(APIView):
+# Shared by the sync and async chat endpoints so both draw from one quota
+CHAT_RATE_LIMIT = 'chat'
+
+
+def validate_chat_message(message: str):
+    """Return an error message for invalid chat input, or None"""
+    if not message:
+        return 'Message is required.'
+    if len(message) > 1000:
+        return 'Message is too long. Please keep it under 1000 characters.'
+    return None
+
+
+# Canned replies per intent; the first intent found, by priority, wins
+FALLBACK_RESPONSES = {
+    'greeting': "Hello! I'm Didier's AI secretary. I can help you learn about his backend development experience, testing expertise, and projects. What would you like to know?",
+    'projects': "Didier has worked on several projects including Order & Inventory Management System, Career Compass Platform, and Blockchain Agricultural Supply Chain. He specializes in Python/Django backend development with rigorous testing using PyTest and Unittest. Which type of project interests you?",
+    'skills': "Didier's core skills include Python/Django (90%+), PyTest/Unittest (90%+), PostgreSQL, Docker/Kubernetes, CI/CD Pipelines, and Technical Documentation. He's particularly strong in backend development and comprehensive testing strategies. What specific technology are you interested in?",
+    'contact': "Didier is available for backend development and technical support work! He specializes in scalable APIs, comprehensive testing, and technical documentation. You can reach him directly at didier53053@gmail.com to discuss your project requirements.",
+}
+
+
+class ChatFallbackMixin:
+    """Canned replies used when Gemini is unavailable or fails"""
+    
+    def _get_fallback_response(self, message: str) -> str:
+        """Generate fallback response when AI is not available"""
+        for intent in classify(message):
+            if intent in FALLBACK_RESPONSES:
+                return FALLBACK_RESPONSES[intent]
+        return f"I'd be happy to help you learn more about Didier's work! You asked about '{message}' - I can tell you about his projects, technical skills, experience, or how to contact him for work opportunities. What would you like to know?"
+
+
+class AISecretaryChatView(ChatFallbackMixin, APIView):
     """Simple AI Secretary chat endpoint"""
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RateLimitThrottle]
+    rate_limits = (ANON_POLICY, CHAT_RATE_LIMIT)
     
-    @method_decorator(ratelimit(key="ip", rate="30/m", method="POST", block=True))
     def post(self, request):
         """Handle AI Secretary chat messages"""
         try:
             data = request.data
+            if not isinstance(data, dict):
+                return Response({'error': 'Expected a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
             message = data.get('message', '').strip()
             session_id = data.get('session_id', f"session_{datetime.now().timestamp()}")
             
             # Validate input
-            if not message:
-                return Response({
-                    'error': 'Message is required.'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            if len(message) > 1000:
-                return Response({
-                    'error': 'Message is too long. Please keep it under 1000 characters.'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            error = validate_chat_message(message)
+            if error:
+                return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
             
             # Get client IP
-            ip_address = request.META.get('HTTP_X_FORWARDED_FOR', 
-                                        request.META.get('REMOTE_ADDR', 'unknown'))
+            ip_address = client_ip(request)
             
             # Log visitor inquiry
             ai_secretary_service.log_visitor_inquiry(message, session_id, ip_address)
+            analytics_counters.increment('ai_chat_interactions')
             
             # Store user message
             ai_secretary_service.store_conversation(session_id, {
@@ -52,7 +89,7 @@ class AISecretaryChatView(APIView):
             })
             
             # Get portfolio context
-            portfolio_context = ai_secretary_service.get_portfolio_context()
+            portfolio_context = ai_secretary_service.get_chat_context(message)
             
             # Generate AI response
             if gemini_service.is_available():
@@ -82,25 +119,164 @@ class AISecretaryChatView(APIView):
             return Response({
                 'error': 'An internal error occurred. Please contact Didier directly at didier53053@gmail.com.'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+INTERNAL_ERROR_MESSAGE = 'An internal error occurred. Please contact Didier directly at didier53053@gmail.com.'
+
+
+class ChatRequestError(Exception):
+    """Rejected chat request, carrying the JSON error response to send"""
     
-    def _get_fallback_response(self, message: str) -> str:
-        """Generate fallback response when AI is not available"""
-        message_lower = message.lower()
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncChatBaseView(ChatFallbackMixin, View):
+    """Shared intake for the async chat endpoints"""
+    http_method_names = ['post']
+    rate_limits = (ANON_POLICY, CHAT_RATE_LIMIT)
+    
+    async def accept_message(self, request):
+        """Rate-limit, validate and record the visitor message
+        
+        Returns ``(message, session_id)`` or raises ChatRequestError.
+        """
+        user = await request.auser()
+        for policy in self.rate_limits:
+            if policy == ANON_POLICY and user.is_authenticated:
+                continue
+            allowed, retry_after = await rate_limiter.ahit(policy, client_ip(request))
+            if not allowed:
+                response = JsonResponse(
+                    {'error': 'Too many messages. Please wait a moment and try again.'},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                )
+                response['Retry-After'] = str(math.ceil(retry_after))
+                raise ChatRequestError(response)
+        
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            raise ChatRequestError(JsonResponse({'error': 'Invalid JSON body.'}, status=status.HTTP_400_BAD_REQUEST))
+        if not isinstance(data, dict):
+            raise ChatRequestError(JsonResponse({'error': 'Expected a JSON object.'}, status=status.HTTP_400_BAD_REQUEST))
         
-        if any(word in message_lower for word in ['hello', 'hi', 'hey']):
-            return "Hello! I'm Didier's AI secretary. I can help you learn about his backend development experience, testing expertise, and projects. What would you like to know?"
+        message = str(data.get('message', '')).strip()
+        session_id = data.get('session_id', f"session_{datetime.now().timestamp()}")
         
-        elif any(word in message_lower for word in ['projects', 'work', 'portfolio']):
-            return "Didier has worked on several projects including Order & Inventory Management System, Career Compass Platform, and Blockchain Agricultural Supply Chain. He specializes in Python/Django backend development with rigorous testing using PyTest and Unittest. Which type of project interests you?"
+        error = validate_chat_message(message)
+        if error:
+            raise ChatRequestError(JsonResponse({'error': error}, status=status.HTTP_400_BAD_REQUEST))
         
-        elif any(word in message_lower for word in ['skills', 'technologies', 'tech']):
-            return "Didier's core skills include Python/Django (90%+), PyTest/Unittest (90%+), PostgreSQL, Docker/Kubernetes, CI/CD Pipelines, and Technical Documentation. He's particularly strong in backend development and comprehensive testing strategies. What specific technology are you interested in?"
+        ip_address = client_ip(request)
+        ai_secretary_service.log_visitor_inquiry(message, session_id, ip_address)
+        await analytics_counters.aincrement('ai_chat_interactions')
         
-        elif any(word in message_lower for word in ['contact', 'hire', 'available', 'work with']):
-            return "Didier is available for backend development and technical support work! He specializes in scalable APIs, comprehensive testing, and technical documentation. You can reach him directly at didier53053@gmail.com to discuss your project requirements."
+        await ai_secretary_service.astore_conversation(session_id, {
+            'role': 'user',
+            'content': message,
+            'ip_address': ip_address
+        })
+        return message, session_id
+
+
+class AsyncAISecretaryChatView(AsyncChatBaseView):
+    """AI Secretary chat endpoint for ASGI servers
+    
+    Awaits the Gemini round-trip instead of blocking a worker thread, so
+    one process can hold many in-flight chats. Same payload and response
+    shape as AISecretaryChatView.
+    """
+    
+    async def post(self, request):
+        """Handle AI Secretary chat messages"""
+        try:
+            message, session_id = await self.accept_message(request)
+            portfolio_context = await ai_secretary_service.aget_chat_context(message)
+            
+            ai_response = None
+            if gemini_service.is_available():
+                ai_response = await gemini_service.generate_response_async(message, portfolio_context)
+            if not ai_response:
+                ai_response = self._get_fallback_response(message)
+            
+            await ai_secretary_service.astore_conversation(session_id, {
+                'role': 'assistant',
+                'content': ai_response
+            })
+            
+            return JsonResponse({
+                'reply': ai_response,
+                'session_id': session_id,
+                'timestamp': datetime.now().isoformat(),
+                'ai_powered': gemini_service.is_available()
+            })
+            
+        except ChatRequestError as e:
+            return e.response
+        except Exception as e:
+            logger.error(f"AI Secretary chat error: {e}")
+            return JsonResponse({'error': INTERNAL_ERROR_MESSAGE}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class AISecretaryChatStreamView(AsyncChatBaseView):
+    """AI Secretary chat streamed as Server-Sent Events
+    
+    Emits a ``chunk`` event per model chunk as soon as Gemini produces it,
+    then a ``done`` event; the assembled reply is stored once the stream
+    completes. Serve through ASGI so chunks are flushed as they arrive.
+    """
+    
+    async def post(self, request):
+        """Stream the reply to a chat message"""
+        try:
+            message, session_id = await self.accept_message(request)
+        except ChatRequestError as e:
+            return e.response
         
-        else:
-            return f"I'd be happy to help you learn more about Didier's work! You asked about '{message}' - I can tell you about his projects, technical skills, experience, or how to contact him for work opportunities. What would you like to know?"
+        response = StreamingHttpResponse(
+            self.stream_reply(message, session_id), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    async def stream_reply(self, message: str, session_id: str):
+        chunks = []
+        ai_powered = False
+        try:
+            if gemini_service.is_available():
+                portfolio_context = await ai_secretary_service.aget_chat_context(message)
+                async for text in gemini_service.stream_response_async(message, portfolio_context):
+                    chunks.append(text)
+                    ai_powered = True
+                    yield sse_event('chunk', {'text': text})
+            
+            if not chunks:
+                fallback = self._get_fallback_response(message)
+                chunks.append(fallback)
+                yield sse_event('chunk', {'text': fallback})
+            
+            await ai_secretary_service.astore_conversation(session_id, {
+                'role': 'assistant',
+                'content': ''.join(chunks).strip()
+            })
+            yield sse_event('done', {
+                'session_id': session_id,
+                'timestamp': datetime.now().isoformat(),
+                'ai_powered': ai_powered
+            })
+        except Exception as e:
+            logger.error(f"AI Secretary stream error: {e}")
+            yield sse_event('error', {'error': INTERNAL_ERROR_MESSAGE})
 
 
 class AISecretaryAnalyticsView(APIView):
@@ -116,6 +292,8 @@ class AISecretaryAnalyticsView(APIView):
             return Response({
                 'analytics': analytics,
                 'cleaned_conversations': cleaned_count,
+                'answer_cache': gemini_service.answer_cache.stats(),
+                'coalescing': gemini_service.single_flight.stats(),
                 'ai_available': gemini_service.is_available(),
                 'timestamp': datetime.now().isoformat()
             })
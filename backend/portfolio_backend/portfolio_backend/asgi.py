@@ -17,3 +17,7 @@ application = get_asgi_application()
 
 # To run with Hypercorn (for production):
 # hypercorn portfolio_backend.asgi:application
+#
+# Serve through ASGI (or gunicorn with uvicorn workers) so the async
+# AI secretary endpoint can await Gemini instead of pinning a worker:
+# gunicorn portfolio_backend.asgi:application -k uvicorn.workers.UvicornWorker
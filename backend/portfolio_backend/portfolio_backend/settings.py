@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.ratelimit.ClientIPMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -130,6 +131,25 @@ else:
         }
     }
 
+# Read API responses are cached under per-model version counters that
+# model signals bump, so entries never go stale; the expiry only reclaims
+# entries orphaned by a version bump
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', '86400'))
+# Most ?search= hits ranked and returned by the full-text index
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '1000'))
+# Seconds between write-behind flushes of analytics counters (0: only
+# `manage.py flush_analytics`); counters live in CACHES, so use Redis with
+# several workers
+ANALYTICS_FLUSH_INTERVAL = int(os.getenv('ANALYTICS_FLUSH_INTERVAL', '60'))
+
+# /api/events/ tallies events per worker and hands them to the counters
+# after this many events or seconds
+EVENT_BUFFER_MAX_EVENTS = int(os.getenv('EVENT_BUFFER_MAX_EVENTS', '500'))
+EVENT_BUFFER_MAX_AGE = float(os.getenv('EVENT_BUFFER_MAX_AGE', '5'))
+EVENT_MAX_BATCH = 50
+# Projects tracked per day for /api/projects/popular/ (fixed memory)
+TOP_PROJECTS_CAPACITY = 100
+
 # Static files
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -171,16 +191,40 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # orjson-backed JSON; the browsable API is only offered while debugging
+    'DEFAULT_RENDERER_CLASSES': ['api.renderers.FastJSONRenderer'] + (
+        ['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []
+    ),
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PortfolioPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_THROTTLE_CLASSES': [] if DEBUG else [
-        'rest_framework.throttling.AnonRateThrottle',
+        'api.ratelimit.RateLimitThrottle',
     ],
-    'DEFAULT_THROTTLE_RATES': {
-        'anon': '1000/hour' if DEBUG else '100/day',
-    }
 }
 
+# Rows returned for ?page_size=all (the portfolio page loads whole lists)
+PAGINATION_ALL_PAGE_SIZE = 500
+
+# Token-bucket policies per client IP ("<requests>/<s|m|h|d>"); views pick
+# theirs with `rate_limits`, everything else gets 'anon' outside DEBUG
+RATE_LIMITS = {
+    'anon': '1000/hour' if DEBUG else '100/day',
+    'contact': '5/m',
+    'chat': '30/m',
+    'events': '60/m',
+}
+# Seconds a worker may spend tokens before reconciling with CACHES
+RATE_LIMIT_SYNC_INTERVAL = float(os.getenv('RATE_LIMIT_SYNC_INTERVAL', '1'))
+# X-Forwarded-For is only trusted from these networks (load balancers, nginx)
+TRUSTED_PROXIES = os.getenv(
+    'TRUSTED_PROXIES', '127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,fc00::/7'
+).split(',')
+
 # Spectacular settings
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Portfolio API',
@@ -203,9 +247,64 @@ if EMAIL_HOST_USER and EMAIL_HOST_PASSWORD:
 else:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Notification emails go through the outbox table. 'thread' drains it in the
+# background after each commit; 'command' leaves it to `manage.py drain_outbox`
+# (run it on a schedule either way so failed sends are retried)
+OUTBOX_WORKER = os.getenv('OUTBOX_WORKER', 'thread')
+OUTBOX_DIGEST = os.getenv('OUTBOX_DIGEST', 'False') == 'True'
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+
 # Google Gemini AI Configuration
 GOOGLE_GEMINI_API_KEY = os.getenv('GOOGLE_GEMINI_API_KEY')
 GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+# Per-call deadline (seconds); slower calls are abandoned and answered by the fallback
+GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', '10'))
+# Circuit breaker: open after this many consecutive failed or slow calls,
+# send traffic straight to the fallback, then probe again after the recovery time
+GEMINI_BREAKER_FAILURES = int(os.getenv('GEMINI_BREAKER_FAILURES', '5'))
+GEMINI_BREAKER_RECOVERY = float(os.getenv('GEMINI_BREAKER_RECOVERY', '30'))
+GEMINI_SLOW_CALL_SECONDS = float(os.getenv('GEMINI_SLOW_CALL_SECONDS', '6'))
+GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', '8'))
+
+# AI secretary conversation history: 'memory' keeps it per worker process,
+# 'cache' shares it across workers through CACHES (use with Redis)
+AI_SECRETARY_STORE = os.getenv('AI_SECRETARY_STORE', 'cache' if REDIS_URL else 'memory')
+AI_SECRETARY_MAX_MESSAGES = 10
+AI_SECRETARY_MAX_SESSIONS = int(os.getenv('AI_SECRETARY_MAX_SESSIONS', '10000'))
+AI_SECRETARY_MAX_STORE_BYTES = int(os.getenv('AI_SECRETARY_MAX_STORE_BYTES', str(32 * 1024 * 1024)))
+AI_SECRETARY_SESSION_TTL = int(os.getenv('AI_SECRETARY_SESSION_TTL', str(60 * 60 * 24)))
+# Cached answers for repeated questions (per-process LRU + shared cache)
+AI_ANSWER_CACHE_SIZE = int(os.getenv('AI_ANSWER_CACHE_SIZE', '1000'))
+AI_ANSWER_CACHE_TTL = int(os.getenv('AI_ANSWER_CACHE_TTL', str(60 * 60 * 6)))
+# Coalesce identical concurrent prompts across workers via a cache lock
+# (needs a shared cache such as Redis; in-process coalescing is always on)
+AI_SINGLE_FLIGHT_DISTRIBUTED = bool(REDIS_URL)
+# Questions pre-answered by `manage.py warm_answer_cache` at deploy time
+AI_SECRETARY_FAQ = [
+    "What projects has he built?",
+    "Is he available for work?",
+    "What are his skills?",
+    "How can I contact him?",
+    "What is his experience with Django?",
+    "Does he write tests?",
+]
+
+# Who the AI secretary represents; projects, skills and experience in the
+# system prompt come from the database
+AI_SECRETARY_OWNER = "Didier Imanirahari"
+AI_SECRETARY_PROFILE = [
+    "Python Engineer | Backend & Testing Specialist",
+    "Specializes in Python, Django/DRF, and rigorous code testing",
+    "Location: Kigali, Rwanda",
+]
+# Character budget for the system prompt (~4 characters per token)
+AI_SECRETARY_CONTEXT_MAX_CHARS = int(os.getenv('AI_SECRETARY_CONTEXT_MAX_CHARS', '4000'))
+# Send only the rows most relevant to each question (needs numpy)
+AI_RETRIEVAL_ENABLED = os.getenv('AI_RETRIEVAL_ENABLED', 'True') == 'True'
+AI_RETRIEVAL_TOP_K = int(os.getenv('AI_RETRIEVAL_TOP_K', '5'))
+
+# Seconds between background sweeps of expired in-memory sessions (0 disables)
+AI_SECRETARY_SWEEP_INTERVAL = int(os.getenv('AI_SECRETARY_SWEEP_INTERVAL', '300'))
 
 # Logging configuration
 LOGGING = {
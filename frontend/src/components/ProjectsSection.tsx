@@ -15,7 +15,7 @@ export function ProjectsSection() {
   useEffect(() => {
     async function fetchProjects() {
       try {
-        const response = await fetch('http://127.0.0.1:8000/api/projects/')
+        const response = await fetch('http://127.0.0.1:8000/api/projects/?page_size=all')
         if (!response.ok) {
           throw new Error('API not available')
         }
@@ -24,7 +24,7 @@ export function SkillsSection() {
   useEffect(() => {
     async function fetchSkills() {
       try {
-        const response = await fetch('http://127.0.0.1:8000/api/skills/')
+        const response = await fetch('http://127.0.0.1:8000/api/skills/?page_size=all')
         if (!response.ok) {
           throw new Error('API not available')
         }